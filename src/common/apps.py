@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.common"
+
+    def ready(self) -> None:
+        from src.common.perf import install_query_recorder  # noqa: PLC0415
+
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,92 @@
+from inspect import isawaitable
+from typing import TYPE_CHECKING, Any
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+
+class AsyncAPIView(APIView):
+    """APIView с async-обработчиками для ASGI.
+
+    DRF вызывает обработчики синхронно, и Django под ASGI уводит такой view
+    в поток. Здесь dispatch — корутина: разбор запроса, аутентификация,
+    права и исключения идут по правилам DRF прямо в event loop.
+    Аутентификатор с aauthenticate вызывается без потока, остальные — через
+    sync_to_async. Права и троттлинг должны обходиться без БД.
+
+    Обработчики get/post/... объявляются как async def. DRF-Response
+    рендерится потоком Django (ответы об ошибках); горячему пути лучше
+    отдавать готовый HttpResponse.
+    """
+
+    async def dispatch(  # type: ignore[override]
+        self,
+        request: HttpRequest,
+        *args: Any,  # noqa: ANN401 - аргументы URL
+        **kwargs: Any,  # noqa: ANN401
+    ) -> HttpResponseBase:
+        self.args = args
+        self.kwargs = kwargs
+        drf_request = self.initialize_request(request, *args, **kwargs)
+        self.request = drf_request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(drf_request, *args, **kwargs)
+            method = drf_request.method.lower()
+            handler = (
+                getattr(self, method, self.http_method_not_allowed)
+                if method in self.http_method_names
+                else self.http_method_not_allowed
+            )
+            response = handler(drf_request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:  # noqa: BLE001 - как APIView.dispatch
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(drf_request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(
+        self,
+        request: Request,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        """initial() DRF с асинхронной аутентификацией."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    @staticmethod
+    async def aperform_authentication(request: Request) -> None:
+        """Request._authenticate DRF; результат кладётся в request.user/auth."""
+        for authenticator in request.authenticators:
+            aauthenticate = getattr(authenticator, "aauthenticate", None)
+            try:
+                if aauthenticate is not None:
+                    user_auth: Awaitable[Any] = aauthenticate(request)
+                else:
+                    user_auth = sync_to_async(authenticator.authenticate)(request)
+                user_auth_tuple = await user_auth
+            except exceptions.APIException:
+                request._not_authenticated()  # noqa: SLF001 - как в DRF
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator  # noqa: SLF001
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()  # noqa: SLF001
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Кэши, которые другой процесс не видит
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias: str = "default") -> bool:
+    """Видят ли все процессы приложения одни и те же ключи кэша.
+
+    Отметки об отзыве, прилипание к primary и сбросы кэша идентичностей,
+    записанные в кэш процесса, не видны остальным воркерам. Код, который
+    на них полагается, без общего кэша проверяет БД. SINGLE_PROCESS
+    объявляет кэш процесса общим: приложение работает одним процессом.
+    """
+    if settings.SINGLE_PROCESS:
+        return True
+    return not isinstance(caches[alias], LOCAL_BACKENDS)
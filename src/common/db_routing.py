@@ -0,0 +1,262 @@
+import logging
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Final
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from src.common.cache import cache_is_shared
+
+if TYPE_CHECKING:
+    from rest_framework.views import APIView
+
+    # Для mypy миксин наследует APIView: переопределения сверяются с DRF
+    _MixinBase = APIView
+else:
+    _MixinBase = object
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах; на primary (не в recovery) — 0. Если всё
+# полученное WAL применено, реплика догнала primary, даже если тот простаивает
+# и время последней транзакции давно в прошлом
+REPLICA_LAG_SQL: Final[str] = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),
+            'Infinity'
+        )
+    END
+"""
+PIN_CACHE_KEY: Final[str] = "db-routing:primary:{user_id}"
+PIN_COOKIE: Final[str] = "primary_pin"
+PIN_COOKIE_SALT: Final[str] = "src.common.db_routing.pin"
+
+
+def replica_aliases() -> list[str]:
+    return settings.DATABASE_REPLICAS
+
+
+class ReplicaLagMonitor:
+    """Отставание реплик с кэшем в памяти процесса.
+
+    Реплика проверяется не чаще REPLICA_LAG_CHECK_INTERVAL секунд; недоступная
+    реплика считается бесконечно отстающей до следующей проверки.
+    """
+
+    def __init__(self) -> None:
+        self._checked: dict[str, tuple[float, float]] = {}
+        self._lock = Lock()
+
+    def lag(self, alias: str) -> float:
+        checked = self._checked.get(alias)
+        if checked is not None and not self._expired(checked):
+            return checked[1]
+        with self._lock:
+            # Пока один поток проверяет реплику, остальные ждут его результат
+            checked = self._checked.get(alias)
+            if checked is None or self._expired(checked):
+                checked = (monotonic(), self._measure(alias))
+                self._checked[alias] = checked
+        return checked[1]
+
+    @staticmethod
+    def _expired(checked: tuple[float, float]) -> bool:
+        interval: float = settings.REPLICA_LAG_CHECK_INTERVAL
+        return monotonic() - checked[0] >= interval
+
+    def clear(self) -> None:
+        self._checked.clear()
+
+    @staticmethod
+    def _measure(alias: str) -> float:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.warning("Replica %s is unavailable", alias, exc_info=True)
+            return float("inf")
+
+
+lag_monitor = ReplicaLagMonitor()
+
+
+@dataclass
+class RoutingState:
+    """Состояние маршрутизации в рамках запроса."""
+
+    replica_reads: bool = False
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("db_routing_state", default=None)
+
+
+@contextmanager
+def routing_state() -> Iterator[RoutingState]:
+    state = RoutingState()
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Чтения в блоке могут уйти на реплику."""
+    with _switch(replica_reads=True):
+        yield
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Все чтения в блоке — с primary, даже внутри replica_reads()."""
+    with _switch(replica_reads=False):
+        yield
+
+
+@contextmanager
+def _switch(*, replica_reads: bool) -> Iterator[None]:
+    state = _state.get()
+    if state is None:
+        with routing_state() as state:
+            state.replica_reads = replica_reads
+            yield
+        return
+    previous = state.replica_reads
+    state.replica_reads = replica_reads
+    try:
+        yield
+    finally:
+        state.replica_reads = previous
+
+
+def pin_to_primary(response: HttpResponseBase, user_id: int) -> None:
+    """Закрепляет пользователя за primary на REPLICA_STICKY_SECONDS секунд.
+
+    Отметка — подписанная cookie ответа: следующий запрос клиента её
+    принесёт, в какой бы процесс он ни попал. С общим кэшем отметка
+    дублируется в кэш для клиентов, которые не хранят cookie.
+    """
+    response.set_signed_cookie(
+        PIN_COOKIE,
+        str(user_id),
+        salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite="Lax",
+    )
+    if cache_is_shared():
+        cache.set(
+            PIN_CACHE_KEY.format(user_id=user_id),
+            1,
+            settings.REPLICA_STICKY_SECONDS,
+        )
+
+
+def is_pinned_to_primary(request: HttpRequest, user_id: int) -> bool:
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE,
+        default=None,
+        salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS,
+    )
+    if pinned == str(user_id):
+        return True
+    # Отметка в кэше процесса могла устареть в другом воркере: не доверяем ей
+    return (
+        cache_is_shared()
+        and cache.get(PIN_CACHE_KEY.format(user_id=user_id)) is not None
+    )
+
+
+def choose_replica() -> str | None:
+    """Случайная реплика с отставанием не больше REPLICA_MAX_LAG_SECONDS."""
+    fresh = [
+        alias
+        for alias in replica_aliases()
+        if lag_monitor.lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+    return random.choice(fresh) if fresh else None  # noqa: S311
+
+
+class ReplicaRouter:
+    """Запись — всегда в primary, чтение — на реплику только внутри replica_reads().
+
+    Внутри транзакции на primary чтения остаются на primary: реплика не видит
+    незакоммиченных изменений. Без подходящей по отставанию реплики — primary.
+    """
+
+    def db_for_read(self, _model: type[Model], **_hints: Any) -> str:  # noqa: ANN401
+        state = _state.get()
+        if (
+            state is None
+            or not state.replica_reads
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return choose_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, _model: type[Model], **_hints: Any) -> str:  # noqa: ANN401
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, _obj1: Model, _obj2: Model, **_hints: Any) -> bool:  # noqa: ANN401
+        # Реплики содержат те же данные, что и primary
+        return True
+
+    def allow_migrate(self, db: str, _app_label: str, **_hints: Any) -> bool:  # noqa: ANN401
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin(_MixinBase):
+    """Для view: безопасные методы читают с реплики.
+
+    Пользователь, недавно писавший в БД, читает с primary
+    REPLICA_STICKY_SECONDS секунд, чтобы видеть свои изменения.
+    Состояние запроса создаёт DatabaseRoutingMiddleware.
+    """
+
+    def initial(self, request: Request, *args: object, **kwargs: object) -> None:
+        super().initial(request, *args, **kwargs)
+        state = _state.get()
+        if (
+            state is not None
+            and request.method in SAFE_METHODS
+            and replica_aliases()
+            and not (
+                request.user.is_authenticated
+                and is_pinned_to_primary(request, request.user.pk)
+            )
+        ):
+            state.replica_reads = True
+
+    def finalize_response(
+        self,
+        request: Request,
+        response: Response,
+        *args: object,
+        **kwargs: object,
+    ) -> Response:
+        state = _state.get()
+        if state is not None:
+            state.replica_reads = False
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,353 @@
+import atexit
+import json
+import os
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import ClassVar, Final, NotRequired, TypedDict
+
+from django.conf import settings
+
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+# Значение серии: число у счётчика, [корзины..., +Inf, сумма] у гистограммы
+SeriesValue = float | list[float]
+
+
+class MetricSnapshot(TypedDict):
+    """Снимок метрики; в мультипроцессном режиме хранится в JSON-файле процесса."""
+
+    kind: str
+    documentation: str
+    labelnames: list[str]
+    # Пары (значения меток, значение серии); из JSON пара читается списком
+    values: list[tuple[list[str], SeriesValue]]
+    buckets: NotRequired[list[float]]
+
+
+# Снимки метрик по имени
+Snapshot = dict[str, MetricSnapshot]
+
+
+class Metric(ABC):
+    kind: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> MetricSnapshot:
+        return {
+            "kind": self.kind,
+            "documentation": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": [(list(key), value) for key, value in self._values()],
+        }
+
+    @abstractmethod
+    def _values(self) -> Iterable[tuple[LabelValues, SeriesValue]]: ...
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._counts: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._counts.get(self._key(labels), 0)
+
+    def _values(self) -> Iterable[tuple[LabelValues, SeriesValue]]:
+        with self._lock:
+            return list(self._counts.items())
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # По ключу: [счётчики по корзинам (последняя — +Inf), сумма]
+        self._series: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> MetricSnapshot:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+    def _values(self) -> Iterable[tuple[LabelValues, SeriesValue]]:
+        with self._lock:
+            return [(key, list(series)) for key, series in self._series.items()]
+
+
+class CallbackCounter(Metric):
+    """Счётчик, значение которого читается в момент сбора (например, из кэша)."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float],
+    ) -> None:
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def _values(self) -> Iterable[tuple[LabelValues, SeriesValue]]:
+        return [((), self.callback())]
+
+
+class CallbackGauge(CallbackCounter):
+    kind = "gauge"
+
+
+class Registry:
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Обновление метрики — короткая секция под её локом, без общих блокировок.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def register[M: Metric](self, metric: M) -> M:
+        with self._lock:
+            if metric.name in self._metrics:
+                msg = f"Metric {metric.name} is already registered"
+                raise ValueError(msg)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+registry = Registry()
+
+
+@dataclass
+class MultiprocessStore:
+    """Снимки процессов в каталоге: <pid>.json, запись через os.replace.
+
+    Снимок процесса сбрасывается не чаще flush_interval секунд и при выходе.
+    Каталог нужно очищать при старте мастер-процесса (например, в on_starting
+    у gunicorn), иначе счётчики прошлых запусков попадут в сумму.
+    """
+
+    directory: Path
+    flush_interval: float
+    _last_flush: float = 0.0
+
+    def maybe_flush(self) -> None:
+        if monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(registry.snapshot()))
+        temporary.replace(path)
+
+    def snapshots(self) -> Iterator[Snapshot]:
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                yield json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Файл процесса мог исчезнуть между glob и чтением
+                continue
+
+
+def _build_store() -> MultiprocessStore | None:
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if not directory:
+        return None
+    store = MultiprocessStore(
+        directory=Path(directory),
+        flush_interval=settings.METRICS_FLUSH_INTERVAL,
+    )
+    atexit.register(store.flush)
+    return store
+
+
+store = _build_store()
+
+
+def maybe_flush() -> None:
+    if store is not None:
+        store.maybe_flush()
+
+
+def merge(snapshots: Iterable[Snapshot]) -> Snapshot:
+    """Суммирует снимки процессов: счётчики и корзины гистограмм складываются."""
+    described: Snapshot = {}
+    series: dict[str, dict[LabelValues, SeriesValue]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            described.setdefault(name, metric)
+            values = series.setdefault(name, {})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = values.get(key)
+                if isinstance(value, list):
+                    if not isinstance(current, list):
+                        current = [0.0] * len(value)
+                    values[key] = [a + b for a, b in zip(current, value, strict=True)]
+                else:
+                    if not isinstance(current, float | int):
+                        current = 0.0
+                    values[key] = current + value
+    merged: Snapshot = {}
+    for name, metric in described.items():
+        merged[name] = metric.copy()
+        merged[name]["values"] = [
+            (list(key), value) for key, value in series[name].items()
+        ]
+    return merged
+
+
+def collect() -> Snapshot:
+    if store is None:
+        return merge([registry.snapshot()])
+    store.flush()
+    return merge(store.snapshots())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(names, values, strict=True), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render(metrics: Snapshot) -> str:
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        labelnames = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for key, value in sorted(metric["values"], key=lambda pair: pair[0]):
+            if not isinstance(value, list):
+                lines.append(f"{name}{_labels(labelnames, key)} {_number(value)}")
+                continue
+            *counts, total = value
+            cumulative = 0.0
+            for bound, count in zip(
+                [*metric["buckets"], float("inf")],
+                counts,
+                strict=True,
+            ):
+                cumulative += count
+                le = _labels(labelnames, key, le=_number(bound))
+                lines.append(f"{name}_bucket{le} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(total)}")
+            lines.append(
+                f"{name}_count{_labels(labelnames, key)} {_number(cumulative)}",
+            )
+    return "\n".join(lines) + "\n"
+
+
+# Общие метрики HTTP; метрики приложений объявляются в их модулях metrics.py
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL name",
+    ("view", "method"),
+)
+http_requests = registry.counter(
+    "http_requests_total",
+    "Requests by URL name and status",
+    ("view", "method", "status"),
+)
+db_queries = registry.counter(
+    "db_queries_total",
+    "SQL queries made by sampled requests, by URL name",
+    ("view",),
+)
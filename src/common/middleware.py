@@ -0,0 +1,302 @@
+import logging
+import random
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+from typing import cast
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, resolve
+
+from src.common import metrics, profiling
+from src.common.db_routing import pin_to_primary, routing_state
+from src.common.perf import RequestTimings, current_timings
+from src.common.profiling import StackSampler
+
+logger = logging.getLogger("src.perf")
+
+
+GetResponse = Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]]
+
+
+def view_name(request: HttpRequest) -> str:
+    match = request.resolver_match
+    return match.view_name if match else "unresolved"
+
+
+def method_name(request: HttpRequest) -> str:
+    # method пуст только у HttpRequest, собранного вручную
+    return request.method or "UNKNOWN"
+
+
+class AsyncCapableMiddleware(ABC):
+    """Middleware для WSGI и ASGI.
+
+    В async-цепочке (ASGI, async-view) Django вызывает её как корутину —
+    __acall__, — и запрос не уходит в поток ради sync-middleware. Следующее
+    звено цепочки вызывается через respond/arespond по ветке is_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: GetResponse) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    @abstractmethod
+    def __call__(
+        self,
+        request: HttpRequest,
+    ) -> HttpResponse | Awaitable[HttpResponse]: ...
+
+    def respond(self, request: HttpRequest) -> HttpResponse:
+        """Ответ следующего звена sync-цепочки."""
+        return cast("HttpResponse", self.get_response(request))
+
+    async def arespond(self, request: HttpRequest) -> HttpResponse:
+        """Ответ следующего звена async-цепочки."""
+        return await cast("Awaitable[HttpResponse]", self.get_response(request))
+
+
+class PerfMiddleware(AsyncCapableMiddleware):
+    """Замеры запроса: общее время, время и число SQL, сериализация, view.
+
+    Подробно замеряется доля запросов PERF_SAMPLE_RATE, остальные проходят
+    без обёрток. Результат — заголовок Server-Timing и строка лога src.perf;
+    запросы дольше PERF_SLOW_REQUEST_MS логируются вместе с SQL.
+    Время и статус всех запросов попадают в метрики /metrics.
+    """
+
+    def __init__(self, get_response: GetResponse) -> None:
+        super().__init__(get_response)
+        self.sample_rate: float = settings.PERF_SAMPLE_RATE
+        self.slow_request_ms: int = settings.PERF_SLOW_REQUEST_MS
+        self.server_timing: bool = settings.PERF_SERVER_TIMING
+
+    def __call__(
+        self,
+        request: HttpRequest,
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            started = perf_counter()
+            response = self.respond(request)
+            self.observe(request, response, perf_counter() - started)
+            return response
+
+        # SQL попадает в замеры через perf.record_query на каждом соединении
+        timings = RequestTimings(capture_sql=self.slow_request_ms > 0)
+        token = current_timings.set(timings)
+        try:
+            response = self.respond(request)
+        finally:
+            timings.stop()
+            current_timings.reset(token)
+        self.finish(request, response, timings)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self.sampled():
+            started = perf_counter()
+            response = await self.arespond(request)
+            self.observe(request, response, perf_counter() - started)
+            return response
+
+        timings = RequestTimings(capture_sql=self.slow_request_ms > 0)
+        token = current_timings.set(timings)
+        try:
+            response = await self.arespond(request)
+        finally:
+            timings.stop()
+            current_timings.reset(token)
+        self.finish(request, response, timings)
+        return response
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate  # noqa: S311
+
+    def finish(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        timings: RequestTimings,
+    ) -> None:
+        self.observe(request, response, timings.wall_seconds, timings.queries)
+        self.report(request, response, timings)
+
+    @staticmethod
+    def observe(
+        request: HttpRequest,
+        response: HttpResponse,
+        seconds: float,
+        queries: int | None = None,
+    ) -> None:
+        view = view_name(request)
+        metrics.http_request_duration.observe(
+            seconds,
+            view=view,
+            method=method_name(request),
+        )
+        metrics.http_requests.inc(
+            view=view,
+            method=method_name(request),
+            status=str(response.status_code),
+        )
+        if queries is not None:
+            metrics.db_queries.inc(queries, view=view)
+        metrics.maybe_flush()
+
+    def report(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        timings: RequestTimings,
+    ) -> None:
+        wall_ms = timings.wall_seconds * 1000
+        db_ms = timings.db_seconds * 1000
+        serialize_ms = timings.serialize_seconds * 1000
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f"total;dur={wall_ms:.1f}",
+                    f'db;dur={db_ms:.1f};desc="{timings.queries} queries"',
+                    f"serialize;dur={serialize_ms:.1f}",
+                ],
+            )
+
+        perf: dict[str, object] = {
+            "view": view_name(request),
+            "method": method_name(request),
+            "status": response.status_code,
+            "wall_ms": round(wall_ms, 2),
+            "db_ms": round(db_ms, 2),
+            "queries": timings.queries,
+            "serialize_ms": round(serialize_ms, 2),
+        }
+        if self.slow_request_ms and wall_ms >= self.slow_request_ms:
+            perf["sql"] = [
+                {"sql": sql, "ms": round(elapsed * 1000, 2)}
+                for sql, elapsed in timings.statements
+            ]
+            logger.warning("slow request", extra={"perf": perf})
+        else:
+            logger.info("request", extra={"perf": perf})
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """Сэмплирующее профилирование отдельных запросов.
+
+    Профилируется доля PROFILING_SAMPLE_RATE запросов к view из PROFILING_VIEWS
+    (пусто — к любым) и каждый запрос с подписанным заголовком X-Profile
+    сотрудника. Стеки сохраняются в PROFILING_DIR в формате collapsed.
+    Только под WSGI: в async-цепочке (ASGI) запросы проходят без профиля.
+    """
+
+    header = "HTTP_X_PROFILE"
+
+    def __init__(self, get_response: GetResponse) -> None:
+        super().__init__(get_response)
+        self.sample_rate: float = settings.PROFILING_SAMPLE_RATE
+        self.views: frozenset[str] = frozenset(settings.PROFILING_VIEWS)
+        self.interval: float = settings.PROFILING_INTERVAL_MS / 1000
+
+    def __call__(
+        self,
+        request: HttpRequest,
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.respond(request)
+
+        with StackSampler(self.interval) as sampler:
+            response = self.respond(request)
+        self.save(request, response, sampler)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # В async-цепочке поток event loop общий для всех запросов, а view и ORM
+        # идут в потоках sync_to_async: стеки потока не принадлежат запросу,
+        # и профиль вводил бы в заблуждение. Такие запросы не профилируются
+        return await self.arespond(request)
+
+    @staticmethod
+    def save(
+        request: HttpRequest,
+        response: HttpResponse,
+        sampler: StackSampler,
+    ) -> None:
+        if sampler.samples:
+            label = f"{method_name(request)}-{view_name(request)}"
+            path = profiling.get_store().save(label, sampler.collapsed())
+            response["X-Profile-Id"] = path.name
+
+    def should_profile(self, request: HttpRequest) -> bool:
+        token = request.META.get(self.header)
+        if token:
+            return self.is_staff_token(token)
+        return self.should_sample(request)
+
+    def should_sample(self, request: HttpRequest) -> bool:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:  # noqa: S311
+            return False
+        if not self.views:
+            return True
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in self.views
+
+    @staticmethod
+    def is_staff_token(token: str) -> bool:
+        user_id = profiling.unsign_token(token)
+        if user_id is None:
+            return False
+        return (
+            get_user_model()
+            .objects.filter(pk=user_id, is_active=True, is_staff=True)
+            .exists()
+        )
+
+
+class DatabaseRoutingMiddleware(AsyncCapableMiddleware):
+    """Состояние маршрутизации чтений на реплики на время запроса.
+
+    Если запрос писал в БД, пользователь закрепляется за primary на
+    REPLICA_STICKY_SECONDS секунд (read-your-writes для следующих запросов).
+    """
+
+    def __call__(
+        self,
+        request: HttpRequest,
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.is_async:
+            return self.__acall__(request)
+        with routing_state() as state:
+            response = self.respond(request)
+        if state.wrote:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # Состояние в contextvar: записи в потоках sync_to_async его видят
+        with routing_state() as state:
+            response = await self.arespond(request)
+        if state.wrote:
+            # Пользователь сессии Django ленивый и может читать БД
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    @staticmethod
+    def pin(request: HttpRequest, response: HttpResponse) -> None:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(response, user.pk)
@@ -1,5 +1,3 @@
-from typing import ClassVar
-
 from django.db import models
 
 
@@ -8,7 +6,7 @@ class TimeStampedModel(models.Model):
 
     Всегда добавляет поля created_at и updated_at.
     Делает порядок по убыванию created_at по умолчанию.
-    Создаёт индекс по created_at.
+    Индекса по created_at нет: индексы подбираются под запросы каждой модели.
     """
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -17,6 +15,3 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
         ordering = ("-created_at",)
-        indexes: ClassVar[list[models.Index]] = [
-            models.Index(fields=["created_at"], name="idx_created_at"),
-        ]
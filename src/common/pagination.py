@@ -0,0 +1,173 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Final
+
+from django.db.models import F, Model, QuerySet
+from django.db.models.fields.tuple_lookups import Tuple, TupleLessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+# Ключ страницы: (created_at, id) последней отданной строки
+Position = tuple[datetime, int]
+
+# Порядок TimeStampedModel с id для однозначности при равных created_at
+KEYSET_ORDERING: Final[tuple[str, str]] = ("-created_at", "-id")
+
+
+def encode_cursor(position: Position) -> str:
+    created_at, pk = position
+    raw = json.dumps([created_at.isoformat(), pk], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Position:
+    """Разбирает курсор; ValueError, если он повреждён."""
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        position = (datetime.fromisoformat(created_at), int(pk))
+    except (binascii.Error, TypeError, UnicodeDecodeError, ValueError) as exc:
+        msg = "Invalid cursor"
+        raise ValueError(msg) from exc
+    if position[0].tzinfo is None:
+        msg = "Invalid cursor"
+        raise ValueError(msg)
+    return position
+
+
+def keyset_page[ModelT: Model](
+    queryset: QuerySet[ModelT],
+    *,
+    after: Position | None,
+    size: int,
+) -> QuerySet[ModelT]:
+    """Строки после after в порядке KEYSET_ORDERING, не больше size.
+
+    Сравнение строк (created_at, id) < (...) PostgreSQL выполняет как границу
+    индекса с хвостом (created_at, id): глубина страницы не влияет на
+    стоимость, в отличие от OFFSET.
+    """
+    if after is not None:
+        # Tuple-лукапы Django строит для составных ключей; здесь они дают
+        # сравнение строк вместо OR по двум полям
+        queryset = queryset.filter(
+            TupleLessThan(Tuple(F("created_at"), F("id")), after),
+        )
+    return queryset.order_by(*KEYSET_ORDERING)[:size]
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по курсору на (created_at, id), от новых к старым.
+
+    Не считает общее число строк (COUNT(*)) и не использует OFFSET: страница
+    стоит одинаково на любой глубине. Ссылка next есть, пока за страницей
+    остаются строки; переход назад не поддерживается.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def __init__(self) -> None:
+        self.request: Request | None = None
+        self.next_position: Position | None = None
+
+    @property
+    def page_size(self) -> int:
+        return api_settings.PAGE_SIZE
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet[Any],
+        request: Request,
+        view: APIView | None = None,  # noqa: ARG002 - интерфейс DRF
+    ) -> list[Any]:
+        self.request = request
+        size = self.get_page_size(request)
+        after = self.get_position(request)
+        # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        rows = list(keyset_page(queryset, after=after, size=size + 1))
+        page = rows[:size]
+        self.next_position = (
+            (page[-1].created_at, page[-1].pk) if len(rows) > size else None
+        )
+        return page
+
+    def get_page_size(self, request: Request) -> int:
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_position(self, request: Request) -> Position | None:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            return decode_cursor(cursor)
+        except ValueError as exc:
+            raise NotFound(str(exc)) from exc
+
+    def get_next_link(self) -> str | None:
+        if self.next_position is None or self.request is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data: Sequence[Any]) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(
+        self,
+        schema: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "required": ["next", "results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": "http://api.example.org/items?cursor="
+                    "WyIyMDI1LTEwLTIwVDEwOjAwOjAwKzAwOjAwIiwxXQ",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(
+        self,
+        view: APIView,  # noqa: ARG002 - интерфейс DRF
+    ) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор из ссылки next предыдущей страницы",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Размер страницы, не больше {self.max_page_size}",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,108 @@
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Final
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+from rest_framework.renderers import JSONRenderer
+
+# Сколько SQL хранить на запрос для лога медленных запросов
+MAX_CAPTURED_STATEMENTS: Final[int] = 200
+
+
+@dataclass
+class RequestTimings:
+    """Замеры одного запроса; живёт в contextvar на время обработки."""
+
+    started: float = field(default_factory=perf_counter)
+    stopped: float | None = None
+    db_seconds: float = 0.0
+    queries: int = 0
+    serialize_seconds: float = 0.0
+    capture_sql: bool = False
+    statements: list[tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def wall_seconds(self) -> float:
+        return (self.stopped or perf_counter()) - self.started
+
+    def stop(self) -> None:
+        self.stopped = perf_counter()
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: object,
+        many: bool,  # noqa: FBT001 - сигнатура execute_wrapper
+        context: Mapping[str, object],
+    ) -> object:
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            self.db_seconds += elapsed
+            self.queries += 1
+            if self.capture_sql and len(self.statements) < MAX_CAPTURED_STATEMENTS:
+                self.statements.append((sql, elapsed))
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings",
+    default=None,
+)
+
+
+def record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: object,
+    many: bool,  # noqa: FBT001 - сигнатура execute_wrapper
+    context: Mapping[str, object],
+) -> object:
+    """Передаёт запрос в замеры текущего запроса, если он замеряется.
+
+    Стоит на каждом соединении постоянно: async-view выполняют ORM в потоках
+    sync_to_async с их собственными соединениями, а contextvar с замерами
+    asgiref переносит в эти потоки.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection: BaseDatabaseWrapper, **_kwargs: object) -> None:
+    """Обработчик connection_created: подключает record_query один раз."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serialize_span() -> Iterator[None]:
+    """Учитывает время блока как сериализацию, если запрос замеряется."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize_seconds += perf_counter() - started
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer, время которого попадает в serialize у замеряемых запросов."""
+
+    def render(
+        self,
+        data: object,
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        with serialize_span():
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from types import FrameType
+from typing import Final, Self
+
+from django.conf import settings
+from django.core import signing
+
+# Соль подписи заголовка профилирования, чтобы токен нельзя было переиспользовать
+# из других подписанных значений проекта
+TOKEN_SALT: Final[str] = "src.common.profiling"  # noqa: S105
+PROFILE_SUFFIX: Final[str] = ".collapsed"
+# Имя файла профиля: без каталогов и неожиданных символов
+PROFILE_NAME_RE: Final[re.Pattern[str]] = re.compile(r"^[\w.-]+\.collapsed$")
+
+
+def sign_token(user_id: int) -> str:
+    """Значение заголовка X-Profile для сотрудника; живёт PROFILING_TOKEN_MAX_AGE."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user_id))
+
+
+def unsign_token(token: str) -> int | None:
+    try:
+        value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token,
+            max_age=settings.PROFILING_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    base = str(settings.BASE_DIR.parent)
+    if filename.startswith(base):
+        filename = filename[len(base) + 1 :]
+    return f"{code.co_qualname} ({filename}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """Сэмплирующий профайлер одного потока.
+
+    Фоновый поток раз в interval секунд снимает стек целевого потока через
+    sys._current_frames() и считает одинаковые стеки. Профилируемый код
+    не трассируется, поэтому накладные расходы не зависят от числа вызовов.
+    """
+
+    def __init__(self, interval: float, thread_id: int | None = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="stack-sampler",
+            daemon=True,
+        )
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Стеки в формате collapsed (flamegraph.pl, speedscope): `a;b;c N`."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class ProfileStore:
+    """Профили на локальном диске: один файл на запрос, старые удаляются."""
+
+    def __init__(self, directory: Path, max_files: int) -> None:
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, label: str, content: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(tz=UTC).strftime("%Y%m%dT%H%M%S%f")
+        safe_label = re.sub(r"[^\w.-]+", "-", label).strip("-")
+        path = self.directory / f"{stamp}-{safe_label}-{os.getpid()}{PROFILE_SUFFIX}"
+        path.write_text(content)
+        self._prune()
+        return path
+
+    def list(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True)
+
+    def get(self, name: str) -> Path | None:
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def _prune(self) -> None:
+        for path in self.list()[self.max_files :]:
+            path.unlink(missing_ok=True)
+
+
+def get_store() -> ProfileStore:
+    return ProfileStore(
+        Path(settings.PROFILING_DIR),
+        max_files=settings.PROFILING_MAX_FILES,
+    )
@@ -0,0 +1,72 @@
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TypeVar
+
+from django.views import View
+
+ViewT = TypeVar("ViewT", bound=type[View])
+
+# Зарегистрированные бюджеты: класс view -> {HTTP-метод: максимум запросов}
+QUERY_BUDGETS: dict[type[View], Mapping[str, int]] = {}
+
+
+def query_budget(**budgets: int) -> Callable[[ViewT], ViewT]:
+    """Объявляет максимум SQL-запросов на обработку запроса view по методам.
+
+    Пример: ``@query_budget(get=3, patch=5)``. Соблюдение проверяют тесты
+    через ``QueryBudgetTestCase`` на наборах данных разного размера.
+    """
+
+    def decorator(view_class: ViewT) -> ViewT:
+        QUERY_BUDGETS[view_class] = MappingProxyType(
+            {method.lower(): budget for method, budget in budgets.items()},
+        )
+        return view_class
+
+    return decorator
+
+
+def get_query_budget(view_class: type[View], method: str) -> int | None:
+    return QUERY_BUDGETS.get(view_class, {}).get(method.lower())
+
+
+@dataclass(frozen=True)
+class QueryBudgetMeasurement:
+    view: str
+    method: str
+    dataset: str
+    queries: int
+    budget: int
+
+
+@dataclass
+class QueryBudgetReport:
+    """Фактическое число запросов по view, собранное тестами."""
+
+    measurements: list[QueryBudgetMeasurement] = field(default_factory=list)
+
+    def record(self, measurement: QueryBudgetMeasurement) -> None:
+        self.measurements.append(measurement)
+
+    def render(self) -> str:
+        datasets = sorted({measurement.dataset for measurement in self.measurements})
+        rows: dict[tuple[str, str], dict[str, object]] = {}
+        for measurement in self.measurements:
+            row = rows.setdefault(
+                (measurement.view, measurement.method.upper()),
+                {"budget": measurement.budget},
+            )
+            row[measurement.dataset] = max(
+                measurement.queries,
+                row.get(measurement.dataset, 0),
+            )
+        header = ["view", "method", "budget", *datasets]
+        lines = ["\t".join(header)]
+        for (view, method), row in sorted(rows.items()):
+            counts = [str(row.get(dataset, "-")) for dataset in datasets]
+            lines.append("\t".join([view, method, str(row["budget"]), *counts]))
+        return "\n".join(lines) + "\n"
+
+
+query_budget_report = QueryBudgetReport()
@@ -0,0 +1,85 @@
+import os
+from pathlib import Path
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from src.common.query_budget import (
+    QueryBudgetMeasurement,
+    get_query_budget,
+    query_budget_report,
+)
+from src.users.authentication import VersionedAccessToken
+from src.users.models import User
+
+
+def auth_headers(user: User) -> dict[str, str]:
+    return {"Authorization": f"Bearer {VersionedAccessToken.for_user(user)}"}
+
+
+# Тесты идут одним процессом: кэш процесса для них общий
+@override_settings(SINGLE_PROCESS=True)
+class QueryBudgetTestCase(TestCase):
+    """Проверка бюджетов запросов, объявленных через @query_budget.
+
+    Один и тот же сценарий прогоняется на наборах данных разного размера:
+    число запросов не должно превышать бюджет и не должно расти с данными.
+    Бюджеты — для развёртывания с общим кэшем (см. cache_is_shared).
+    Если задан QUERY_BUDGET_REPORT, отчёт по всем view пишется в этот файл.
+    """
+
+    def request_with_budget(  # noqa: PLR0913 - параметры HTTP-запроса
+        self,
+        method: str,
+        url: str,
+        *,
+        dataset: str,
+        user: User | None = None,
+        data: object = None,
+        status: int = 200,
+    ) -> tuple[HttpResponse, int]:
+        client = Client(headers={} if user is None else auth_headers(user))
+        view_class = resolve(url).func.view_class
+        budget = get_query_budget(view_class, method)
+        self.assertIsNotNone(budget, f"{view_class.__name__} has no {method} budget")
+
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method.lower())(
+                url,
+                {} if data is None else data,
+                content_type="application/json",
+            )
+            # Потоковый ответ делает запросы при чтении тела
+            body = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+        self.assertEqual(response.status_code, status, body[:500])
+        queries = len(context.captured_queries)
+        query_budget_report.record(
+            QueryBudgetMeasurement(
+                view=view_class.__name__,
+                method=method,
+                dataset=dataset,
+                queries=queries,
+                budget=budget,
+            ),
+        )
+        self.assertLessEqual(
+            queries,
+            budget,
+            f"{view_class.__name__}.{method} made {queries} queries, budget {budget}:\n"
+            + "\n".join(query["sql"] for query in context.captured_queries),
+        )
+        return response, queries
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        report_path = os.environ.get("QUERY_BUDGET_REPORT")
+        if report_path:
+            Path(report_path).write_text(query_budget_report.render())
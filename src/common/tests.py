@@ -1,2 +1,307 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import ClassVar
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    Client,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.views import APIView
+
+from src.common import db_routing, metrics, profiling
+from src.common.db_routing import ReplicaRouter
+from src.common.profiling import StackSampler
+from src.common.query_budget import get_query_budget
+from src.users.models import User
+
+METRICS_TOKEN = "metrics-token"  # noqa: S105
+METRICS_HEADERS = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+
+
+def api_views(
+    patterns: list[URLPattern | URLResolver],
+) -> list[type[APIView]]:
+    views = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            views.extend(api_views(pattern.url_patterns))
+            continue
+        view_class = getattr(pattern.callback, "view_class", None)
+        if view_class and view_class.__module__.startswith("src."):
+            views.append(view_class)
+    return views
+
+
+class QueryBudgetCoverageTests(SimpleTestCase):
+    def test_every_api_view_declares_budget(self) -> None:
+        views = api_views(get_resolver().url_patterns)
+        self.assertTrue(views)
+        for view_class in views:
+            # Методы, реализованные в коде проекта, а не унаследованные из DRF
+            methods = {
+                method
+                for klass in view_class.__mro__
+                if klass.__module__.startswith("src.")
+                for method in view_class.http_method_names
+                if method in vars(klass)
+            }
+            for method in methods:
+                with self.subTest(view=view_class.__name__, method=method):
+                    self.assertIsNotNone(get_query_budget(view_class, method))
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_SERVER_TIMING=True)
+class PerfMiddlewareTests(TestCase):
+    URL = "/api/v1/auth/token"
+    CREDENTIALS: ClassVar[dict[str, str]] = {
+        "email": "nobody@example.com",
+        "password": "wrong",
+    }
+
+    def setUp(self) -> None:
+        # Неизвестный email кэшируется репозиторием идентичностей
+        cache.clear()
+
+    def post(self) -> HttpResponse:
+        return Client().post(
+            self.URL,
+            self.CREDENTIALS,
+            content_type="application/json",
+        )
+
+    def test_server_timing_and_log_line(self) -> None:
+        with self.assertLogs("src.perf", level="INFO") as logs:
+            response = self.post()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries", serialize;dur=[\d.]+$',
+        )
+        (record,) = logs.records
+        self.assertEqual(record.perf["view"], "api_v1:auth-token")
+        self.assertEqual(record.perf["queries"], 1)
+        self.assertNotIn("sql", record.perf)
+
+    @override_settings(PERF_SLOW_REQUEST_MS=1)
+    def test_slow_request_logs_sql(self) -> None:
+        with self.assertLogs("src.perf", level="WARNING") as logs:
+            self.post()
+
+        (record,) = logs.records
+        self.assertIn("user_identities", record.perf["sql"][0]["sql"])
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self) -> None:
+        with self.assertNoLogs("src.perf"):
+            response = self.post()
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(METRICS_TOKEN=METRICS_TOKEN)
+class MetricsTests(TestCase):
+    def test_endpoint_exposes_request_metrics(self) -> None:
+        client = Client()
+        client.get("/healthz")
+        response = client.get("/metrics", headers=METRICS_HEADERS)
+
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertRegex(
+            body,
+            r'http_requests_total\{view="healthz",method="GET",status="200"\} [1-9]',
+        )
+        self.assertIn("survey_plan_cache_hits_total", body)
+
+    def test_endpoint_requires_token(self) -> None:
+        client = Client()
+        self.assertEqual(client.get("/metrics").status_code, 401)
+        forged = client.get("/metrics", headers={"Authorization": "Bearer forged"})
+        self.assertEqual(forged.status_code, 401)
+        with override_settings(METRICS_TOKEN=""):
+            disabled = client.get("/metrics", headers=METRICS_HEADERS)
+        self.assertEqual(disabled.status_code, 404)
+
+    def test_metric_requires_values(self) -> None:
+        with self.assertRaises(TypeError):
+            metrics.Metric("jobs", "Jobs")  # type: ignore[abstract]
+
+    def test_multiprocess_snapshots_are_summed(self) -> None:
+        registry = metrics.Registry()
+        counter = registry.counter("jobs_total", "Jobs", ("kind",))
+        histogram = registry.histogram("job_seconds", "Job time", buckets=(1, 5))
+        counter.inc(kind="a")
+        histogram.observe(0.5)
+        histogram.observe(7)
+        worker = registry.snapshot()
+        counter.inc(2, kind="a")
+        histogram.observe(3)
+
+        merged = metrics.merge([worker, registry.snapshot()])
+        text = metrics.render(merged)
+
+        self.assertIn('jobs_total{kind="a"} 4.0', text)
+        self.assertIn('job_seconds_bucket{le="1.0"} 2.0', text)
+        self.assertIn('job_seconds_bucket{le="5.0"} 3.0', text)
+        self.assertIn('job_seconds_bucket{le="+Inf"} 5.0', text)
+        self.assertIn("job_seconds_count 5.0", text)
+        self.assertIn("job_seconds_sum 18.0", text)
+
+    def test_store_reads_every_process_file(self) -> None:
+        with TemporaryDirectory() as directory:
+            store = metrics.MultiprocessStore(Path(directory), flush_interval=60)
+            store.flush()
+            (Path(directory) / "1.json").write_text(
+                json.dumps(metrics.registry.snapshot()),
+            )
+            snapshots = list(store.snapshots())
+
+        self.assertEqual(len(snapshots), 2)
+
+
+def busy(seconds: float = 0.05) -> dict[str, dict[str, object]]:
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        pass
+    return {}
+
+
+class ProfilingTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(
+            PROFILING_DIR=self.directory.name,
+            PROFILING_INTERVAL_MS=1,
+            METRICS_TOKEN=METRICS_TOKEN,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff = User.objects.create_user(
+            username="staff@example.com",
+            password="pass12345",  # noqa: S106
+            is_staff=True,
+        )
+        self.user = User.objects.create_user(
+            username="user@example.com",
+            password="pass12345",  # noqa: S106
+        )
+
+    def test_sampler_collapses_stacks(self) -> None:
+        with StackSampler(interval=0.001) as sampler:
+            busy()
+
+        self.assertGreater(sampler.samples, 0)
+        line = sampler.collapsed().splitlines()[0]
+        stack, count = line.rsplit(" ", 1)
+        self.assertIn("busy (src/common/tests.py:", stack.split(";")[-1])
+        self.assertGreater(int(count), 0)
+
+    def test_staff_header_profiles_request(self) -> None:
+        with patch("src.common.views.metrics_registry.collect", busy):
+            response = Client().get(
+                "/metrics",
+                headers={
+                    **METRICS_HEADERS,
+                    "X-Profile": profiling.sign_token(self.staff.pk),
+                },
+            )
+
+        path = profiling.get_store().get(response["X-Profile-Id"])
+        self.assertIsNotNone(path)
+        self.assertIn("-GET-metrics-", path.name)
+        self.assertIn("busy (", path.read_text())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    async def test_async_requests_are_not_profiled(self) -> None:
+        response = await AsyncClient().get(
+            "/metrics",
+            headers={
+                **METRICS_HEADERS,
+                "X-Profile": profiling.sign_token(self.staff.pk),
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(profiling.get_store().list(), [])
+
+    def test_header_of_non_staff_or_forged_is_ignored(self) -> None:
+        for token in (profiling.sign_token(self.user.pk), f"{self.staff.pk}:forged"):
+            response = Client().get("/healthz", headers={"X-Profile": token})
+            self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(profiling.get_store().list(), [])
+
+    def test_sample_rate_is_limited_to_configured_views(self) -> None:
+        with (
+            override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_VIEWS=["metrics"]),
+            patch("src.common.views.metrics_registry.collect", busy),
+        ):
+            client = Client()
+            healthz = client.get("/healthz")
+            profiled = client.get("/metrics", headers=METRICS_HEADERS)
+
+        self.assertNotIn("X-Profile-Id", healthz)
+        self.assertIn("X-Profile-Id", profiled)
+
+    def test_admin_view_lists_and_downloads_profiles(self) -> None:
+        path = profiling.get_store().save("GET-stats", "a;b 3\n")
+        client = Client()
+
+        client.force_login(self.user)
+        self.assertEqual(client.get("/admin/profiles/").status_code, 302)
+
+        client.force_login(self.staff)
+        listing = client.get("/admin/profiles/")
+        download = client.get(f"/admin/profiles/{path.name}")
+        missing = client.get("/admin/profiles/..%2Fsettings.collapsed")
+
+        self.assertContains(listing, path.name)
+        self.assertEqual(b"".join(download.streaming_content), b"a;b 3\n")
+        self.assertEqual(missing.status_code, 404)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_a", "replica_b"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        self.lags = {"replica_a": 0.0, "replica_b": 0.0}
+        lag = patch.object(db_routing.lag_monitor, "lag", self.lags.__getitem__)
+        lag.start()
+        self.addCleanup(lag.stop)
+
+    def test_reads_use_primary_outside_replica_block(self) -> None:
+        self.assertEqual(self.router.db_for_read(User), "default")
+        with db_routing.replica_reads(), db_routing.use_primary():
+            self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_reads_skip_lagging_replicas(self) -> None:
+        self.lags["replica_a"] = 60
+        with db_routing.replica_reads():
+            self.assertEqual(self.router.db_for_read(User), "replica_b")
+            self.lags["replica_b"] = float("inf")
+            self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_writes_go_to_primary_and_are_recorded(self) -> None:
+        with db_routing.routing_state() as state:
+            self.assertEqual(self.router.db_for_write(User), "default")
+        self.assertTrue(state.wrote)
+        self.assertFalse(self.router.allow_migrate("replica_a", "users"))
+
+    @override_settings(REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_is_checked_once_per_interval(self) -> None:
+        monitor = db_routing.ReplicaLagMonitor()
+        with patch.object(monitor, "_measure", return_value=0.5) as measure:
+            self.assertEqual(monitor.lag("replica_a"), 0.5)
+            self.assertEqual(monitor.lag("replica_a"), 0.5)
+        measure.assert_called_once_with("replica_a")
@@ -1,2 +1,69 @@
+from datetime import UTC, datetime
 
-# Create your views here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.template.response import TemplateResponse
+from django.utils.crypto import constant_time_compare
+
+from src.common import metrics as metrics_registry
+from src.common import profiling
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Метрики в формате Prometheus; в мультипроцессном режиме — сумма по процессам.
+
+    Доступны только с заголовком Authorization: Bearer <METRICS_TOKEN>;
+    без METRICS_TOKEN эндпоинт выключен.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not constant_time_compare(
+        request.headers.get("Authorization", ""),
+        f"Bearer {token}",
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect()),
+        content_type=metrics_registry.CONTENT_TYPE,
+    )
+
+
+@staff_member_required
+def profile_list(request: HttpRequest) -> TemplateResponse:
+    """Список сохранённых профилей и заголовок X-Profile для текущего сотрудника."""
+    profiles = []
+    for path in profiling.get_store().list():
+        stat = path.stat()
+        profiles.append(
+            {
+                "name": path.name,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime, tz=UTC),
+            },
+        )
+    return TemplateResponse(
+        request,
+        "common/profiles.html",
+        {
+            **admin.site.each_context(request),
+            "profiles": profiles,
+            "token": profiling.sign_token(request.user.pk),
+            "token_max_age": settings.PROFILING_TOKEN_MAX_AGE,
+        },
+    )
+
+
+@staff_member_required
+def profile_download(_request: HttpRequest, name: str) -> FileResponse:
+    path = profiling.get_store().get(name)
+    if path is None:
+        raise Http404
+    return FileResponse(
+        path.open("rb"),
+        as_attachment=True,
+        filename=name,
+        content_type="text/plain; charset=utf-8",
+    )
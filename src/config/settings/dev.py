@@ -6,3 +6,7 @@ DEBUG = env.bool("DEBUG", default=True)
 
 # Allow all hosts in dev unless overridden
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["*"])
+
+# Замеры каждого запроса с заголовком Server-Timing
+PERF_SAMPLE_RATE = env.float("PERF_SAMPLE_RATE", default=1.0)
+PERF_SERVER_TIMING = env.bool("PERF_SERVER_TIMING", default=True)
@@ -3,13 +3,18 @@ from django.http import JsonResponse
 from django.http.request import HttpRequest
 from django.urls import include, path
 
+from src.common.views import metrics, profile_download, profile_list
+
 
 def healthz(_request: HttpRequest) -> JsonResponse:
     return JsonResponse({"status": "ok"})
 
 
 urlpatterns = [
+    path("admin/profiles/", profile_list, name="profile_list"),
+    path("admin/profiles/<str:name>", profile_download, name="profile_download"),
     path("admin/", admin.site.urls),
     path("healthz", healthz, name="healthz"),
+    path("metrics", metrics, name="metrics"),
     path("api/v1/", include("src.config.urls_api_v1")),
 ]
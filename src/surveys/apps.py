@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SurveysConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.surveys"
+
+    def ready(self) -> None:
+        from src.surveys import signals  # noqa: F401, PLC0415 - подключает обработчики
@@ -0,0 +1,8 @@
+from django.db.models import TextChoices
+
+
+class StatsEngine(TextChoices):
+    """Источник данных для статистики опроса."""
+
+    ROLLUP = "rollup", "rollup"
+    AGGREGATE = "aggregate", "aggregate"
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from src.surveys.services.benchmark import (
+    BenchmarkConfig,
+    BenchmarkSuite,
+    compare_reports,
+    dump_report,
+)
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+def sizes(value: str) -> tuple[int, ...]:
+    return tuple(int(size) for size in value.split(","))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark respondent, stats and auth endpoints on growing datasets "
+        "in a throwaway test database"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--sizes",
+            type=sizes,
+            default=(1_000, 10_000, 100_000),
+            help="Comma-separated total run counts, e.g. 1000,10000,100000.",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--surveys", type=int, default=10)
+        parser.add_argument("--questions", type=int, default=10)
+        parser.add_argument("--options", type=int, default=4)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--skip-fk-checks", action="store_true")
+        parser.add_argument(
+            "--respondents",
+            type=int,
+            default=0,
+            help="Concurrent respondents for the ASGI sync/async comparison.",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="Question/answer pairs per concurrent respondent.",
+        )
+        parser.add_argument("--output", type=Path, help="Write JSON report here.")
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="Compare with a stored report and fail on regressions.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative p95 growth over the baseline.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        config = BenchmarkConfig(
+            sizes=options["sizes"],
+            requests=options["requests"],
+            warmup=options["warmup"],
+            surveys=options["surveys"],
+            questions=options["questions"],
+            options=options["options"],
+            seed=options["seed"],
+            skip_fk_checks=options["skip_fk_checks"],
+            respondents=options["respondents"],
+            rounds=options["rounds"],
+        )
+        baseline = None
+        if options["baseline"] is not None:
+            baseline = json.loads(options["baseline"].read_text())
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+            keepdb=options["keepdb"],
+        )
+        try:
+            report = BenchmarkSuite(config, progress=self.stderr.write).run()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options["keepdb"],
+            )
+            teardown_test_environment()
+
+        content = dump_report(report)
+        if options["output"] is not None:
+            options["output"].write_text(content)
+        else:
+            self.stdout.write(content)
+
+        if baseline is not None:
+            regressions = compare_reports(
+                report,
+                baseline,
+                threshold=options["threshold"],
+            )
+            for regression in regressions:
+                self.stderr.write(f"REGRESSION {regression}")
+            if regressions:
+                msg = f"{len(regressions)} regressions against {options['baseline']}"
+                raise CommandError(msg)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.models import Survey
+from src.surveys.services.transfer import SurveyTransferService
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = "Dump a survey with its runs and answers into a directory via COPY"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("survey_id", type=int)
+        parser.add_argument("directory", type=Path)
+
+    def handle(self, *_args: object, **options: object) -> None:
+        survey = Survey.objects.filter(pk=options["survey_id"]).first()
+        if survey is None:
+            msg = f"Survey {options['survey_id']} does not exist"
+            raise CommandError(msg)
+
+        result = SurveyTransferService.dump(survey, options["directory"])
+        for table, count in result.rows.items():
+            self.stdout.write(f"{table}: {count} rows")
+        self.stdout.write(f"Survey {survey.id} dumped to {options['directory']}")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.services.query_plans import (
+    HOT_QUERIES,
+    NoSampleDataError,
+    build_report,
+    collect_samples,
+    compare_plans,
+    explain_hot_queries,
+)
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN (ANALYZE, BUFFERS) for hot query shapes against the current "
+        "database and report sequential scans and plan regressions"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--survey",
+            type=int,
+            dest="survey_id",
+            help="Survey to use as a sample. Defaults to the one with most runs.",
+        )
+        parser.add_argument("--output", type=Path, help="Write JSON report here.")
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="Compare with a stored report and fail on regressions.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.5,
+            help="Allowed relative growth of buffers and execution time.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        try:
+            samples = collect_samples(options["survey_id"])
+        except NoSampleDataError as error:
+            raise CommandError(str(error)) from error
+
+        reports = explain_hot_queries(samples)
+        descriptions = {shape.name: shape.description for shape in HOT_QUERIES}
+        for report in reports:
+            self.stdout.write(
+                f"{report.name}: {report.execution_ms:.2f}ms, "
+                f"{report.buffers} buffers — {descriptions[report.name]}",
+            )
+            self.stdout.write(f"  indexes: {', '.join(report.indexes) or '-'}")
+            if report.seq_scans:
+                self.stdout.write(f"  SEQ SCAN {', '.join(report.seq_scans)}")
+
+        content = json.dumps(build_report(samples, reports), indent=2)
+        if options["output"] is not None:
+            options["output"].write_text(content)
+
+        problems = [
+            f"{report.name}: seq scan {', '.join(report.seq_scans)}"
+            for report in reports
+            if report.seq_scans
+        ]
+        if options["baseline"] is not None:
+            problems += compare_plans(
+                json.loads(content),
+                json.loads(options["baseline"].read_text()),
+                threshold=options["threshold"],
+            )
+        for problem in problems:
+            self.stderr.write(f"PROBLEM {problem}")
+        if problems:
+            msg = f"{len(problems)} query plan problems"
+            raise CommandError(msg)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, fields
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.services.dataset import DatasetGenerator, DatasetSpec
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic dataset for load tests and benchmarks"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        defaults = DatasetSpec()
+        parser.add_argument("--authors", type=int, default=defaults.authors)
+        parser.add_argument("--respondents", type=int, default=defaults.respondents)
+        parser.add_argument("--surveys", type=int, default=defaults.surveys)
+        parser.add_argument("--questions", type=int, default=defaults.questions)
+        parser.add_argument("--options", type=int, default=defaults.options)
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=defaults.runs,
+            help="Total runs across all surveys.",
+        )
+        parser.add_argument(
+            "--partial-ratio",
+            type=float,
+            default=defaults.partial_ratio,
+            help="Share of unfinished runs.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=defaults.skew,
+            help="Zipf exponent for survey popularity and option choice.",
+        )
+        parser.add_argument(
+            "--median-duration",
+            type=float,
+            dest="median_duration_seconds",
+            default=defaults.median_duration_seconds,
+            help="Median run duration in seconds (lognormal).",
+        )
+        parser.add_argument(
+            "--duration-sigma",
+            type=float,
+            default=defaults.duration_sigma,
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=defaults.days,
+            help="Spread run start times over this many days.",
+        )
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument(
+            "--prefix",
+            default=defaults.prefix,
+            help="Username prefix; existing users with it are reused.",
+        )
+        parser.add_argument(
+            "--skip-fk-checks",
+            action="store_true",
+            help="Load runs and answers with FK triggers disabled (DB superuser only).",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        spec_fields = {spec_field.name for spec_field in fields(DatasetSpec)}
+        spec = DatasetSpec(
+            **{name: value for name, value in options.items() if name in spec_fields},
+        )
+        if min(spec.authors, spec.respondents, spec.surveys, spec.questions) < 1:
+            msg = "authors, respondents, surveys and questions must be positive"
+            raise CommandError(msg)
+        if spec.options < 1 or not 0 <= spec.partial_ratio <= 1:
+            msg = "options must be positive and partial ratio within [0, 1]"
+            raise CommandError(msg)
+
+        started = time.perf_counter()
+        result = DatasetGenerator(spec, progress=self.stdout.write).generate()
+        elapsed = time.perf_counter() - started
+        for name, value in asdict(result).items():
+            if name != "survey_ids":
+                self.stdout.write(f"{name}: {value}")
+        self.stdout.write(
+            f"Done in {elapsed:.1f}s ({result.answers / elapsed:,.0f} answers/s)",
+        )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.services.transfer import SurveyTransferService
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = "Load a survey dumped by dump_survey as a new survey with fresh ids"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("directory", type=Path)
+        parser.add_argument(
+            "--author-id",
+            type=int,
+            help="Assign the loaded survey to this user instead of the original one.",
+        )
+        parser.add_argument(
+            "--respondent-id",
+            type=int,
+            help="Assign all loaded runs to this user. Unfinished runs are skipped.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        directory = options["directory"]
+        if not (directory / "manifest.json").exists():
+            msg = f"{directory} is not a survey dump"
+            raise CommandError(msg)
+
+        started = time.perf_counter()
+        result = SurveyTransferService.load(
+            directory,
+            author_id=options["author_id"],
+            respondent_id=options["respondent_id"],
+        )
+        elapsed = time.perf_counter() - started
+        for table, count in result.rows.items():
+            self.stdout.write(f"{table}: {count} rows")
+        answers_per_second = result.rows["survey_answers"] / elapsed
+        self.stdout.write(
+            f"Loaded as survey {result.survey_id} in {elapsed:.2f}s "
+            f"({answers_per_second:,.0f} answers/s)",
+        )
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.services import SurveyPartitionService
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+def parse_month(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m").replace(tzinfo=UTC)
+    except ValueError as error:
+        msg = f"Expected YYYY-MM, got {value!r}"
+        raise CommandError(msg) from error
+
+
+class Command(BaseCommand):
+    help = (
+        "Create monthly partitions of survey runs and answers ahead of time "
+        "and detach (archive) or drop old ones"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Create partitions up to this many months after the current one.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            metavar="YYYY-MM",
+            help="Detach partitions of months before this one.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of keeping them as tables.",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Only list partitions with estimated row counts.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        if options["list"]:
+            for partition in SurveyPartitionService.partitions():
+                self.stdout.write(f"{partition.name}: ~{partition.rows} rows")
+            return
+        if options["drop"] and not options["detach_before"]:
+            msg = "--drop requires --detach-before"
+            raise CommandError(msg)
+        if options["months_ahead"] < 0:
+            msg = "--months-ahead must be non-negative"
+            raise CommandError(msg)
+
+        for name in SurveyPartitionService.ensure_ahead(options["months_ahead"]):
+            self.stdout.write(f"Created {name}")
+        if options["detach_before"]:
+            before = parse_month(options["detach_before"])
+            detached = SurveyPartitionService.detach(
+                before=before,
+                drop=options["drop"],
+            )
+            action = "Dropped" if options["drop"] else "Detached"
+            for name in detached:
+                self.stdout.write(f"{action} {name}")
+        self.stdout.write("Done")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.surveys.models import Survey
+from src.surveys.services import SurveyRollupService
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = "Verify stats rollups against raw answers and rebuild mismatching ones"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--survey",
+            type=int,
+            action="append",
+            dest="survey_ids",
+            help="Survey id to process (repeatable). Defaults to all surveys.",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Only report mismatches, exit with error if any are found.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild even when rollups match raw data.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        surveys = Survey.objects.order_by("id")
+        survey_ids = options["survey_ids"]
+        if survey_ids:
+            surveys = surveys.filter(id__in=survey_ids)
+
+        mismatched = 0
+        for survey in surveys.iterator():
+            problems = SurveyRollupService.verify(survey)
+            if problems:
+                mismatched += 1
+                self.stdout.write(f"Survey {survey.id}: {len(problems)} mismatches")
+                for problem in problems:
+                    self.stdout.write(f"  {problem}")
+            if options["verify_only"]:
+                continue
+            if problems or options["force"]:
+                SurveyRollupService.rebuild(survey)
+                self.stdout.write(f"Survey {survey.id}: rebuilt")
+
+        if options["verify_only"] and mismatched:
+            msg = f"{mismatched} surveys have stale rollups"
+            raise CommandError(msg)
+        self.stdout.write(f"Done, {mismatched} surveys had mismatches")
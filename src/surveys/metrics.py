@@ -0,0 +1,8 @@
+from src.common.metrics import registry
+
+answers_submitted = registry.counter(
+    "survey_answers_submitted_total",
+    "Answers stored by the respondent endpoints",
+)
+runs_started = registry.counter("survey_runs_started_total", "Survey runs started")
+runs_finished = registry.counter("survey_runs_finished_total", "Survey runs finished")
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:29
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerOptionRollup',
+            fields=[
+                ('option', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='surveys.answeroption')),
+                ('answers_count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Answer option rollup',
+                'verbose_name_plural': 'Answer option rollups',
+                'db_table': 'survey_answer_option_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='SurveyRollup',
+            fields=[
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='surveys.survey')),
+                ('finished_runs', models.PositiveBigIntegerField(default=0)),
+                ('duration_total', models.DurationField(default=datetime.timedelta(0))),
+            ],
+            options={
+                'verbose_name': 'Survey rollup',
+                'verbose_name_plural': 'Survey rollups',
+                'db_table': 'survey_rollups',
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO survey_rollups (survey_id, finished_runs, duration_total)
+                SELECT survey_id, COUNT(*), SUM(finished_at - started_at)
+                FROM survey_runs
+                WHERE finished_at IS NOT NULL
+                GROUP BY survey_id;
+
+                INSERT INTO survey_answer_option_rollups (option_id, answers_count)
+                SELECT selected_option_id, COUNT(*)
+                FROM survey_answers
+                GROUP BY selected_option_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
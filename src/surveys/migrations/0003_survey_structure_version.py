@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='structure_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
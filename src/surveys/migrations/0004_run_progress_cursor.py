@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:33
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_survey_structure_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyrun',
+            name='answered_question_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE survey_runs AS run
+                SET answered_question_ids = progress.question_ids
+                FROM (
+                    SELECT run_id, array_agg(question_id ORDER BY id) AS question_ids
+                    FROM survey_answers
+                    GROUP BY run_id
+                ) AS progress
+                WHERE progress.run_id = run.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
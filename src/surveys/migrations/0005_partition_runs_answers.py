@@ -0,0 +1,249 @@
+from datetime import UTC, datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Месячные секции создаются с месяца самого старого прогона до MONTHS_AHEAD
+# месяцев вперёд; дальше их досоздаёт manage_partitions
+MONTHS_AHEAD = 3
+
+PARTITIONED_TABLES = """
+    CREATE TABLE survey_runs_partitioned (
+        id bigint NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL,
+        started_at timestamp with time zone NOT NULL,
+        finished_at timestamp with time zone NULL,
+        survey_id bigint NOT NULL,
+        user_id bigint NOT NULL,
+        answered_question_ids bigint[] NOT NULL
+    ) PARTITION BY RANGE (created_at);
+    CREATE TABLE survey_runs_default PARTITION OF survey_runs_partitioned DEFAULT;
+
+    CREATE TABLE survey_answers_partitioned (
+        id bigint NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL,
+        question_id bigint NOT NULL,
+        run_id bigint NOT NULL,
+        run_created_at timestamp with time zone NOT NULL,
+        selected_option_id bigint NOT NULL
+    ) PARTITION BY RANGE (run_created_at);
+    CREATE TABLE survey_answers_default PARTITION OF survey_answers_partitioned DEFAULT;
+"""
+
+COPY_ROWS = """
+    INSERT INTO survey_runs_partitioned
+        (id, created_at, updated_at, started_at, finished_at, survey_id, user_id,
+         answered_question_ids)
+    SELECT id, created_at, updated_at, started_at, finished_at, survey_id, user_id,
+           answered_question_ids
+    FROM survey_runs;
+
+    INSERT INTO survey_answers_partitioned
+        (id, created_at, updated_at, question_id, run_id, run_created_at,
+         selected_option_id)
+    SELECT a.id, a.created_at, a.updated_at, a.question_id, a.run_id, r.created_at,
+           a.selected_option_id
+    FROM survey_answers AS a
+    JOIN survey_runs AS r ON r.id = a.run_id;
+"""
+
+# Индексы и ключи строятся после переноса данных под прежними именами
+SWAP_TABLES = """
+    DROP TABLE survey_answers;
+    DROP TABLE survey_runs;
+    ALTER TABLE survey_runs_partitioned RENAME TO survey_runs;
+    ALTER TABLE survey_answers_partitioned RENAME TO survey_answers;
+
+    CREATE SEQUENCE survey_runs_id_seq AS bigint OWNED BY survey_runs.id;
+    ALTER TABLE survey_runs ALTER COLUMN id SET DEFAULT nextval('survey_runs_id_seq');
+    CREATE SEQUENCE survey_answers_id_seq AS bigint OWNED BY survey_answers.id;
+    ALTER TABLE survey_answers
+        ALTER COLUMN id SET DEFAULT nextval('survey_answers_id_seq');
+
+    ALTER TABLE survey_runs ADD CONSTRAINT survey_runs_pkey PRIMARY KEY (id, created_at);
+    CREATE INDEX idx_run_survey ON survey_runs (survey_id);
+    CREATE INDEX survey_runs_survey_id_3e4df3e9 ON survey_runs (survey_id);
+    CREATE INDEX survey_runs_user_id_373ff7a0 ON survey_runs (user_id);
+    CREATE INDEX idx_run_active ON survey_runs (user_id, survey_id)
+        WHERE finished_at IS NULL;
+    ALTER TABLE survey_runs
+        ADD CONSTRAINT survey_runs_survey_id_3e4df3e9_fk_surveys_id
+        FOREIGN KEY (survey_id) REFERENCES surveys (id) DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE survey_runs
+        ADD CONSTRAINT survey_runs_user_id_373ff7a0_fk_users_id
+        FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+
+    ALTER TABLE survey_answers
+        ADD CONSTRAINT survey_answers_pkey PRIMARY KEY (id, run_created_at);
+    ALTER TABLE survey_answers
+        ADD CONSTRAINT unique_answer_per_question_run
+        UNIQUE (run_id, question_id, run_created_at);
+    CREATE INDEX survey_answers_question_id_fc66f089 ON survey_answers (question_id);
+    CREATE INDEX survey_answers_run_id_bcdd1508 ON survey_answers (run_id);
+    CREATE INDEX survey_answers_selected_option_id_c6521782
+        ON survey_answers (selected_option_id);
+    ALTER TABLE survey_answers
+        ADD CONSTRAINT survey_answers_question_id_fc66f089_fk_survey_questions_id
+        FOREIGN KEY (question_id) REFERENCES survey_questions (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE survey_answers
+        ADD CONSTRAINT survey_answers_selected_option_id_c6521782_fk_survey_an
+        FOREIGN KEY (selected_option_id) REFERENCES survey_answer_options (id)
+        DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE survey_answers
+        ADD CONSTRAINT survey_answers_run_fk
+        FOREIGN KEY (run_id, run_created_at) REFERENCES survey_runs (id, created_at)
+        DEFERRABLE INITIALLY DEFERRED;
+"""
+
+ACTIVE_GUARD = """
+    INSERT INTO survey_active_runs (run_id, user_id, survey_id)
+    SELECT id, user_id, survey_id FROM survey_runs WHERE finished_at IS NULL;
+
+    CREATE FUNCTION survey_runs_active_guard() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE'
+            AND NEW.id = OLD.id
+            AND NEW.user_id = OLD.user_id
+            AND NEW.survey_id = OLD.survey_id
+            AND NEW.finished_at IS NOT DISTINCT FROM OLD.finished_at
+        THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            IF OLD.finished_at IS NULL THEN
+                DELETE FROM survey_active_runs WHERE run_id = OLD.id;
+            END IF;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            IF NEW.finished_at IS NULL THEN
+                INSERT INTO survey_active_runs (run_id, user_id, survey_id)
+                VALUES (NEW.id, NEW.user_id, NEW.survey_id);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    CREATE TRIGGER survey_runs_active_guard
+    AFTER INSERT OR UPDATE OR DELETE ON survey_runs
+    FOR EACH ROW EXECUTE FUNCTION survey_runs_active_guard();
+"""
+
+
+def add_month(value):
+    # Номер следующего месяца от нулевого года, январь — 0
+    index = value.year * 12 + value.month
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT min(created_at) FROM survey_runs")
+        (oldest,) = cursor.fetchone()
+        cursor.execute(
+            "SELECT last_value, is_called FROM survey_runs_id_seq",
+        )
+        runs_sequence = cursor.fetchone()
+        cursor.execute(
+            "SELECT last_value, is_called FROM survey_answers_id_seq",
+        )
+        answers_sequence = cursor.fetchone()
+
+    now = datetime.now(tz=UTC)
+    month = (oldest or now).astimezone(UTC).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0,
+    )
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = add_month(last)
+
+    schema_editor.execute(PARTITIONED_TABLES)
+    while month <= last:
+        following = add_month(month)
+        for table in ("survey_runs", "survey_answers"):
+            schema_editor.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} "
+                f"PARTITION OF {table}_partitioned "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{following.isoformat()}')",
+            )
+        month = following
+    schema_editor.execute(COPY_ROWS)
+    schema_editor.execute(SWAP_TABLES)
+    for sequence, (last_value, is_called) in (
+        ("survey_runs_id_seq", runs_sequence),
+        ("survey_answers_id_seq", answers_sequence),
+    ):
+        schema_editor.execute(
+            "SELECT setval(%s, %s, %s)",
+            [sequence, last_value, is_called],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_run_progress_cursor'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(partition_tables, elidable=False),
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='surveyrun',
+                    name='unique_active_run_per_user',
+                ),
+                migrations.RemoveConstraint(
+                    model_name='useranswer',
+                    name='unique_answer_per_question_run',
+                ),
+                migrations.AddField(
+                    model_name='useranswer',
+                    name='run_created_at',
+                    field=models.DateTimeField(default=None),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name='useranswer',
+                    name='run',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='surveys.surveyrun'),
+                ),
+                migrations.AddIndex(
+                    model_name='surveyrun',
+                    index=models.Index(condition=models.Q(('finished_at__isnull', True)), fields=['user', 'survey'], name='idx_run_active'),
+                ),
+                migrations.AddConstraint(
+                    model_name='useranswer',
+                    constraint=models.UniqueConstraint(fields=('run', 'question', 'run_created_at'), name='unique_answer_per_question_run'),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SurveyActiveRun',
+            fields=[
+                ('run_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField()),
+                ('survey_id', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Survey active run',
+                'verbose_name_plural': 'Survey active runs',
+                'db_table': 'survey_active_runs',
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'survey_id'), name='unique_active_run_per_user')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=ACTIVE_GUARD,
+            reverse_sql="""
+                DROP TRIGGER survey_runs_active_guard ON survey_runs;
+                DROP FUNCTION survey_runs_active_guard();
+            """,
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0005_partition_runs_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='survey',
+            name='idx_survey_author',
+        ),
+        migrations.RemoveIndex(
+            model_name='surveyrun',
+            name='idx_run_survey',
+        ),
+        migrations.AlterField(
+            model_name='answeroption',
+            name='question',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_options', to='surveys.question'),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='survey',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='surveys.survey'),
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='run',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='surveys.surveyrun'),
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='selected_option',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='selected_answers', to='surveys.answeroption'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyrun',
+            index=models.Index(condition=models.Q(('finished_at__isnull', False)), fields=['survey', 'finished_at'], include=('id', 'user', 'started_at'), name='idx_run_finished'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['selected_option'], include=('id',), name='idx_answer_option'),
+        ),
+    ]
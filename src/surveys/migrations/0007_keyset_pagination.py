@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_index_audit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='survey',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='surveys', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='surveyrun',
+            name='survey',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='surveys.survey'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='idx_survey_author_page'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyrun',
+            index=models.Index(fields=['survey', 'created_at', 'id'], name='idx_run_feed'),
+        ),
+    ]
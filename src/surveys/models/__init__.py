@@ -1,13 +1,18 @@
+from .active_run import SurveyActiveRun
 from .answer_option import AnswerOption
 from .question import Question
+from .rollup import AnswerOptionRollup, SurveyRollup
 from .survey import Survey
 from .survey_run import SurveyRun
 from .user_answer import UserAnswer
 
 __all__ = [
     "AnswerOption",
+    "AnswerOptionRollup",
     "Question",
     "Survey",
+    "SurveyActiveRun",
+    "SurveyRollup",
     "SurveyRun",
     "UserAnswer",
 ]
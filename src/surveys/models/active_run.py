@@ -0,0 +1,30 @@
+from typing import ClassVar
+
+from django.db import models
+
+
+class SurveyActiveRun(models.Model):
+    """Незавершённый прогон пары пользователь/опрос.
+
+    Таблицу ведёт триггер survey_runs_active_guard. Частичный уникальный индекс
+    по (user, survey) на секционированной survey_runs невозможен: уникальный
+    индекс там обязан включать ключ секционирования.
+    """
+
+    run_id = models.BigIntegerField(primary_key=True)
+    user_id = models.BigIntegerField()
+    survey_id = models.BigIntegerField()
+
+    class Meta:
+        db_table = "survey_active_runs"
+        verbose_name = "Survey active run"
+        verbose_name_plural = "Survey active runs"
+        constraints: ClassVar[list[models.UniqueConstraint]] = [
+            models.UniqueConstraint(
+                fields=["user_id", "survey_id"],
+                name="unique_active_run_per_user",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.run_id=} {self.user_id=} {self.survey_id=}"
@@ -12,6 +12,8 @@ class AnswerOption(TimeStampedModel):
         "surveys.Question",
         on_delete=models.CASCADE,
         related_name="answer_options",
+        # Поиск по вопросу покрывает answer_option_unique_position_per_question
+        db_index=False,
     )
     text = models.CharField(max_length=255)
     position = models.PositiveIntegerField()
@@ -12,6 +12,8 @@ class Question(TimeStampedModel):
         "surveys.Survey",
         on_delete=models.CASCADE,
         related_name="questions",
+        # Поиск по опросу покрывает question_unique_position_per_survey
+        db_index=False,
     )
     text = models.TextField()
     position = models.PositiveIntegerField()
@@ -0,0 +1,168 @@
+from collections.abc import Mapping
+from datetime import timedelta
+from typing import Final
+
+from django.db import connection, models
+
+# Разделяемая блокировка счётчиков опроса внутри INSERT инкремента: без
+# отдельного запроса; SurveyRollup.lock пересборки её ждёт
+SURVEY_LOCK_SQL: Final[str] = "(SELECT pg_advisory_xact_lock_shared(%s)) AS survey_lock"
+
+
+class SurveyRollup(models.Model):
+    """Агрегаты по завершённым прогонам опроса.
+
+    Обновляется инкрементально в той же транзакции, что и завершение прогона.
+    """
+
+    survey = models.OneToOneField(
+        "surveys.Survey",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rollup",
+    )
+    finished_runs = models.PositiveBigIntegerField(default=0)
+    duration_total = models.DurationField(default=timedelta(0))
+
+    class Meta:
+        db_table = "survey_rollups"
+        verbose_name = "Survey rollup"
+        verbose_name_plural = "Survey rollups"
+
+    def __str__(self) -> str:
+        return f"{self.survey_id=} {self.finished_runs=}"
+
+    @property
+    def avg_duration_seconds(self) -> float | None:
+        if not self.finished_runs:
+            return None
+        return self.duration_total.total_seconds() / self.finished_runs
+
+    @staticmethod
+    def lock(survey_id: int) -> None:
+        """Исключительная advisory-блокировка счётчиков опроса до конца транзакции.
+
+        Инкременты берут ту же блокировку разделяемой (SURVEY_LOCK_SQL) в самом
+        INSERT: пересборка ждёт незакоммиченные инкременты, а её ждут только
+        записи в тот же опрос.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [survey_id])
+
+    @classmethod
+    def record_finished_run(cls, *, survey_id: int, duration: timedelta) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO survey_rollups (survey_id, finished_runs, duration_total)
+                SELECT %s, 1, %s::interval FROM {SURVEY_LOCK_SQL}
+                ON CONFLICT (survey_id) DO UPDATE SET
+                    finished_runs = survey_rollups.finished_runs + 1,
+                    duration_total = survey_rollups.duration_total
+                        + EXCLUDED.duration_total
+                """,  # noqa: S608 - в SQL подставляются только плейсхолдеры
+                [survey_id, duration, survey_id],
+            )
+
+    @classmethod
+    def subtract_user_runs(cls, user_id: int) -> None:
+        """Вычитает завершённые прогоны пользователя (перед его удалением)."""
+        with connection.cursor() as cursor:
+            # Опросы пользователя блокируются по порядку id, как при записи
+            cursor.execute(
+                """
+                SELECT pg_advisory_xact_lock_shared(survey_id)
+                FROM (
+                    SELECT DISTINCT survey_id FROM survey_runs
+                    WHERE user_id = %s ORDER BY survey_id
+                ) AS surveys
+                """,
+                [user_id],
+            )
+            cursor.execute(
+                """
+                UPDATE survey_rollups AS rollup SET
+                    finished_runs = GREATEST(rollup.finished_runs - runs.count, 0),
+                    duration_total = GREATEST(
+                        rollup.duration_total - runs.duration,
+                        interval '0'
+                    )
+                FROM (
+                    SELECT survey_id, count(*) AS count,
+                           sum(finished_at - started_at) AS duration
+                    FROM survey_runs
+                    WHERE user_id = %s AND finished_at IS NOT NULL
+                    GROUP BY survey_id
+                ) AS runs
+                WHERE rollup.survey_id = runs.survey_id
+                """,
+                [user_id],
+            )
+
+
+class AnswerOptionRollup(models.Model):
+    """Счётчик ответов по варианту.
+
+    Обновляется инкрементально в той же транзакции, что и сохранение ответа.
+    """
+
+    option = models.OneToOneField(
+        "surveys.AnswerOption",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rollup",
+    )
+    answers_count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "survey_answer_option_rollups"
+        verbose_name = "Answer option rollup"
+        verbose_name_plural = "Answer option rollups"
+
+    def __str__(self) -> str:
+        return f"{self.option_id=} {self.answers_count=}"
+
+    @classmethod
+    def increment(cls, counts: Mapping[int, int], *, survey_id: int) -> None:
+        """Увеличивает счётчики вариантов опроса: {option_id: сколько добавить}."""
+        if not counts:
+            return
+        # Сортировка фиксирует порядок блокировок строк и исключает дедлоки
+        rows = sorted(counts.items())
+        values_sql = ", ".join(["(%s, %s)"] * len(rows))
+        params = [survey_id, *(value for row in rows for value in row)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO survey_answer_option_rollups (option_id, answers_count)
+                SELECT counts.option_id, counts.answers_count
+                FROM {SURVEY_LOCK_SQL},
+                    (VALUES {values_sql}) AS counts (option_id, answers_count)
+                ON CONFLICT (option_id) DO UPDATE SET
+                    answers_count = survey_answer_option_rollups.answers_count
+                        + EXCLUDED.answers_count
+                """,  # noqa: S608 - в SQL подставляются только плейсхолдеры
+                params,
+            )
+
+    @classmethod
+    def subtract_user_answers(cls, user_id: int) -> None:
+        """Вычитает ответы всех прогонов пользователя (перед его удалением)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE survey_answer_option_rollups AS rollup SET
+                    answers_count = GREATEST(rollup.answers_count - answers.count, 0)
+                FROM (
+                    SELECT answer.selected_option_id AS option_id, count(*) AS count
+                    FROM survey_answers AS answer
+                    JOIN survey_runs AS run
+                        ON run.id = answer.run_id
+                        AND run.created_at = answer.run_created_at
+                    WHERE run.user_id = %s
+                    GROUP BY answer.selected_option_id
+                ) AS answers
+                WHERE rollup.option_id = answers.option_id
+                """,
+                [user_id],
+            )
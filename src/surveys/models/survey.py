@@ -13,14 +13,22 @@ class Survey(TimeStampedModel):
         "users.User",
         on_delete=models.CASCADE,
         related_name="surveys",
+        # Опросы автора ищутся по idx_survey_author_page
+        db_index=False,
     )
+    # Растёт при каждом изменении вопросов/вариантов, ключ кэша плана опроса
+    structure_version = models.PositiveIntegerField(default=1)
 
     class Meta:
         db_table = "surveys"
         verbose_name = "Survey"
         verbose_name_plural = "Surveys"
         indexes: ClassVar[list[models.Index]] = [
-            models.Index(fields=["author"], name="idx_survey_author"),
+            # Список опросов автора постранично по (created_at, id)
+            models.Index(
+                fields=["author", "created_at", "id"],
+                name="idx_survey_author_page",
+            ),
         ]
 
     def __str__(self) -> str:
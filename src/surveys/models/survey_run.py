@@ -1,13 +1,24 @@
+from collections.abc import Sequence
 from typing import ClassVar
 
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, models, transaction
 from django.utils import timezone
 
 from src.common.models import TimeStampedModel
+from src.surveys.metrics import runs_finished
+
+from .rollup import SurveyRollup
 
 
 class SurveyRun(TimeStampedModel):
-    """Попытка прохождения опроса пользователем."""
+    """Попытка прохождения опроса пользователем.
+
+    Таблица секционирована по месяцам created_at (первичный ключ в БД —
+    (id, created_at)), см. SurveyPartitionService. Один незавершённый прогон
+    на пару пользователь/опрос гарантирует SurveyActiveRun.
+    """
 
     user = models.ForeignKey(
         "users.User",
@@ -18,22 +29,41 @@ class SurveyRun(TimeStampedModel):
         "surveys.Survey",
         on_delete=models.CASCADE,
         related_name="runs",
+        # Прогоны опроса ищутся по idx_run_feed и idx_run_finished
+        db_index=False,
     )
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Курсор прогресса: id отвеченных вопросов в порядке ответов.
+    # Ведётся вместе с вставкой ответа, чтобы не считать ответы запросом.
+    answered_question_ids = ArrayField(
+        models.BigIntegerField(),
+        default=list,
+        blank=True,
+    )
 
     class Meta:
         db_table = "survey_runs"
         verbose_name = "Survey run"
         verbose_name_plural = "Survey runs"
         indexes: ClassVar[list[models.Index]] = [
-            models.Index(fields=["survey"], name="idx_run_survey"),
-        ]
-        constraints: ClassVar[list[models.UniqueConstraint]] = [
-            models.UniqueConstraint(
+            # Лента прогонов опроса постранично по (created_at, id)
+            models.Index(
+                fields=["survey", "created_at", "id"],
+                name="idx_run_feed",
+            ),
+            # Завершённые прогоны опроса: статистика без rollup и выгрузка
+            # по возрастанию finished_at читают только индекс
+            models.Index(
+                fields=["survey", "finished_at"],
+                include=["id", "user", "started_at"],
+                condition=models.Q(finished_at__isnull=False),
+                name="idx_run_finished",
+            ),
+            models.Index(
                 fields=["user", "survey"],
                 condition=models.Q(finished_at__isnull=True),
-                name="unique_active_run_per_user",
+                name="idx_run_active",
             ),
         ]
 
@@ -44,7 +74,49 @@ class SurveyRun(TimeStampedModel):
     def is_finished(self) -> bool:
         return self.finished_at is not None
 
+    def record_answered(self, question_ids: Sequence[int]) -> None:
+        """Атомарно дописывает вопросы в курсор и обновляет его в памяти.
+
+        created_at в условии отсекает лишние секции при планировании.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE survey_runs
+                SET answered_question_ids = answered_question_ids || %s::bigint[]
+                WHERE id = %s AND created_at = %s
+                RETURNING answered_question_ids
+                """,
+                [list(question_ids), self.pk, self.created_at],
+            )
+            (self.answered_question_ids,) = cursor.fetchone()
+
     def mark_finished(self) -> None:
-        if self.finished_at is None:
-            self.finished_at = timezone.now()
-            self.save(update_fields=["finished_at", "updated_at"])
+        if self.finished_at is not None:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            # Условный UPDATE: при гонке прогон засчитывается в rollup один раз
+            updated = SurveyRun.objects.filter(
+                pk=self.pk,
+                created_at=self.created_at,
+                finished_at__isnull=True,
+            ).update(finished_at=now, updated_at=now)
+            if updated:
+                SurveyRollup.record_finished_run(
+                    survey_id=self.survey_id,
+                    duration=now - self.started_at,
+                )
+                transaction.on_commit(runs_finished.inc)
+        if updated:
+            self.finished_at = now
+            self.updated_at = now
+        else:
+            self.refresh_from_db(fields=["finished_at", "updated_at"])
+
+    async def amark_finished(self) -> None:
+        if self.finished_at is not None:
+            return
+        # Транзакции Django в async-коде не поддерживает: UPDATE вместе
+        # с rollup — один переход в поток
+        await sync_to_async(self.mark_finished)()
@@ -1,18 +1,32 @@
-from typing import ClassVar
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, ClassVar
 
-from django.db import models
+from django.db import connection, models
+from django.utils import timezone
 
 from src.common.models import TimeStampedModel
 
+if TYPE_CHECKING:
+    from .survey_run import SurveyRun
+
 
 class UserAnswer(TimeStampedModel):
-    """Ответ пользователя в рамках прогона."""
+    """Ответ пользователя в рамках прогона.
+
+    Таблица секционирована по run_created_at — времени создания прогона, —
+    поэтому ответы лежат в секции того же месяца, что и прогон. Внешний ключ
+    на прогон в БД составной (run_id, run_created_at), Django его не ведёт.
+    """
 
     run = models.ForeignKey(
         "surveys.SurveyRun",
         on_delete=models.CASCADE,
         related_name="answers",
+        db_constraint=False,
+        # Поиск по прогону покрывает unique_answer_per_question_run
+        db_index=False,
     )
+    run_created_at = models.DateTimeField()
     question = models.ForeignKey(
         "surveys.Question",
         on_delete=models.PROTECT,
@@ -22,15 +36,24 @@ class UserAnswer(TimeStampedModel):
         "surveys.AnswerOption",
         on_delete=models.PROTECT,
         related_name="selected_answers",
+        db_index=False,
     )
 
     class Meta:
         db_table = "survey_answers"
         verbose_name = "User answer"
         verbose_name_plural = "User answers"
+        indexes: ClassVar[list[models.Index]] = [
+            # Подсчёт ответов по вариантам (статистика без rollup) — только по индексу
+            models.Index(
+                fields=["selected_option"],
+                include=["id"],
+                name="idx_answer_option",
+            ),
+        ]
         constraints: ClassVar[list[models.UniqueConstraint]] = [
             models.UniqueConstraint(
-                fields=["run", "question"],
+                fields=["run", "question", "run_created_at"],
                 name="unique_answer_per_question_run",
             ),
         ]
@@ -39,3 +62,62 @@ class UserAnswer(TimeStampedModel):
         return (
             f"{self.pk=} {self.run.pk=} {self.question.pk=} {self.selected_option.pk=}"
         )
+
+    def save(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        if self.run_created_at is None:
+            self.run_created_at = self.run.created_at
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def insert_new(
+        cls,
+        *,
+        run: "SurveyRun",
+        answers: Sequence[tuple[int, int]],
+    ) -> list["UserAnswer"]:
+        """Вставляет ответы (question_id, option_id), пропуская уже отвеченные.
+
+        Дубликаты отсекает unique_answer_per_question_run (ON CONFLICT DO NOTHING),
+        без предварительной проверки и блокировок. Возвращает вставленные ответы.
+        """
+        now = timezone.now()
+        values_sql = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(answers))
+        params = [
+            value
+            for question_id, option_id in answers
+            for value in (now, now, run.pk, run.created_at, question_id, option_id)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO survey_answers
+                    (created_at, updated_at, run_id, run_created_at,
+                     question_id, selected_option_id)
+                VALUES {values_sql}
+                ON CONFLICT (run_id, question_id, run_created_at) DO NOTHING
+                RETURNING id, question_id, selected_option_id
+                """,  # noqa: S608 - в SQL подставляются только плейсхолдеры
+                params,
+            )
+            rows = cursor.fetchall()
+        field_names = [field.attname for field in cls._meta.concrete_fields]
+        answers_by_row = (
+            {
+                "id": answer_id,
+                "created_at": now,
+                "updated_at": now,
+                "run_id": run.pk,
+                "run_created_at": run.created_at,
+                "question_id": question_id,
+                "selected_option_id": option_id,
+            }
+            for answer_id, question_id, option_id in rows
+        )
+        return [
+            cls.from_db(
+                connection.alias,
+                field_names,
+                [values[name] for name in field_names],
+            )
+            for values in answers_by_row
+        ]
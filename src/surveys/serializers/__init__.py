@@ -2,11 +2,18 @@ from .answer_option import (
     AnswerOptionCreateUpdateSerializer,
     AnswerOptionNestedSerializer,
 )
+from .export import SurveyExportQuerySerializer
+from .feed import SurveyRunFeedSerializer
 from .question import (
     QuestionCreateUpdateSerializer,
     QuestionNestedSerializer,
 )
-from .run import AnswerResultSerializer, AnswerSubmitSerializer, NextQuestionSerializer
+from .run import (
+    AnswerBatchSubmitSerializer,
+    AnswerResultSerializer,
+    AnswerSubmitSerializer,
+    NextQuestionSerializer,
+)
 from .stats import SurveyStatsSerializer
 from .survey import (
     SurveyCreateUpdateSerializer,
@@ -15,6 +22,7 @@ from .survey import (
 )
 
 __all__ = [
+    "AnswerBatchSubmitSerializer",
     "AnswerOptionCreateUpdateSerializer",
     "AnswerOptionNestedSerializer",
     "AnswerResultSerializer",
@@ -24,6 +32,8 @@ __all__ = [
     "QuestionNestedSerializer",
     "SurveyCreateUpdateSerializer",
     "SurveyDetailSerializer",
+    "SurveyExportQuerySerializer",
+    "SurveyRunFeedSerializer",
     "SurveySerializer",
     "SurveyStatsSerializer",
 ]
@@ -0,0 +1,21 @@
+from typing import Any
+
+from rest_framework import serializers
+
+
+class SurveyExportQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(
+        required=False,
+        help_text="finished_at последней полученной строки",
+    )
+    since_run_id = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="run_id последней полученной строки",
+    )
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if "since_run_id" in attrs and "since" not in attrs:
+            msg = {"since": "Обязателен вместе с since_run_id"}
+            raise serializers.ValidationError(msg)
+        return attrs
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from src.surveys.models import SurveyRun
+
+
+class FeedAnswerSerializer(serializers.Serializer):
+    question_id = serializers.IntegerField()
+    option_id = serializers.IntegerField(source="selected_option_id")
+
+
+class SurveyRunFeedSerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField()
+    answers = FeedAnswerSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = SurveyRun
+        fields = (
+            "id",
+            "user_id",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "answers",
+        )
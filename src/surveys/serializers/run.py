@@ -27,6 +27,18 @@ class AnswerSubmitSerializer(serializers.Serializer):
     option_id = serializers.IntegerField()
 
 
+class AnswerBatchSubmitSerializer(serializers.Serializer):
+    """Пачка ответов с одного экрана клиента."""
+
+    MAX_ANSWERS = 100
+
+    answers = AnswerSubmitSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_ANSWERS,
+    )
+
+
 class AnswerResultSerializer(serializers.Serializer):
     """Ответ после отправки ответа пользователем.
 
@@ -38,3 +50,15 @@ class AnswerResultSerializer(serializers.Serializer):
     run_id = serializers.IntegerField()
     completed = serializers.BooleanField()
     question = QuestionPublicSerializer(required=False, allow_null=True)
+
+
+def render_next_question(*, run_id: int, question: bytes) -> bytes:
+    """JSON NextQuestionSerializer из готового фрагмента вопроса."""
+    return b'{"run_id":%d,"question":%b}' % (run_id, question)
+
+
+def render_answer_result(*, run_id: int, question: bytes | None) -> bytes:
+    """JSON AnswerResultSerializer из готового фрагмента вопроса."""
+    if question is None:
+        return b'{"run_id":%d,"completed":true,"question":null}' % run_id
+    return b'{"run_id":%d,"completed":false,"question":%b}' % (run_id, question)
@@ -1,4 +1,18 @@
+from .export import SurveyExportService
+from .feed import SurveyRunFeedService
+from .partitions import SurveyPartitionService
+from .plan import SurveyPlan, SurveyPlanService
+from .rollups import SurveyRollupService
 from .runs import SurveyRunService
 from .stats import SurveyStatsService
 
-__all__ = ["SurveyRunService", "SurveyStatsService"]
+__all__ = [
+    "SurveyExportService",
+    "SurveyPartitionService",
+    "SurveyPlan",
+    "SurveyPlanService",
+    "SurveyRollupService",
+    "SurveyRunFeedService",
+    "SurveyRunService",
+    "SurveyStatsService",
+]
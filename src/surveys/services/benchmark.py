@@ -0,0 +1,443 @@
+import asyncio
+import json
+import math
+import statistics
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Any, ClassVar, Final
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client
+
+from src.surveys.models import Survey
+from src.surveys.services.dataset import DatasetGenerator, DatasetSpec
+from src.surveys.services.plan import plan_cache
+from src.users.authentication import VersionedAccessToken
+from src.users.enums import IdentityProvider
+from src.users.models import Identity, User
+
+REPORT_VERSION: Final[int] = 1
+PASSWORD: Final[str] = "Benchmark123!"  # noqa: S105 - пароль синтетического пользователя
+
+
+class BenchmarkError(Exception):
+    """Эндпоинт ответил ошибкой во время замера."""
+
+
+@dataclass(frozen=True)
+class EndpointStats:
+    requests: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput_rps: float
+    queries: int
+    max_queries: int
+
+
+@dataclass
+class _Samples:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+
+    def stats(self) -> EndpointStats:
+        total = sum(self.latencies)
+        return EndpointStats(
+            requests=len(self.latencies),
+            p50_ms=_ms(percentile(self.latencies, 50)),
+            p95_ms=_ms(percentile(self.latencies, 95)),
+            p99_ms=_ms(percentile(self.latencies, 99)),
+            mean_ms=_ms(statistics.fmean(self.latencies)),
+            throughput_rps=round(len(self.latencies) / total, 1) if total else 0.0,
+            queries=round(statistics.median(self.queries)),
+            max_queries=max(self.queries),
+        )
+
+
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: object,
+        many: bool,  # noqa: FBT001 - сигнатура execute_wrapper
+        context: Mapping[str, object],
+    ) -> object:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def percentile(samples: Sequence[float], rank: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(samples)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class EndpointBenchmark:
+    """Последовательные замеры эндпоинтов через тестовый клиент Django.
+
+    Один клиент, без параллелизма: throughput — обратная величина средней
+    задержки одного процесса. SQL-запросы считаются через execute_wrapper.
+    После каждого запроса соединение с БД освобождается так же, как в
+    обработчике сервера: закрывается, возвращается в пул или остаётся жить.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests: int,
+        warmup: int,
+        client_class: type[Client] = Client,
+    ) -> None:
+        self.requests = requests
+        self.warmup = warmup
+        self.client_class = client_class
+
+    def run(self, survey: Survey) -> dict[str, EndpointStats]:
+        respondent, email = self._create_respondent()
+        anonymous = self.client_class()
+        respondent_token = VersionedAccessToken.for_user(respondent)
+        author_token = VersionedAccessToken.for_user(survey.author)
+        client = self.client_class(
+            headers={"Authorization": f"Bearer {respondent_token}"},
+        )
+        author = self.client_class(
+            headers={"Authorization": f"Bearer {author_token}"},
+        )
+        run_url = f"/api/v1/surveys/{survey.id}/runs"
+        samples: dict[str, _Samples] = {
+            "token_obtain": _Samples(),
+            "next_question": _Samples(),
+            "answer_submit": _Samples(),
+            "survey_stats": _Samples(),
+        }
+
+        for iteration in range(self.warmup + self.requests):
+            record = iteration >= self.warmup
+            self._measure(
+                samples["token_obtain"] if record else None,
+                lambda: anonymous.post(
+                    "/api/v1/auth/token",
+                    {"email": email, "password": PASSWORD},
+                    content_type="application/json",
+                ),
+            )
+            # Завершённый ответом прогон сменяется новым на следующем шаге
+            response = self._measure(
+                samples["next_question"] if record else None,
+                lambda: client.get(f"{run_url}/next-question"),
+            )
+            question = response.json()["question"]
+            self._measure(
+                samples["answer_submit"] if record else None,
+                lambda question=question: client.post(
+                    f"{run_url}/answer",
+                    {
+                        "question_id": question["id"],
+                        "option_id": question["answer_options"][0]["id"],
+                    },
+                    content_type="application/json",
+                ),
+            )
+            self._measure(
+                samples["survey_stats"] if record else None,
+                lambda: author.get(f"/api/v1/surveys/{survey.id}/stats"),
+            )
+        return {name: endpoint.stats() for name, endpoint in samples.items()}
+
+    @staticmethod
+    def _measure(
+        samples: _Samples | None,
+        call: Callable[[], HttpResponse],
+    ) -> HttpResponse:
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = perf_counter()
+            response = call()
+            # Тестовый клиент не закрывает соединение по request_finished, а сервер
+            # закрывает: без этого не видно цены подключения к БД на запрос.
+            # Внутри транзакции (тесты) соединение закрывать нельзя
+            if not connection.in_atomic_block:
+                close_old_connections()
+            elapsed = perf_counter() - started
+        if response.status_code >= 400:  # noqa: PLR2004
+            msg = f"{response.status_code}: {response.content[:200]!r}"
+            raise BenchmarkError(msg)
+        if samples is not None:
+            samples.latencies.append(elapsed)
+            samples.queries.append(counter.count)
+        return response
+
+    @staticmethod
+    def _create_respondent() -> tuple[User, str]:
+        number = User.objects.filter(username__startswith="bench-respondent-").count()
+        email = f"bench-respondent-{number + 1}@example.com"
+        user = User.objects.create(username=email, password=make_password(PASSWORD))
+        Identity.objects.create(
+            user=user,
+            provider=IdentityProvider.EMAIL,
+            value=email,
+        )
+        return user, email
+
+
+@dataclass(frozen=True)
+class ConcurrencyStats:
+    respondents: int
+    requests: int
+    wall_s: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class ConcurrencyBenchmark:
+    """Одновременное прохождение опроса через ASGI: sync- и async-view.
+
+    Запросы идут через AsyncClient — ASGIHandler Django в том же процессе,
+    без сети. Каждый респондент — корутина, которая rounds раз берёт
+    следующий вопрос и отвечает на него; все корутины стартуют разом.
+    Sync-view Django под ASGI выполняет в одном общем потоке, async-view —
+    в event loop, откуда в поток уходят только SQL-запросы и транзакции.
+    Throughput — число запросов режима, делённое на его время.
+    """
+
+    PATHS: ClassVar[dict[str, tuple[str, str]]] = {
+        "sync": ("next-question", "answer"),
+        "async": ("async/next-question", "async/answer"),
+    }
+
+    def __init__(self, *, respondents: int, rounds: int) -> None:
+        self.respondents = respondents
+        self.rounds = rounds
+
+    def run(self, survey: Survey) -> dict[str, ConcurrencyStats]:
+        run_url = f"/api/v1/surveys/{survey.id}/runs"
+        users = self._create_respondents()
+        # Заголовки передаются в каждый запрос: AsyncClient(headers=...)
+        # не переводит их в ASGI-имена
+        headers = [
+            {"Authorization": f"Bearer {VersionedAccessToken.for_user(user)}"}
+            for user in users
+        ]
+        # async_to_sync из основного потока: ORM view работает с его
+        # соединением, как в обработчике сервера (и видит транзакцию тестов)
+        return {
+            mode: async_to_sync(self._run_mode)(f"{run_url}/", paths, headers)
+            for mode, paths in self.PATHS.items()
+        }
+
+    async def _run_mode(
+        self,
+        prefix: str,
+        paths: tuple[str, str],
+        headers: Sequence[dict[str, str]],
+    ) -> ConcurrencyStats:
+        latencies: list[float] = []
+        started = perf_counter()
+        await asyncio.gather(
+            *(
+                self._respondent(prefix, paths, respondent, latencies)
+                for respondent in headers
+            ),
+        )
+        wall = perf_counter() - started
+        return ConcurrencyStats(
+            respondents=len(headers),
+            requests=len(latencies),
+            wall_s=round(wall, 3),
+            throughput_rps=round(len(latencies) / wall, 1),
+            p50_ms=_ms(percentile(latencies, 50)),
+            p95_ms=_ms(percentile(latencies, 95)),
+            p99_ms=_ms(percentile(latencies, 99)),
+        )
+
+    async def _respondent(
+        self,
+        prefix: str,
+        paths: tuple[str, str],
+        headers: dict[str, str],
+        latencies: list[float],
+    ) -> None:
+        # Свой клиент у респондента: AsyncClient хранит состояние запроса
+        client = AsyncClient()
+        next_question, answer = paths
+        for _ in range(self.rounds):
+            response = await self._measure(
+                latencies,
+                client.get(prefix + next_question, headers=headers),
+            )
+            question = response.json()["question"]
+            await self._measure(
+                latencies,
+                client.post(
+                    prefix + answer,
+                    {
+                        "question_id": question["id"],
+                        "option_id": question["answer_options"][0]["id"],
+                    },
+                    content_type="application/json",
+                    headers=headers,
+                ),
+            )
+
+    @staticmethod
+    async def _measure(
+        latencies: list[float],
+        call: Awaitable[HttpResponse],
+    ) -> HttpResponse:
+        started = perf_counter()
+        response = await call
+        latencies.append(perf_counter() - started)
+        if response.status_code >= 400:  # noqa: PLR2004
+            msg = f"{response.status_code}: {response.content[:200]!r}"
+            raise BenchmarkError(msg)
+        return response
+
+    def _create_respondents(self) -> list[User]:
+        # Пароль не нужен: токены выдаются напрямую
+        offset = User.objects.filter(username__startswith="bench-concurrent-").count()
+        return User.objects.bulk_create(
+            User(username=f"bench-concurrent-{offset + number}")
+            for number in range(self.respondents)
+        )
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    sizes: tuple[int, ...]
+    requests: int = 200
+    warmup: int = 20
+    surveys: int = 10
+    questions: int = 10
+    options: int = 4
+    seed: int = 42
+    skip_fk_checks: bool = False
+    # 0 — без замера одновременных респондентов
+    respondents: int = 0
+    rounds: int = 5
+
+
+class BenchmarkSuite:
+    """Замеры на наборах данных возрастающего размера.
+
+    Размеры — суммарное число прогонов в БД; на каждом шаге догенерируется
+    разница, замеры идут по самому популярному опросу шага.
+    """
+
+    def __init__(
+        self,
+        config: BenchmarkConfig,
+        *,
+        progress: Callable[[str], None] | None = None,
+    ) -> None:
+        self.config = config
+        self.progress = progress or (lambda _message: None)
+
+    def run(self) -> dict[str, Any]:
+        config = self.config
+        plan_cache.clear()
+        benchmark = EndpointBenchmark(requests=config.requests, warmup=config.warmup)
+        concurrency = ConcurrencyBenchmark(
+            respondents=config.respondents,
+            rounds=config.rounds,
+        )
+        stages = []
+        generated_runs = answers = 0
+        for stage, size in enumerate(sorted(config.sizes)):
+            dataset = DatasetGenerator(
+                DatasetSpec(
+                    surveys=config.surveys,
+                    questions=config.questions,
+                    options=config.options,
+                    runs=size - generated_runs,
+                    seed=config.seed + stage,
+                    prefix="bench",
+                    skip_fk_checks=config.skip_fk_checks,
+                ),
+            ).generate()
+            generated_runs = size
+            answers += dataset.answers
+            self.progress(f"Dataset {size} runs ({answers} answers), measuring")
+            survey = Survey.objects.select_related("author").get(
+                pk=dataset.survey_ids[0],
+            )
+            endpoints = benchmark.run(survey)
+            stage_report: dict[str, Any] = {
+                "runs": size,
+                "answers": answers,
+                "endpoints": {name: asdict(stats) for name, stats in endpoints.items()},
+            }
+            if config.respondents:
+                self.progress(f"{config.respondents} concurrent respondents via ASGI")
+                stage_report["concurrency"] = {
+                    mode: asdict(stats)
+                    for mode, stats in concurrency.run(survey).items()
+                }
+            stages.append(stage_report)
+        return {
+            "version": REPORT_VERSION,
+            "config": asdict(config),
+            "database": database_mode(),
+            "stages": stages,
+        }
+
+
+def database_mode() -> dict[str, Any]:
+    """Режим соединений default: от него зависит цена подключения на запрос."""
+    database = connection.settings_dict
+    pool = database.get("OPTIONS", {}).get("pool")
+    return {
+        "pool": pool or False,
+        "conn_max_age": database["CONN_MAX_AGE"],
+        "conn_health_checks": database["CONN_HEALTH_CHECKS"],
+    }
+
+
+def compare_reports(
+    current: Mapping[str, Any],
+    baseline: Mapping[str, Any],
+    *,
+    threshold: float,
+) -> list[str]:
+    """Регрессии относительно базового отчёта: рост p95 сверх порога
+    или рост числа запросов. Этапы сопоставляются по числу прогонов."""
+    baseline_stages = {stage["runs"]: stage for stage in baseline["stages"]}
+    regressions = []
+    for stage in current["stages"]:
+        base_stage = baseline_stages.get(stage["runs"])
+        if base_stage is None:
+            continue
+        for name, stats in stage["endpoints"].items():
+            base = base_stage["endpoints"].get(name)
+            if base is None:
+                continue
+            label = f"{stage['runs']} runs, {name}"
+            if stats["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{label}: p95 {stats['p95_ms']:.2f}ms > "
+                    f"{base['p95_ms']:.2f}ms baseline",
+                )
+            if stats["queries"] > base["queries"]:
+                regressions.append(
+                    f"{label}: {stats['queries']} queries > {base['queries']} baseline",
+                )
+    return regressions
+
+
+def dump_report(report: Mapping[str, Any]) -> str:
+    return json.dumps(report, indent=2, ensure_ascii=False)
@@ -0,0 +1,389 @@
+import io
+import math
+import random
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Final
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from src.surveys.models import AnswerOption, Question, Survey
+from src.surveys.services.partitions import SurveyPartitionService
+from src.surveys.services.rollups import SurveyRollupService
+from src.users.enums import IdentityProvider
+from src.users.models import Identity, User
+
+BATCH_SIZE: Final[int] = 5000
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Параметры синтетического набора данных.
+
+    При одинаковых параметрах и seed набор воспроизводится один в один,
+    кроме id и абсолютного времени (оно отсчитывается от end).
+    """
+
+    authors: int = 10
+    respondents: int = 1000
+    surveys: int = 10
+    questions: int = 10
+    options: int = 4
+    runs: int = 10_000
+    partial_ratio: float = 0.1
+    # Показатель Zipf: популярность опросов и вариантов внутри вопроса
+    skew: float = 1.1
+    median_duration_seconds: float = 90.0
+    duration_sigma: float = 0.8
+    days: int = 90
+    seed: int = 42
+    prefix: str = "load"
+    password: str = "Password123!"  # noqa: S105 - пароль синтетических пользователей
+    end: datetime = field(default_factory=timezone.now)
+    runs_chunk_size: int = 10_000
+    # Пропуск FK-триггеров при COPY (нужен суперпользователь БД): данные
+    # согласованы по построению, а проверки на коммите съедают больше половины времени
+    skip_fk_checks: bool = False
+
+
+@dataclass
+class DatasetResult:
+    authors: int = 0
+    respondents: int = 0
+    surveys: int = 0
+    questions: int = 0
+    options: int = 0
+    runs: int = 0
+    finished_runs: int = 0
+    answers: int = 0
+    # В порядке убывания популярности: первый опрос получил больше всего прогонов
+    survey_ids: list[int] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class _GeneratedRuns:
+    runs: str
+    answers: str
+    count: int
+    finished: int
+    answers_count: int
+
+
+def zipf_weights(count: int, skew: float) -> list[float]:
+    return [1 / rank**skew for rank in range(1, count + 1)]
+
+
+def split_by_weights(total: int, weights: Sequence[float]) -> list[int]:
+    """Делит total на части пропорционально весам, сумма частей равна total."""
+    weight_sum = sum(weights)
+    parts = [math.floor(total * weight / weight_sum) for weight in weights]
+    for index in range(total - sum(parts)):
+        parts[index % len(parts)] += 1
+    return parts
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat()
+
+
+class DatasetGenerator:
+    """Генератор нагрузочных наборов данных.
+
+    Пользователи и структура опросов создаются через bulk_create,
+    прогоны и ответы — через COPY пачками по runs_chunk_size прогонов.
+    Распределения: популярность опросов и выбор вариантов — Zipf,
+    длительность прогона — логнормальная, часть прогонов не завершена.
+    """
+
+    def __init__(
+        self,
+        spec: DatasetSpec,
+        *,
+        progress: Callable[[str], None] | None = None,
+    ) -> None:
+        self.spec = spec
+        self.rng = random.Random(spec.seed)  # noqa: S311 - нужна воспроизводимость
+        self.progress = progress or (lambda _message: None)
+        self.result = DatasetResult()
+
+    def generate(self) -> DatasetResult:
+        spec = self.spec
+        SurveyPartitionService.ensure(
+            start=spec.end - timedelta(days=spec.days),
+            end=spec.end,
+        )
+        author_ids = self._create_users("author", spec.authors, is_staff=True)
+        respondent_ids = self._create_users("user", spec.respondents, is_staff=False)
+        self.result.authors = len(author_ids)
+        self.result.respondents = len(respondent_ids)
+
+        runs_per_survey = split_by_weights(
+            spec.runs,
+            zipf_weights(spec.surveys, spec.skew),
+        )
+        for index, runs in enumerate(runs_per_survey):
+            survey = self._create_survey(index, author_ids[index % len(author_ids)])
+            question_options = self._create_structure(survey)
+            self._create_runs(survey, question_options, respondent_ids, runs)
+            SurveyRollupService.rebuild(survey)
+            self.progress(
+                f"Survey {survey.id}: {runs} runs "
+                f"({index + 1}/{spec.surveys}, {self.result.answers} answers total)",
+            )
+        return self.result
+
+    def _create_users(self, role: str, count: int, *, is_staff: bool) -> list[int]:
+        # Хэш один на всех: PBKDF2 на каждого пользователя занял бы минуты
+        password = make_password(self.spec.password)
+        usernames = [
+            f"{self.spec.prefix}-{role}-{number}@example.com"
+            for number in range(1, count + 1)
+        ]
+        # Повторный запуск переиспользует пользователей с тем же префиксом
+        User.objects.bulk_create(
+            (
+                User(username=username, password=password, is_staff=is_staff)
+                for username in usernames
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        ids_by_username = dict(
+            User.objects.filter(username__in=usernames).values_list("username", "id"),
+        )
+        Identity.objects.bulk_create(
+            (
+                Identity(
+                    user_id=ids_by_username[username],
+                    provider=IdentityProvider.EMAIL,
+                    value=username,
+                )
+                for username in usernames
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return [ids_by_username[username] for username in usernames]
+
+    def _create_survey(self, index: int, author_id: int) -> Survey:
+        survey = Survey.objects.create(
+            title=f"{self.spec.prefix} survey {index + 1}",
+            author_id=author_id,
+        )
+        self.result.surveys += 1
+        self.result.survey_ids.append(survey.id)
+        return survey
+
+    def _create_structure(self, survey: Survey) -> list[tuple[int, list[int]]]:
+        spec = self.spec
+        questions = Question.objects.bulk_create(
+            [
+                Question(survey=survey, text=f"Вопрос {position}", position=position)
+                for position in range(1, spec.questions + 1)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        options = AnswerOption.objects.bulk_create(
+            [
+                AnswerOption(
+                    question=question,
+                    text=f"Вариант {position}",
+                    position=position,
+                )
+                for question in questions
+                for position in range(1, spec.options + 1)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        self.result.questions += len(questions)
+        self.result.options += len(options)
+        return [
+            (
+                question.id,
+                [option.id for option in options[start : start + spec.options]],
+            )
+            for question, start in zip(
+                questions,
+                range(0, len(options), spec.options),
+                strict=True,
+            )
+        ]
+
+    def _create_runs(
+        self,
+        survey: Survey,
+        question_options: list[tuple[int, list[int]]],
+        respondent_ids: list[int],
+        runs: int,
+    ) -> None:
+        # Смещение по респондентам своё у каждого опроса
+        offset = self.rng.randrange(len(respondent_ids))
+        # Незавершённый прогон у пары (пользователь, опрос) может быть только один
+        active_user_ids: set[int] = set()
+        for start in range(0, runs, self.spec.runs_chunk_size):
+            count = min(self.spec.runs_chunk_size, runs - start)
+            with transaction.atomic():
+                if self.spec.skip_fk_checks:
+                    self._disable_triggers()
+                first_id = self._reserve_run_ids(count)
+                generated = self._generate_runs(
+                    survey,
+                    question_options,
+                    [
+                        respondent_ids[(offset + number) % len(respondent_ids)]
+                        for number in range(start, start + count)
+                    ],
+                    first_id=first_id,
+                    active_user_ids=active_user_ids,
+                )
+                self._copy(
+                    "survey_runs",
+                    (
+                        "id",
+                        "created_at",
+                        "updated_at",
+                        "user_id",
+                        "survey_id",
+                        "started_at",
+                        "finished_at",
+                        "answered_question_ids",
+                    ),
+                    generated.runs,
+                )
+                self._copy(
+                    "survey_answers",
+                    (
+                        "created_at",
+                        "updated_at",
+                        "run_id",
+                        "run_created_at",
+                        "question_id",
+                        "selected_option_id",
+                    ),
+                    generated.answers,
+                )
+                if self.spec.skip_fk_checks:
+                    self._sync_active_runs(first_id, count)
+            self.result.runs += generated.count
+            self.result.finished_runs += generated.finished
+            self.result.answers += generated.answers_count
+
+    @staticmethod
+    def _disable_triggers() -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL session_replication_role TO replica")
+
+    @staticmethod
+    def _sync_active_runs(first_id: int, count: int) -> None:
+        # Без триггеров survey_active_runs не ведётся: дописываем её сами
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO survey_active_runs (run_id, user_id, survey_id)
+                SELECT id, user_id, survey_id
+                FROM survey_runs
+                WHERE id BETWEEN %s AND %s AND finished_at IS NULL
+                """,
+                [first_id, first_id + count - 1],
+            )
+
+    @staticmethod
+    def _reserve_run_ids(count: int) -> int:
+        """Резервирует непрерывный диапазон id прогонов, возвращает первый."""
+        with connection.cursor() as cursor:
+            # Синтетические данные: ждать fsync на каждой пачке незачем
+            cursor.execute("SET LOCAL synchronous_commit TO OFF")
+            cursor.execute("LOCK TABLE survey_runs IN SHARE ROW EXCLUSIVE MODE")
+            cursor.execute(
+                """
+                SELECT setval(seq, nextval(seq) + %s - 1) - %s + 1
+                FROM pg_get_serial_sequence('survey_runs', 'id') AS seq
+                """,
+                [count, count],
+            )
+            (first_id,) = cursor.fetchone()
+        return first_id
+
+    def _generate_runs(
+        self,
+        survey: Survey,
+        question_options: list[tuple[int, list[int]]],
+        user_ids: list[int],
+        *,
+        first_id: int,
+        active_user_ids: set[int],
+    ) -> _GeneratedRuns:
+        spec = self.spec
+        rng = self.rng
+        count = len(user_ids)
+        question_ids = [question_id for question_id, _options in question_options]
+        # Выбор варианта: Zipf по случайной перестановке вариантов вопроса,
+        # чтобы «популярный» вариант не был всегда первым
+        choices: list[list[int]] = []
+        weights = zipf_weights(spec.options, spec.skew)
+        for _question_id, options in question_options:
+            ranked = rng.sample(options, len(options))
+            choices.append(
+                rng.choices(ranked, cum_weights=list(accumulate(weights)), k=count),
+            )
+
+        window = spec.days * 86400
+        mu = math.log(spec.median_duration_seconds)
+        runs = io.StringIO()
+        answers = io.StringIO()
+        finished = answers_count = 0
+        for index, user_id in enumerate(user_ids):
+            run_id = first_id + index
+            started_at = spec.end - timedelta(seconds=rng.uniform(0, window))
+            duration = timedelta(seconds=rng.lognormvariate(mu, spec.duration_sigma))
+            partial = (
+                rng.random() < spec.partial_ratio and user_id not in active_user_ids
+            )
+            answered = len(question_ids)
+            if partial:
+                active_user_ids.add(user_id)
+                answered = rng.randrange(answered)
+            step = duration / max(len(question_ids), 1)
+            if partial:
+                finished_at = r"\N"
+                updated_at = started_at + step * answered
+            else:
+                finished_at = _timestamp(started_at + duration)
+                updated_at = started_at + duration
+            for position in range(answered):
+                answered_at = _timestamp(started_at + step * (position + 1))
+                answers.write(
+                    f"{answered_at}\t{answered_at}\t{run_id}\t{_timestamp(started_at)}\t"
+                    f"{question_ids[position]}\t{choices[position][index]}\n",
+                )
+            cursor_ids = ",".join(map(str, question_ids[:answered]))
+            runs.write(
+                f"{run_id}\t{_timestamp(started_at)}\t{_timestamp(updated_at)}\t"
+                f"{user_id}\t{survey.id}\t{_timestamp(started_at)}\t"
+                f"{finished_at}\t{{{cursor_ids}}}\n",
+            )
+            finished += not partial
+            answers_count += answered
+        return _GeneratedRuns(
+            runs=runs.getvalue(),
+            answers=answers.getvalue(),
+            count=count,
+            finished=finished,
+            answers_count=answers_count,
+        )
+
+    @staticmethod
+    def _copy(table: str, columns: Sequence[str], data: str) -> None:
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        with connection.cursor() as cursor, cursor.cursor.copy(statement) as copy:
+            for block in _blocks(data):
+                copy.write(block)
+
+
+def _blocks(data: str, size: int = 1024 * 1024) -> Iterator[str]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from src.surveys.models import AnswerOption, Question, Survey, SurveyRun, UserAnswer
+from src.surveys.services.rollups import SurveyRollupService
 from src.users.enums import IdentityProvider
 from src.users.models import Identity
 
@@ -49,6 +50,8 @@ class DemoSeedService:
         options_created = cls._ensure_options(survey)
 
         run_id, answers_created = cls._ensure_completed_run(user, survey)
+        # Данные созданы в обход сервисов, поэтому пересобираем rollup-таблицы
+        SurveyRollupService.rebuild(survey)
 
         return DemoSeedResult(
             author_email=cls.AUTHOR_EMAIL,
@@ -144,7 +147,8 @@ class DemoSeedService:
                 question=q,
                 defaults={"selected_option": option},
             )
+            run.answered_question_ids.append(q.id)
             answers_created += 1
         run.finished_at = run.started_at + timedelta(seconds=30)
-        run.save(update_fields=["finished_at"])
+        run.save(update_fields=["finished_at", "answered_question_ids"])
         return (int(run.id), answers_created)
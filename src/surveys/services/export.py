@@ -0,0 +1,177 @@
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, ClassVar
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan
+from django.utils import timezone
+
+from src.surveys.models import Survey, SurveyRun
+from src.surveys.services.plan import SurveyPlanService
+
+# Курсор догрузки: (finished_at, run_id) последней полученной строки
+ExportPosition = tuple[datetime, int]
+
+
+@dataclass(frozen=True, slots=True)
+class ExportedRun:
+    run_id: int
+    user_id: int
+    started_at: datetime
+    finished_at: datetime
+    answers: dict[int, int]
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class SurveyExportService:
+    """Потоковая выгрузка завершённых прогонов: одна строка на прогон.
+
+    Работает по кортежам из серверного курсора, память не растёт с объёмом.
+    Прогоны идут по (finished_at, id); догрузка продолжает после курсора
+    из этой пары, поэтому прогоны с одинаковым finished_at не теряются.
+    finished_at назначается до коммита, и прогон может стать видимым позже
+    уже выгруженных соседей с большим finished_at. Поэтому выгружаются
+    только прогоны старше SURVEY_EXPORT_SETTLE_SECONDS: курсор не обгоняет
+    незакоммиченные завершения.
+    """
+
+    CHUNK_SIZE = 2000
+    CONTENT_TYPES: ClassVar[dict[str, str]] = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson",
+    }
+
+    @staticmethod
+    def records(
+        survey: Survey,
+        *,
+        since: ExportPosition | None = None,
+        using: str | None = None,
+    ) -> QuerySet[SurveyRun, tuple[Any, ...]]:
+        """Завершённые прогоны с ответами в порядке выгрузки, кортежами.
+
+        Ответы присоединяются LEFT JOIN: прогон без ответов даёт одну строку
+        с NULL вместо вопроса.
+        """
+        settled = timezone.now() - timedelta(
+            seconds=settings.SURVEY_EXPORT_SETTLE_SECONDS,
+        )
+        runs = SurveyRun.objects.using(using).filter(
+            survey=survey,
+            finished_at__isnull=False,
+            finished_at__lte=settled,
+        )
+        if since is not None:
+            # Сравнение строк — граница индекса idx_run_finished
+            runs = runs.filter(
+                TupleGreaterThan(Tuple(F("finished_at"), F("id")), since),
+            )
+        return runs.order_by("finished_at", "id").values_list(
+            "id",
+            "user_id",
+            "started_at",
+            "finished_at",
+            "answers__question_id",
+            "answers__selected_option_id",
+        )
+
+    @classmethod
+    def runs(
+        cls,
+        survey: Survey,
+        *,
+        since: ExportPosition | None = None,
+        using: str | None = None,
+    ) -> Iterator[ExportedRun]:
+        """Прогоны по возрастанию (finished_at, id); since — курсор догрузки,
+        using — база для чтения (по умолчанию выбирает роутер)."""
+        records = cls.records(survey, since=since, using=using).iterator(
+            chunk_size=cls.CHUNK_SIZE,
+        )
+        for run_id, group in groupby(records, key=itemgetter(0)):
+            # Строк в группе не больше, чем вопросов в опросе
+            run_records = list(group)
+            _run_id, user_id, started_at, finished_at, *_answer = run_records[0]
+            yield ExportedRun(
+                run_id=run_id,
+                user_id=user_id,
+                started_at=started_at,
+                finished_at=finished_at,
+                answers={
+                    record[4]: record[5]
+                    for record in run_records
+                    if record[4] is not None
+                },
+            )
+
+    @classmethod
+    def render(
+        cls,
+        survey: Survey,
+        export_format: str,
+        *,
+        since: ExportPosition | None = None,
+        using: str | None = None,
+    ) -> Iterator[str]:
+        runs = cls.runs(survey, since=since, using=using)
+        if export_format == "csv":
+            question_ids = SurveyPlanService.get(survey).question_ids
+            return cls._render_csv(runs, question_ids)
+        return cls._render_ndjson(runs)
+
+    @staticmethod
+    def _render_csv(
+        runs: Iterable[ExportedRun],
+        question_ids: tuple[int, ...],
+    ) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        yield writer.writerow(
+            [
+                "run_id",
+                "user_id",
+                "started_at",
+                "finished_at",
+                *(f"question_{question_id}" for question_id in question_ids),
+            ],
+        )
+        for run in runs:
+            yield writer.writerow(
+                [
+                    run.run_id,
+                    run.user_id,
+                    run.started_at.isoformat(),
+                    run.finished_at.isoformat(),
+                    *(run.answers.get(question_id, "") for question_id in question_ids),
+                ],
+            )
+
+    @staticmethod
+    def _render_ndjson(runs: Iterable[ExportedRun]) -> Iterator[str]:
+        for run in runs:
+            line = json.dumps(
+                {
+                    "run_id": run.run_id,
+                    "user_id": run.user_id,
+                    "started_at": run.started_at.isoformat(),
+                    "finished_at": run.finished_at.isoformat(),
+                    "answers": {
+                        str(question_id): option_id
+                        for question_id, option_id in run.answers.items()
+                    },
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            yield line + "\n"
@@ -0,0 +1,39 @@
+from collections.abc import Sequence
+
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+
+from src.surveys.models import Survey, SurveyRun, UserAnswer
+
+
+class SurveyRunFeedService:
+    """Лента прогонов опроса с ответами, от новых к старым.
+
+    Страницу прогонов отбирает KeysetPagination по idx_run_feed, ответы
+    страницы догружаются одним запросом только из секций её месяцев.
+    """
+
+    @staticmethod
+    def runs(survey: Survey) -> QuerySet[SurveyRun]:
+        return SurveyRun.objects.filter(survey=survey).only(
+            "id",
+            "created_at",
+            "user_id",
+            "started_at",
+            "finished_at",
+        )
+
+    @staticmethod
+    def attach_answers(runs: Sequence[SurveyRun]) -> None:
+        """Заполняет run.answers у прогонов страницы."""
+        if not runs:
+            return
+        created = [run.created_at for run in runs]
+        # Граница по ключу секционирования отсекает секции других месяцев
+        answers = (
+            UserAnswer.objects.filter(
+                run_created_at__range=(min(created), max(created)),
+            )
+            .only("id", "run_id", "question_id", "selected_option_id")
+            .order_by("id")
+        )
+        prefetch_related_objects(runs, Prefetch("answers", queryset=answers))
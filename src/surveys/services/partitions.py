@@ -0,0 +1,256 @@
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Final
+
+from django.db import connection, transaction
+from django.db.backends.utils import CursorWrapper
+from django.utils import timezone
+from psycopg import sql
+
+# Секционированные таблицы и их ключи; ссылаемая таблица — первой
+PARTITIONED_TABLES: Final[tuple[tuple[str, str], ...]] = (
+    ("survey_runs", "created_at"),
+    ("survey_answers", "run_created_at"),
+)
+# Месячная секция: <таблица>_pYYYY_MM
+PARTITION_NAME_RE: Final[re.Pattern[str]] = re.compile(
+    r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$",
+)
+
+
+def month_start(value: datetime) -> datetime:
+    """Начало месяца (UTC), в который попадает value."""
+    return value.astimezone(UTC).replace(
+        day=1,
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    name: str
+    # None у секции по умолчанию
+    month: datetime | None
+    rows: int
+
+
+class SurveyPartitionService:
+    """Помесячные секции survey_runs и survey_answers.
+
+    Прогоны секционированы по created_at, ответы — по run_created_at (времени
+    создания прогона), поэтому ответы прогона лежат в секции того же месяца.
+    Строки вне месячных секций попадают в секцию по умолчанию <таблица>_default.
+    """
+
+    @staticmethod
+    def partitions() -> list[Partition]:
+        """Месячные секции и секции по умолчанию; rows — оценка по статистике."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT parent.relname, child.relname, child.reltuples::bigint
+                FROM pg_inherits AS i
+                JOIN pg_class AS parent ON parent.oid = i.inhparent
+                JOIN pg_class AS child ON child.oid = i.inhrelid
+                WHERE parent.relname = ANY(%s) AND child.relkind = 'r'
+                ORDER BY parent.relname, child.relname
+                """,
+                [[table for table, _key in PARTITIONED_TABLES]],
+            )
+            rows = cursor.fetchall()
+        partitions = []
+        for table, name, estimate in rows:
+            match = PARTITION_NAME_RE.match(name)
+            month = (
+                datetime(int(match["year"]), int(match["month"]), 1, tzinfo=UTC)
+                if match and match["table"] == table
+                else None
+            )
+            partitions.append(
+                Partition(table=table, name=name, month=month, rows=max(estimate, 0)),
+            )
+        return partitions
+
+    @classmethod
+    @transaction.atomic
+    def ensure(cls, *, start: datetime, end: datetime) -> list[str]:
+        """Создаёт недостающие месячные секции с месяца start по месяц end включительно.
+
+        Возвращает имена созданных секций. PostgreSQL не создаёт секцию, пока в
+        секции по умолчанию есть строки её месяца (manage_partitions не успел
+        создать секцию заранее), поэтому такие строки переносятся в новую секцию
+        в той же транзакции.
+        """
+        existing = {partition.name for partition in cls.partitions()}
+        created = []
+        month = month_start(start)
+        last = month_start(end)
+        with connection.cursor() as cursor:
+            while month <= last:
+                missing = [
+                    (table, key)
+                    for table, key in PARTITIONED_TABLES
+                    if partition_name(table, month) not in existing
+                ]
+                if missing and not created:
+                    cls._prepare_move(cursor)
+                # Ответы ссылаются на прогоны: выносятся первыми, обратно — последними
+                for table, key in reversed(missing):
+                    cls._move_out_of_default(cursor, table, key, month)
+                for table, _key in missing:
+                    name = partition_name(table, month)
+                    cursor.execute(
+                        sql.SQL(
+                            "CREATE TABLE {name} PARTITION OF {table} "
+                            "FOR VALUES FROM ({start}) TO ({end})",
+                        ).format(
+                            name=sql.Identifier(name),
+                            table=sql.Identifier(table),
+                            start=sql.Literal(month),
+                            end=sql.Literal(add_months(month, 1)),
+                        ),
+                    )
+                    created.append(name)
+                for table, _key in missing:
+                    cls._move_back(cursor, table)
+                month = add_months(month, 1)
+            if created:
+                # Все отложенные ограничения в схеме — INITIALLY DEFERRED
+                cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        return created
+
+    @staticmethod
+    def _prepare_move(cursor: CursorWrapper) -> None:
+        # CREATE TABLE .. PARTITION OF недоступен при отложенных проверках FK
+        # в транзакции: проверки выполняются сразу, до конца ensure
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        # Пока строки переносятся, новые не должны попасть в секцию по умолчанию
+        cursor.execute(
+            sql.SQL("LOCK TABLE {} IN ACCESS EXCLUSIVE MODE").format(
+                sql.SQL(", ").join(
+                    sql.Identifier(f"{table}_default")
+                    for table, _key in PARTITIONED_TABLES
+                ),
+            ),
+        )
+
+    @staticmethod
+    def _move_out_of_default(
+        cursor: CursorWrapper,
+        table: str,
+        key: str,
+        month: datetime,
+    ) -> None:
+        # Ответы прогона лежат в том же месяце и выносятся раньше него;
+        # триггер survey_active_runs снимает и снова ставит отметку активного прогона
+        moving = sql.Identifier(f"{table}_moving")
+        cursor.execute(
+            sql.SQL("CREATE TEMPORARY TABLE {moving} (LIKE {table})").format(
+                moving=moving,
+                table=sql.Identifier(table),
+            ),
+        )
+        cursor.execute(
+            sql.SQL(
+                "WITH moved AS (DELETE FROM {default} "
+                "WHERE {key} >= %s AND {key} < %s RETURNING *) "
+                "INSERT INTO {moving} SELECT * FROM moved",
+            ).format(
+                default=sql.Identifier(f"{table}_default"),
+                key=sql.Identifier(key),
+                moving=moving,
+            ),
+            [month, add_months(month, 1)],
+        )
+
+    @staticmethod
+    def _move_back(cursor: CursorWrapper, table: str) -> None:
+        moving = sql.Identifier(f"{table}_moving")
+        cursor.execute(
+            sql.SQL("INSERT INTO {table} SELECT * FROM {moving}").format(
+                table=sql.Identifier(table),
+                moving=moving,
+            ),
+        )
+        cursor.execute(sql.SQL("DROP TABLE {}").format(moving))
+
+    @classmethod
+    def ensure_ahead(cls, months: int) -> list[str]:
+        """Секции с текущего месяца на months месяцев вперёд."""
+        now = timezone.now()
+        return cls.ensure(start=now, end=add_months(month_start(now), months))
+
+    @classmethod
+    @transaction.atomic
+    def detach(cls, *, before: datetime, drop: bool = False) -> list[str]:
+        """Отсоединяет месячные секции, целиком лежащие раньше before.
+
+        Отсоединённая секция остаётся обычной таблицей без внешних ключей
+        (архив: pg_dump, перенос в холодное хранилище); с drop=True она удаляется.
+        Незавершённые прогоны из неё перестают считаться активными.
+        """
+        boundary = month_start(before)
+        old = [
+            partition
+            for partition in cls.partitions()
+            if partition.month is not None
+            and add_months(partition.month, 1) <= boundary
+        ]
+        # Ответы ссылаются на прогоны: их секции отсоединяются первыми
+        order = {table: index for index, (table, _key) in enumerate(PARTITIONED_TABLES)}
+        old.sort(key=lambda partition: (-order[partition.table], partition.name))
+        detached = []
+        with connection.cursor() as cursor:
+            for partition in old:
+                name = sql.Identifier(partition.name)
+                if partition.table == "survey_runs":
+                    cursor.execute(
+                        sql.SQL(
+                            "DELETE FROM survey_active_runs WHERE run_id IN "
+                            "(SELECT id FROM {} WHERE finished_at IS NULL)",
+                        ).format(name),
+                    )
+                cursor.execute(
+                    sql.SQL("ALTER TABLE {table} DETACH PARTITION {name}").format(
+                        table=sql.Identifier(partition.table),
+                        name=name,
+                    ),
+                )
+                if drop:
+                    cursor.execute(sql.SQL("DROP TABLE {}").format(name))
+                else:
+                    cls._drop_foreign_keys(cursor, partition.name)
+                detached.append(partition.name)
+        return detached
+
+    @staticmethod
+    def _drop_foreign_keys(cursor: CursorWrapper, table: str) -> None:
+        # Архив не должен мешать удалению прогонов, опросов и пользователей
+        cursor.execute(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+            """,
+            [table],
+        )
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(
+                sql.SQL("ALTER TABLE {table} DROP CONSTRAINT {constraint}").format(
+                    table=sql.Identifier(table),
+                    constraint=sql.Identifier(constraint),
+                ),
+            )
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Mapping, Sequence
+from dataclasses import dataclass
+from threading import Lock
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from rest_framework.renderers import JSONRenderer
+
+from src.common.metrics import CallbackCounter, CallbackGauge, registry
+from src.surveys.models import Question, Survey
+from src.surveys.serializers.run import QuestionPublicSerializer
+
+
+@dataclass(frozen=True, slots=True)
+class SurveyPlan:
+    """Неизменяемая «скомпилированная» структура опроса для прохождения.
+
+    Вопросы хранятся уже отрендеренными в JSON (QuestionPublicSerializer),
+    ответы собираются из этих фрагментов без повторной сериализации.
+    """
+
+    survey_id: int
+    version: int
+    question_ids: tuple[int, ...]
+    option_ids: Mapping[int, frozenset[int]]
+    fragments: Mapping[int, bytes]
+
+    def has_question(self, question_id: int) -> bool:
+        return question_id in self.option_ids
+
+    def has_option(self, question_id: int, option_id: int) -> bool:
+        return option_id in self.option_ids.get(question_id, ())
+
+    def next_question_id(self, answered_ids: Collection[int]) -> int | None:
+        for question_id in self.question_ids:
+            if question_id not in answered_ids:
+                return question_id
+        return None
+
+    def fragment(self, question_id: int) -> bytes:
+        return self.fragments[question_id]
+
+
+@dataclass(frozen=True)
+class PlanCacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class SurveyPlanCache:
+    """Внутрипроцессный LRU-кэш планов: одна запись на опрос.
+
+    Запись с устаревшей версией структуры считается промахом и перестраивается.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._plans: OrderedDict[int, SurveyPlan] = OrderedDict()
+        self._lock = Lock()
+
+    def get(
+        self,
+        survey_id: int,
+        version: int,
+        build: Callable[[], SurveyPlan],
+    ) -> SurveyPlan:
+        plan = self.lookup(survey_id, version)
+        if plan is None:
+            # Сборка идёт вне блокировки: параллельная сборка одного плана безвредна
+            plan = self.store(build())
+        return plan
+
+    def lookup(self, survey_id: int, version: int) -> SurveyPlan | None:
+        """План нужной версии или None (промах)."""
+        with self._lock:
+            plan = self._plans.get(survey_id)
+            if plan is not None and plan.version == version:
+                self._plans.move_to_end(survey_id)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        return None
+
+    def store(self, plan: SurveyPlan) -> SurveyPlan:
+        with self._lock:
+            current = self._plans.get(plan.survey_id)
+            if current is None or current.version <= plan.version:
+                self._plans[plan.survey_id] = plan
+                self._plans.move_to_end(plan.survey_id)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def discard(self, survey_id: int) -> None:
+        with self._lock:
+            self._plans.pop(survey_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> PlanCacheStats:
+        with self._lock:
+            return PlanCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                size=len(self._plans),
+                maxsize=self.maxsize,
+            )
+
+
+plan_cache = SurveyPlanCache(maxsize=settings.SURVEY_PLAN_CACHE_SIZE)
+
+registry.register(
+    CallbackCounter(
+        "survey_plan_cache_hits_total",
+        "Survey plan cache hits",
+        lambda: plan_cache.stats().hits,
+    ),
+)
+registry.register(
+    CallbackCounter(
+        "survey_plan_cache_misses_total",
+        "Survey plan cache misses, including stale versions",
+        lambda: plan_cache.stats().misses,
+    ),
+)
+registry.register(
+    CallbackGauge(
+        "survey_plan_cache_size",
+        "Survey plans cached in the process",
+        lambda: plan_cache.stats().size,
+    ),
+)
+
+
+class SurveyPlanService:
+    """Доступ к закэшированным планам опросов."""
+
+    @classmethod
+    def get(cls, survey: Survey) -> SurveyPlan:
+        return plan_cache.get(
+            survey.id,
+            survey.structure_version,
+            lambda: cls.build(survey),
+        )
+
+    @classmethod
+    async def aget(cls, survey: Survey) -> SurveyPlan:
+        """get() для async-кода: при попадании в кэш БД и потоки не нужны."""
+        plan = plan_cache.lookup(survey.id, survey.structure_version)
+        if plan is None:
+            plan = plan_cache.store(await cls.abuild(survey))
+        return plan
+
+    @classmethod
+    def build(cls, survey: Survey) -> SurveyPlan:
+        return cls.compile(survey, list(cls.questions(survey)))
+
+    @classmethod
+    async def abuild(cls, survey: Survey) -> SurveyPlan:
+        return cls.compile(
+            survey,
+            [question async for question in cls.questions(survey)],
+        )
+
+    @staticmethod
+    def questions(survey: Survey) -> QuerySet[Question]:
+        return survey.questions.order_by("position").prefetch_related(
+            "answer_options",
+        )
+
+    @staticmethod
+    def compile(survey: Survey, questions: Sequence[Question]) -> SurveyPlan:
+        """План из вопросов с уже загруженными вариантами ответа."""
+        payloads = QuestionPublicSerializer(questions, many=True).data
+        renderer = JSONRenderer()
+        return SurveyPlan(
+            survey_id=survey.id,
+            version=survey.structure_version,
+            question_ids=tuple(payload["id"] for payload in payloads),
+            option_ids=MappingProxyType(
+                {
+                    payload["id"]: frozenset(
+                        option["id"] for option in payload["answer_options"]
+                    )
+                    for payload in payloads
+                },
+            ),
+            fragments=MappingProxyType(
+                {payload["id"]: renderer.render(payload) for payload in payloads},
+            ),
+        )
+
+    @staticmethod
+    def invalidate(survey_id: int) -> None:
+        """Повышает версию структуры опроса после правки вопросов/вариантов."""
+        Survey.objects.filter(pk=survey_id).update(
+            structure_version=F("structure_version") + 1,
+        )
+        plan_cache.discard(survey_id)
@@ -0,0 +1,285 @@
+import json
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any, Final
+
+from django.db import connection
+from django.db.models import Avg, Count, F, QuerySet
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from src.common.pagination import keyset_page
+from src.surveys.models import (
+    AnswerOption,
+    Survey,
+    SurveyActiveRun,
+    SurveyRollup,
+    SurveyRun,
+)
+from src.surveys.services.export import SurveyExportService
+from src.surveys.services.feed import SurveyRunFeedService
+from src.users.models import Identity
+
+REPORT_VERSION: Final[int] = 1
+# Seq Scan по таблице, прочитавший меньше строк, проблемой не считается:
+# на маленьких таблицах он дешевле индекса
+SEQ_SCAN_MIN_ROWS: Final[int] = 10_000
+# Рост времени меньше этого — шум замера, а не регрессия
+MIN_TIME_GROWTH_MS: Final[float] = 1.0
+
+
+class NoSampleDataError(Exception):
+    """В БД нет данных, на которых можно выполнить горячие запросы."""
+
+
+@dataclass(frozen=True)
+class Samples:
+    """Значения параметров горячих запросов, взятые из текущей БД."""
+
+    survey: Survey
+    active_run: SurveyRun | None
+    identity: Identity | None
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    name: str
+    description: str
+    build: Callable[[Samples], QuerySet[Any] | None]
+
+
+@dataclass(frozen=True)
+class PlanReport:
+    name: str
+    execution_ms: float
+    planning_ms: float
+    buffers: int
+    indexes: list[str] = field(default_factory=list)
+    seq_scans: list[str] = field(default_factory=list)
+
+
+def _option_counts(samples: Samples) -> QuerySet[Any]:
+    return (
+        AnswerOption.objects.filter(question__survey=samples.survey)
+        .annotate(answers_count=Count("selected_answers"))
+        .values("id", "question_id", "text", "answers_count")
+        .order_by("question_id", "position")
+    )
+
+
+def _option_rollups(samples: Samples) -> QuerySet[Any]:
+    return (
+        AnswerOption.objects.filter(question__survey=samples.survey)
+        .values("id", "question_id", "text", "rollup__answers_count")
+        .order_by("question_id", "position")
+    )
+
+
+def _finished_runs(samples: Samples) -> QuerySet[Any]:
+    # Та же выборка, что у aggregate(): values() нужен, чтобы получить SQL
+    return (
+        SurveyRun.objects.filter(survey=samples.survey, finished_at__isnull=False)
+        .values("survey_id")
+        .annotate(
+            count=Count("id"),
+            avg=Avg(F("finished_at") - F("started_at")),
+        )
+        .values("count", "avg")
+    )
+
+
+def _active_run(samples: Samples) -> QuerySet[Any] | None:
+    run = samples.active_run
+    if run is None:
+        return None
+    return SurveyRun.objects.filter(
+        user_id=run.user_id,
+        survey_id=run.survey_id,
+        finished_at__isnull=True,
+    )
+
+
+def _export_page(samples: Samples) -> QuerySet[Any]:
+    return SurveyExportService.records(samples.survey)[: SurveyExportService.CHUNK_SIZE]
+
+
+def _survey_list_page(samples: Samples) -> QuerySet[Any]:
+    # Курсор задан, чтобы в плане было сравнение строк, как на глубоких страницах
+    return keyset_page(
+        Survey.objects.filter(author_id=samples.survey.author_id),
+        after=(timezone.now(), 0),
+        size=api_settings.PAGE_SIZE + 1,
+    )
+
+
+def _run_feed_page(samples: Samples) -> QuerySet[Any]:
+    return keyset_page(
+        SurveyRunFeedService.runs(samples.survey),
+        after=(timezone.now(), 0),
+        size=api_settings.PAGE_SIZE + 1,
+    )
+
+
+def _identity(samples: Samples) -> QuerySet[Any] | None:
+    identity = samples.identity
+    if identity is None:
+        return None
+    return Identity.objects.select_related("user").filter(
+        provider=identity.provider,
+        value=identity.value,
+    )
+
+
+# Формы запросов горячих путей: статистика (оба движка), прохождение,
+# выгрузка, постраничные списки и вход по email
+HOT_QUERIES: Final[tuple[QueryShape, ...]] = (
+    QueryShape(
+        "stats_option_counts",
+        "answers grouped by selected option (aggregate engine)",
+        _option_counts,
+    ),
+    QueryShape(
+        "stats_option_rollups",
+        "option counters (rollup engine)",
+        _option_rollups,
+    ),
+    QueryShape(
+        "stats_finished_runs",
+        "finished runs count and average duration",
+        _finished_runs,
+    ),
+    QueryShape(
+        "active_run_lookup",
+        "active run of a user in a survey",
+        _active_run,
+    ),
+    QueryShape(
+        "export_page",
+        "first export chunk ordered by finished_at",
+        _export_page,
+    ),
+    QueryShape(
+        "survey_list_page",
+        "page of author's surveys by (created_at, id)",
+        _survey_list_page,
+    ),
+    QueryShape(
+        "run_feed_page",
+        "page of survey runs by (created_at, id)",
+        _run_feed_page,
+    ),
+    QueryShape(
+        "identity_lookup",
+        "identity by (provider, value) with user",
+        _identity,
+    ),
+)
+
+
+def collect_samples(survey_id: int | None = None) -> Samples:
+    """Самый популярный опрос (или заданный), его активный прогон, любая identity."""
+    if survey_id is not None:
+        survey = Survey.objects.filter(pk=survey_id).first()
+    else:
+        rollup = SurveyRollup.objects.order_by("-finished_runs").first()
+        survey = rollup.survey if rollup else Survey.objects.order_by("id").first()
+    if survey is None:
+        msg = "No surveys to explain queries against"
+        raise NoSampleDataError(msg)
+    active = SurveyActiveRun.objects.filter(survey_id=survey.id).first()
+    active_run = SurveyRun.objects.filter(pk=active.run_id).first() if active else None
+    return Samples(
+        survey=survey,
+        active_run=active_run,
+        identity=Identity.objects.order_by("id").first(),
+    )
+
+
+def _plan_nodes(node: Mapping[str, Any]) -> Iterator[Mapping[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def explain(queryset: QuerySet[Any]) -> Mapping[str, Any]:
+    """EXPLAIN (ANALYZE, BUFFERS) запроса: запрос выполняется."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        (plan,) = cursor.fetchone()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def summarize(name: str, plan: Mapping[str, Any]) -> PlanReport:
+    root = plan["Plan"]
+    indexes = set()
+    seq_scans = set()
+    for node in _plan_nodes(root):
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan":
+            scanned = node["Actual Rows"] * node["Actual Loops"] + node.get(
+                "Rows Removed by Filter",
+                0,
+            )
+            if scanned >= SEQ_SCAN_MIN_ROWS:
+                seq_scans.add(node["Relation Name"])
+    return PlanReport(
+        name=name,
+        execution_ms=round(plan["Execution Time"], 3),
+        planning_ms=round(plan["Planning Time"], 3),
+        buffers=root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        indexes=sorted(indexes),
+        seq_scans=sorted(seq_scans),
+    )
+
+
+def explain_hot_queries(samples: Samples) -> list[PlanReport]:
+    reports = []
+    for shape in HOT_QUERIES:
+        queryset = shape.build(samples)
+        if queryset is None:
+            continue
+        reports.append(summarize(shape.name, explain(queryset)))
+    return reports
+
+
+def build_report(samples: Samples, reports: list[PlanReport]) -> dict[str, Any]:
+    return {
+        "version": REPORT_VERSION,
+        "survey_id": samples.survey.id,
+        "queries": {report.name: asdict(report) for report in reports},
+    }
+
+
+def compare_plans(
+    current: Mapping[str, Any],
+    baseline: Mapping[str, Any],
+    *,
+    threshold: float,
+) -> list[str]:
+    """Регрессии относительно базового отчёта: новый Seq Scan, рост прочитанных
+    буферов или времени выполнения сверх порога."""
+    regressions = []
+    for name, stats in current["queries"].items():
+        base = baseline["queries"].get(name)
+        if base is None:
+            continue
+        new_scans = set(stats["seq_scans"]) - set(base["seq_scans"])
+        if new_scans:
+            regressions.append(f"{name}: new seq scan {', '.join(sorted(new_scans))}")
+        if stats["buffers"] > base["buffers"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {stats['buffers']} buffers > {base['buffers']} baseline",
+            )
+        if (
+            stats["execution_ms"] > base["execution_ms"] * (1 + threshold)
+            and stats["execution_ms"] - base["execution_ms"] >= MIN_TIME_GROWTH_MS
+        ):
+            regressions.append(
+                f"{name}: {stats['execution_ms']:.2f}ms > "
+                f"{base['execution_ms']:.2f}ms baseline",
+            )
+    return regressions
@@ -0,0 +1,119 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from src.surveys.models import (
+    AnswerOption,
+    AnswerOptionRollup,
+    Survey,
+    SurveyRollup,
+    UserAnswer,
+)
+
+
+@dataclass(frozen=True)
+class RollupSnapshot:
+    finished_runs: int
+    duration_total: timedelta
+    option_counts: dict[int, int] = field(default_factory=dict)
+
+
+class SurveyRollupService:
+    """Пересборка и сверка rollup-таблиц статистики с сырыми ответами."""
+
+    @staticmethod
+    def live(survey: Survey) -> RollupSnapshot:
+        """Считает агрегаты по сырым данным (полный проход по ответам опроса)."""
+        runs = survey.runs.filter(finished_at__isnull=False).aggregate(
+            count=Count("id"),
+            duration=Sum(F("finished_at") - F("started_at")),
+        )
+        option_records = (
+            UserAnswer.objects.filter(question__survey=survey)
+            .values("selected_option_id")
+            .annotate(answers_count=Count("id"))
+            .values_list("selected_option_id", "answers_count")
+        )
+        return RollupSnapshot(
+            finished_runs=int(runs["count"]),
+            duration_total=runs["duration"] or timedelta(0),
+            option_counts={
+                int(option_id): int(count)
+                for option_id, count in option_records
+                if count
+            },
+        )
+
+    @staticmethod
+    def stored(survey: Survey) -> RollupSnapshot:
+        """Читает текущее состояние rollup-таблиц опроса."""
+        rollup = SurveyRollup.objects.filter(survey=survey).first()
+        option_records = AnswerOptionRollup.objects.filter(
+            option__question__survey=survey,
+        ).values_list("option_id", "answers_count")
+        return RollupSnapshot(
+            finished_runs=rollup.finished_runs if rollup else 0,
+            duration_total=rollup.duration_total if rollup else timedelta(0),
+            option_counts={
+                int(option_id): int(count)
+                for option_id, count in option_records
+                if count
+            },
+        )
+
+    @classmethod
+    def verify(cls, survey: Survey) -> list[str]:
+        """Возвращает список расхождений rollup-таблиц с сырыми данными."""
+        live = cls.live(survey)
+        stored = cls.stored(survey)
+        problems = []
+        if live.finished_runs != stored.finished_runs:
+            problems.append(
+                f"finished_runs: stored={stored.finished_runs} "
+                f"live={live.finished_runs}",
+            )
+        if live.duration_total != stored.duration_total:
+            problems.append(
+                f"duration_total: stored={stored.duration_total} "
+                f"live={live.duration_total}",
+            )
+        for option_id in sorted(live.option_counts.keys() | stored.option_counts):
+            live_count = live.option_counts.get(option_id, 0)
+            stored_count = stored.option_counts.get(option_id, 0)
+            if live_count != stored_count:
+                problems.append(
+                    f"option {option_id}: stored={stored_count} live={live_count}",
+                )
+        return problems
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, survey: Survey) -> RollupSnapshot:
+        """Пересобирает rollup-таблицы опроса из сырых данных.
+
+        Счётчики опроса блокируются до конца транзакции: ответы в этот опрос
+        ждут на инкременте и применяются поверх пересобранных значений,
+        записи в другие опросы не ждут.
+        """
+        SurveyRollup.lock(survey.id)
+        live = cls.live(survey)
+
+        SurveyRollup.objects.update_or_create(
+            survey=survey,
+            defaults={
+                "finished_runs": live.finished_runs,
+                "duration_total": live.duration_total,
+            },
+        )
+        option_ids = AnswerOption.objects.filter(question__survey=survey).values_list(
+            "id",
+            flat=True,
+        )
+        AnswerOptionRollup.objects.filter(option_id__in=option_ids).delete()
+        AnswerOptionRollup.objects.bulk_create(
+            AnswerOptionRollup(option_id=option_id, answers_count=count)
+            for option_id, count in live.option_counts.items()
+        )
+        return live
@@ -1,55 +1,160 @@
+from collections import Counter
+from collections.abc import Sequence
+
+from asgiref.sync import sync_to_async
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 
-from src.surveys.models import AnswerOption, Question, Survey, SurveyRun, UserAnswer
+from src.surveys.metrics import answers_submitted, runs_started
+from src.surveys.models import AnswerOptionRollup, Survey, SurveyRun, UserAnswer
+from src.surveys.services.plan import SurveyPlan
 from src.users.models.user import User
 
+ALREADY_ANSWERED = "Вопрос уже отвечён"
+
 
 class SurveyRunService:
-    """Операции вокруг прохождения опроса."""
+    """Операции вокруг прохождения опроса.
+
+    Структура опроса берётся из закэшированного плана, а не из БД.
+    Повторные ответы отсекаются уникальным ограничением при вставке,
+    без предварительных проверок и блокировок.
+
+    Методы с префиксом a — варианты для async-view. Чтения идут через
+    async-ORM; запись ответа транзакционна, а транзакции Django в async-коде
+    не поддерживает, поэтому она целиком выполняется одним sync_to_async.
+    """
 
     @staticmethod
     def get_or_create_active_run(*, survey: Survey, user: User) -> SurveyRun:
-        run, _created = SurveyRun.objects.get_or_create(
+        run, created = SurveyRun.objects.get_or_create(
             user=user,
             survey=survey,
             finished_at__isnull=True,
         )
+        if created:
+            transaction.on_commit(runs_started.inc)
         return run
 
     @staticmethod
-    def next_question(run: SurveyRun) -> Question | None:
-        answered_ids = run.answers.values_list("question_id", flat=True)
-        return (
-            run.survey.questions.exclude(id__in=answered_ids)
-            .order_by("position")
-            .prefetch_related("answer_options")
-            .first()
+    async def aget_or_create_active_run(*, survey: Survey, user: User) -> SurveyRun:
+        run, created = await SurveyRun.objects.aget_or_create(
+            user=user,
+            survey=survey,
+            finished_at__isnull=True,
         )
+        if created:
+            # Вне транзакции: aget_or_create уже закоммитил прогон
+            runs_started.inc()
+        return run
 
     @staticmethod
-    def is_completed(run: SurveyRun) -> bool:
-        total_questions = run.survey.questions.count()
-        answered_count = run.answers.count()
-        return answered_count >= total_questions
+    def next_question_id(run: SurveyRun, plan: SurveyPlan) -> int | None:
+        return plan.next_question_id(set(run.answered_question_ids))
 
-    @staticmethod
+    @classmethod
+    def is_completed(cls, run: SurveyRun, plan: SurveyPlan) -> bool:
+        return cls.next_question_id(run, plan) is None
+
+    @classmethod
     @transaction.atomic
     def create_answer(
+        cls,
+        *,
+        run: SurveyRun,
+        plan: SurveyPlan,
+        question_id: int,
+        option_id: int,
+    ) -> UserAnswer:
+        errors = cls._structure_errors(plan, question_id, option_id)
+        if errors:
+            raise ValidationError(errors)
+
+        inserted = UserAnswer.insert_new(
+            run=run,
+            answers=[(question_id, option_id)],
+        )
+        if not inserted:
+            raise ValidationError({"question_id": ALREADY_ANSWERED})
+        AnswerOptionRollup.increment({option_id: 1}, survey_id=run.survey_id)
+        run.record_answered([question_id])
+        transaction.on_commit(answers_submitted.inc)
+        return inserted[0]
+
+    @classmethod
+    async def acreate_answer(
+        cls,
         *,
         run: SurveyRun,
-        question: Question,
-        option: AnswerOption,
+        plan: SurveyPlan,
+        question_id: int,
+        option_id: int,
     ) -> UserAnswer:
-        if option.question_id != question.id:
-            raise ValidationError({"option_id": "Вариант не принадлежит вопросу"})
-        if question.survey_id != run.survey_id:
-            raise ValidationError({"question_id": "Вопрос не принадлежит опросу"})
-        if run.answers.filter(question=question).exists():
-            raise ValidationError({"question_id": "Вопрос уже отвечён"})
-
-        return UserAnswer.objects.create(
+        # Ошибки структуры видны по плану: с ними в поток не переходим
+        errors = cls._structure_errors(plan, question_id, option_id)
+        if errors:
+            raise ValidationError(errors)
+        return await sync_to_async(cls.create_answer)(
             run=run,
-            question=question,
-            selected_option=option,
+            plan=plan,
+            question_id=question_id,
+            option_id=option_id,
         )
+
+    @classmethod
+    @transaction.atomic
+    def create_answers(
+        cls,
+        *,
+        run: SurveyRun,
+        plan: SurveyPlan,
+        answers: Sequence[tuple[int, int]],
+    ) -> list[UserAnswer]:
+        """Сохраняет пачку ответов (question_id, option_id) одной вставкой.
+
+        Ошибки те же, что у create_answer, и возвращаются по позициям пачки.
+        """
+        errors: list[dict[str, str]] = []
+        seen_ids: set[int] = set()
+        for question_id, option_id in answers:
+            item_errors = cls._structure_errors(plan, question_id, option_id)
+            if not item_errors and question_id in seen_ids:
+                item_errors = {"question_id": ALREADY_ANSWERED}
+            seen_ids.add(question_id)
+            errors.append(item_errors)
+        if any(errors):
+            raise ValidationError({"answers": errors})
+
+        inserted = UserAnswer.insert_new(run=run, answers=answers)
+        if len(inserted) != len(answers):
+            # Часть вопросов уже отвечена: откатываем всю пачку
+            inserted_ids = {answer.question_id for answer in inserted}
+            raise ValidationError(
+                {
+                    "answers": [
+                        {}
+                        if question_id in inserted_ids
+                        else {"question_id": ALREADY_ANSWERED}
+                        for question_id, _option_id in answers
+                    ],
+                },
+            )
+        AnswerOptionRollup.increment(
+            Counter(option_id for _question_id, option_id in answers),
+            survey_id=run.survey_id,
+        )
+        run.record_answered([question_id for question_id, _option_id in answers])
+        transaction.on_commit(lambda: answers_submitted.inc(len(inserted)))
+        return inserted
+
+    @staticmethod
+    def _structure_errors(
+        plan: SurveyPlan,
+        question_id: int,
+        option_id: int,
+    ) -> dict[str, str]:
+        if not plan.has_question(question_id):
+            return {"question_id": "Вопрос не принадлежит опросу"}
+        if not plan.has_option(question_id, option_id):
+            return {"option_id": "Вариант не принадлежит вопросу"}
+        return {}
@@ -1,8 +1,12 @@
+from collections import defaultdict
 from dataclasses import dataclass
 
-from django.db.models import Avg, Count, F
+from django.conf import settings
+from django.db.models import Avg, Count, Expression, F, Value
+from django.db.models.functions import Coalesce
 
-from src.surveys.models import Question, Survey
+from src.surveys.enums import StatsEngine
+from src.surveys.models import AnswerOption, Survey, SurveyRollup
 
 
 @dataclass(frozen=True)
@@ -28,63 +32,78 @@ class SurveyStats:
 
 
 class SurveyStatsService:
-    """Подготовка статистики по опросу."""
+    """Подготовка статистики по опросу.
+
+    Число запросов фиксировано и не зависит от количества вопросов:
+    - rollup: читает инкрементальные счётчики, без сканирования ответов;
+    - aggregate: считает по сырым ответам одним сгруппированным запросом.
+    """
 
     @classmethod
-    def collect(cls, survey: Survey) -> SurveyStats:
-        total_runs = cls._count_runs(survey)
-        avg_duration_seconds = cls._avg_duration_seconds(survey)
-        questions = cls._questions_stats(survey)
+    def collect(
+        cls,
+        survey: Survey,
+        engine: StatsEngine | None = None,
+    ) -> SurveyStats:
+        engine = StatsEngine(engine or settings.SURVEY_STATS_ENGINE)
+        if engine == StatsEngine.AGGREGATE:
+            total_runs, avg_duration_seconds = cls._aggregate_runs(survey)
+            answers_count: Expression = Count("selected_answers")
+        else:
+            rollup = SurveyRollup.objects.filter(survey=survey).first()
+            total_runs = rollup.finished_runs if rollup else 0
+            avg_duration_seconds = rollup.avg_duration_seconds if rollup else None
+            answers_count = Coalesce(F("rollup__answers_count"), Value(0))
         return SurveyStats(
             total_runs=total_runs,
             avg_duration_seconds=avg_duration_seconds,
-            questions=questions,
+            questions=cls._questions_stats(survey, answers_count),
         )
 
     @staticmethod
-    def _count_runs(survey: Survey) -> int:
-        return survey.runs.filter(finished_at__isnull=False).count()
-
-    @staticmethod
-    def _avg_duration_seconds(survey: Survey) -> float | None:
+    def _aggregate_runs(survey: Survey) -> tuple[int, float | None]:
         result = survey.runs.filter(finished_at__isnull=False).aggregate(
+            count=Count("id"),
             avg=Avg(F("finished_at") - F("started_at")),
         )
         delta = result["avg"]
-        return float(delta.total_seconds()) if delta else None
+        return int(result["count"]), float(delta.total_seconds()) if delta else None
 
     @classmethod
-    def _questions_stats(cls, survey: Survey) -> list[QuestionStats]:
+    def _questions_stats(
+        cls,
+        survey: Survey,
+        answers_count: Expression,
+    ) -> list[QuestionStats]:
+        options_by_question: dict[int, list[AnswerOptionStats]] = defaultdict(list)
+        option_records = (
+            AnswerOption.objects.filter(question__survey=survey)
+            .annotate(answers_count=answers_count)
+            .values("id", "question_id", "text", "answers_count")
+            .order_by("question_id", "position")
+        )
+        for record in option_records:
+            options_by_question[int(record["question_id"])].append(
+                AnswerOptionStats(
+                    option_id=int(record["id"]),
+                    text=str(record["text"]),
+                    answers_count=int(record["answers_count"]),
+                ),
+            )
+
         questions = []
-        for question in survey.questions.prefetch_related("answer_options"):
-            options = cls._option_stats(question)
-            top_option_id = cls._top_option_id(options)
+        for question_id, text in survey.questions.values_list("id", "text"):
+            options = options_by_question.get(question_id, [])
             questions.append(
                 QuestionStats(
-                    question_id=question.id,
-                    text=question.text,
+                    question_id=question_id,
+                    text=text,
                     options=options,
-                    top_option_id=top_option_id,
+                    top_option_id=cls._top_option_id(options),
                 ),
             )
         return questions
 
-    @staticmethod
-    def _option_stats(question: Question) -> list[AnswerOptionStats]:
-        option_records = (
-            question.answer_options.annotate(answers_count=Count("selected_answers"))
-            .values("id", "text", "answers_count")
-            .order_by("position")
-        )
-        return [
-            AnswerOptionStats(
-                option_id=int(record["id"]),
-                text=str(record["text"]),
-                answers_count=int(record["answers_count"]),
-            )
-            for record in option_records
-        ]
-
     @staticmethod
     def _top_option_id(options: list[AnswerOptionStats]) -> int | None:
         if not options:
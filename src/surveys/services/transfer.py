@@ -0,0 +1,248 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+from django.db import connection, transaction
+from django.db.backends.utils import CursorWrapper
+from psycopg import sql
+
+from src.surveys.models import Survey
+from src.surveys.services.partitions import SurveyPartitionService
+from src.surveys.services.rollups import SurveyRollupService
+
+FORMAT_VERSION: Final[int] = 1
+COPY_BLOCK_SIZE: Final[int] = 1024 * 1024
+
+# Таблица -> (колонки в дампе, выборка строк одного опроса)
+TABLES: Final[dict[str, tuple[tuple[str, ...], str]]] = {
+    "surveys": (
+        ("id", "created_at", "updated_at", "title", "author_id", "structure_version"),
+        "SELECT {columns} FROM surveys WHERE id = {survey_id}",
+    ),
+    "survey_questions": (
+        ("id", "created_at", "updated_at", "survey_id", "text", "position"),
+        "SELECT {columns} FROM survey_questions WHERE survey_id = {survey_id}",
+    ),
+    "survey_answer_options": (
+        ("id", "created_at", "updated_at", "question_id", "text", "position"),
+        (
+            "SELECT {columns} FROM survey_answer_options WHERE question_id IN "
+            "(SELECT id FROM survey_questions WHERE survey_id = {survey_id})"
+        ),
+    ),
+    "survey_runs": (
+        (
+            "id",
+            "created_at",
+            "updated_at",
+            "user_id",
+            "survey_id",
+            "started_at",
+            "finished_at",
+        ),
+        "SELECT {columns} FROM survey_runs WHERE survey_id = {survey_id}",
+    ),
+    "survey_answers": (
+        (
+            "id",
+            "created_at",
+            "updated_at",
+            "run_id",
+            "question_id",
+            "selected_option_id",
+        ),
+        (
+            "SELECT {columns} FROM survey_answers WHERE run_id IN "
+            "(SELECT id FROM survey_runs WHERE survey_id = {survey_id})"
+        ),
+    ),
+}
+
+# Перенос строк из staging-таблиц с новыми id (map_* — старый id -> новый)
+LOAD_STATEMENTS: Final[dict[str, str]] = {
+    "surveys": """
+    INSERT INTO surveys
+        (id, created_at, updated_at, title, author_id, structure_version)
+    SELECT m.new_id, s.created_at, s.updated_at, s.title,
+           COALESCE(%(author_id)s, s.author_id), s.structure_version
+    FROM staging_surveys AS s
+    JOIN map_surveys AS m ON m.old_id = s.id
+    """,
+    "survey_questions": """
+    INSERT INTO survey_questions
+        (id, created_at, updated_at, survey_id, text, position)
+    SELECT m.new_id, q.created_at, q.updated_at, ms.new_id, q.text, q.position
+    FROM staging_survey_questions AS q
+    JOIN map_survey_questions AS m ON m.old_id = q.id
+    JOIN map_surveys AS ms ON ms.old_id = q.survey_id
+    """,
+    "survey_answer_options": """
+    INSERT INTO survey_answer_options
+        (id, created_at, updated_at, question_id, text, position)
+    SELECT m.new_id, o.created_at, o.updated_at, mq.new_id, o.text, o.position
+    FROM staging_survey_answer_options AS o
+    JOIN map_survey_answer_options AS m ON m.old_id = o.id
+    JOIN map_survey_questions AS mq ON mq.old_id = o.question_id
+    """,
+    "survey_runs": """
+    INSERT INTO survey_runs
+        (id, created_at, updated_at, user_id, survey_id, started_at, finished_at,
+         answered_question_ids)
+    SELECT m.new_id, r.created_at, r.updated_at,
+           COALESCE(%(respondent_id)s, r.user_id), ms.new_id,
+           r.started_at, r.finished_at,
+           COALESCE(p.question_ids, '{}')
+    FROM staging_survey_runs AS r
+    JOIN map_survey_runs AS m ON m.old_id = r.id
+    JOIN map_surveys AS ms ON ms.old_id = r.survey_id
+    LEFT JOIN (
+        SELECT a.run_id, array_agg(mq.new_id ORDER BY a.id) AS question_ids
+        FROM staging_survey_answers AS a
+        JOIN map_survey_questions AS mq ON mq.old_id = a.question_id
+        GROUP BY a.run_id
+    ) AS p ON p.run_id = r.id
+    -- Все прогоны одного респондента не могут быть активными одновременно
+    WHERE %(respondent_id)s IS NULL OR r.finished_at IS NOT NULL
+    """,
+    "survey_answers": """
+    INSERT INTO survey_answers
+        (created_at, updated_at, run_id, run_created_at, question_id,
+         selected_option_id)
+    SELECT a.created_at, a.updated_at, mr.new_id, r.created_at, mq.new_id, mo.new_id
+    FROM staging_survey_answers AS a
+    JOIN staging_survey_runs AS r ON r.id = a.run_id
+    JOIN map_survey_runs AS mr ON mr.old_id = a.run_id
+    JOIN map_survey_questions AS mq ON mq.old_id = a.question_id
+    JOIN map_survey_answer_options AS mo ON mo.old_id = a.selected_option_id
+    -- Ответы пропущенных незавершённых прогонов тоже пропускаются
+    WHERE %(respondent_id)s IS NULL OR r.finished_at IS NOT NULL
+    """,
+}
+
+
+@dataclass(frozen=True)
+class TransferResult:
+    survey_id: int
+    rows: dict[str, int]
+
+
+class SurveyTransferService:
+    """Перенос опроса с прогонами и ответами между окружениями через COPY.
+
+    Дамп — каталог с CSV на таблицу и manifest.json. Загрузка идёт через
+    временные staging-таблицы, id выдаются заново из последовательностей.
+    """
+
+    @staticmethod
+    def dump(survey: Survey, directory: Path) -> TransferResult:
+        directory.mkdir(parents=True, exist_ok=True)
+        rows: dict[str, int] = {}
+        outermost = not connection.in_atomic_block
+        with transaction.atomic(), connection.cursor() as cursor:
+            if outermost:
+                # Один снимок на все таблицы: дамп согласован между собой
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            for table, (columns, query) in TABLES.items():
+                select = sql.SQL(query).format(
+                    columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                    survey_id=sql.Literal(survey.pk),
+                )
+                statement = sql.SQL(
+                    "COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                ).format(select)
+                with (
+                    (directory / f"{table}.csv").open("wb") as file,
+                    cursor.cursor.copy(statement) as copy,
+                ):
+                    for block in copy:
+                        file.write(block)
+                rows[table] = cursor.cursor.rowcount
+        manifest = {"version": FORMAT_VERSION, "survey_id": survey.pk, "rows": rows}
+        (directory / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        return TransferResult(survey_id=survey.pk, rows=rows)
+
+    @classmethod
+    @transaction.atomic
+    def load(
+        cls,
+        directory: Path,
+        *,
+        author_id: int | None = None,
+        respondent_id: int | None = None,
+    ) -> TransferResult:
+        """Загружает дамп как новый опрос.
+
+        author_id/respondent_id подменяют пользователей, которых нет в целевой
+        БД. При подмене респондента незавершённые прогоны пропускаются.
+        """
+        manifest = json.loads((directory / "manifest.json").read_text())
+        if manifest["version"] != FORMAT_VERSION:
+            msg = f"Unsupported dump version: {manifest['version']}"
+            raise ValueError(msg)
+
+        with connection.cursor() as cursor:
+            for table, (columns, _query) in TABLES.items():
+                cls._copy_to_staging(cursor, directory, table, columns)
+            cursor.execute(
+                "SELECT min(created_at), max(created_at) FROM staging_survey_runs",
+            )
+            oldest, newest = cursor.fetchone()
+            if oldest is not None:
+                SurveyPartitionService.ensure(start=oldest, end=newest)
+            # Число вставленных строк: пропущенные прогоны и их ответы не входят
+            rows = {}
+            for table, statement in LOAD_STATEMENTS.items():
+                cursor.execute(
+                    statement,
+                    {"author_id": author_id, "respondent_id": respondent_id},
+                )
+                rows[table] = cursor.rowcount
+            cursor.execute("SELECT new_id FROM map_surveys")
+            (survey_id,) = cursor.fetchone()
+
+        SurveyRollupService.rebuild(Survey.objects.get(pk=survey_id))
+        return TransferResult(survey_id=survey_id, rows=rows)
+
+    @staticmethod
+    def _copy_to_staging(
+        cursor: CursorWrapper,
+        directory: Path,
+        table: str,
+        columns: tuple[str, ...],
+    ) -> None:
+        staging = sql.Identifier(f"staging_{table}")
+        mapping = sql.Identifier(f"map_{table}")
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                "SELECT {columns} FROM {table} WITH NO DATA",
+            ).format(staging=staging, columns=column_list, table=sql.Identifier(table)),
+        )
+        copy_statement = sql.SQL(
+            "COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)",
+        ).format(staging, column_list)
+        with (
+            (directory / f"{table}.csv").open("rb") as file,
+            cursor.cursor.copy(copy_statement) as copy,
+        ):
+            while block := file.read(COPY_BLOCK_SIZE):
+                copy.write(block)
+        # Новые id берутся из последовательности целевой таблицы
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE {mapping} ON COMMIT DROP AS "
+                "SELECT id AS old_id, "
+                "nextval(pg_get_serial_sequence({table_name}, 'id')) AS new_id "
+                "FROM {staging}",
+            ).format(
+                mapping=mapping,
+                table_name=sql.Literal(table),
+                staging=staging,
+            ),
+        )
+        cursor.execute(
+            sql.SQL("CREATE UNIQUE INDEX ON {} (old_id)").format(mapping),
+        )
+        cursor.execute(sql.SQL("ANALYZE {}").format(staging))
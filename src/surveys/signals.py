@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from src.surveys.models import AnswerOptionRollup, SurveyRollup
+from src.users.models import User
+
+
+@receiver(pre_delete, sender=User)
+def subtract_deleted_user_from_rollups(instance: User, **_kwargs: Any) -> None:  # noqa: ANN401
+    # Прогоны и ответы удаляются каскадом без поштучных сигналов: счётчики
+    # статистики уменьшаются заранее, в транзакции удаления пользователя.
+    # subtract_user_runs блокирует счётчики опросов, поэтому идёт первым
+    SurveyRollup.subtract_user_runs(instance.pk)
+    AnswerOptionRollup.subtract_user_answers(instance.pk)
@@ -1,2 +1,1329 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Barrier, Event
+from typing import Any
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    connection,
+    connections,
+    transaction,
+)
+from django.test import (
+    AsyncClient,
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from src.common.db_routing import PIN_COOKIE, lag_monitor
+from src.common.testing import QueryBudgetTestCase, auth_headers
+from src.surveys.enums import StatsEngine
+from src.surveys.metrics import answers_submitted, runs_finished, runs_started
+from src.surveys.models import (
+    AnswerOptionRollup,
+    Survey,
+    SurveyActiveRun,
+    SurveyRollup,
+    SurveyRun,
+    UserAnswer,
+)
+from src.surveys.serializers import AnswerResultSerializer, NextQuestionSerializer
+from src.surveys.serializers.run import render_answer_result, render_next_question
+from src.surveys.services import (
+    SurveyPartitionService,
+    SurveyPlanService,
+    SurveyRollupService,
+    SurveyRunService,
+    SurveyStatsService,
+)
+from src.surveys.services.benchmark import (
+    ConcurrencyBenchmark,
+    EndpointBenchmark,
+    compare_reports,
+)
+from src.surveys.services.dataset import DatasetGenerator, DatasetSpec
+from src.surveys.services.partitions import month_start, partition_name
+from src.surveys.services.plan import plan_cache
+from src.surveys.services.query_plans import (
+    HOT_QUERIES,
+    collect_samples,
+    compare_plans,
+    explain_hot_queries,
+    summarize,
+)
+from src.surveys.services.transfer import SurveyTransferService
+from src.users.authentication import VersionedAccessToken
+from src.users.models import User
+
+
+def make_survey(author: User, *, questions: int, options: int = 3) -> Survey:
+    survey = Survey.objects.create(title=f"{questions} questions", author=author)
+    for question_position in range(1, questions + 1):
+        question = survey.questions.create(
+            text=f"Вопрос {question_position}",
+            position=question_position,
+        )
+        for option_position in range(1, options + 1):
+            question.answer_options.create(
+                text=f"Вариант {option_position}",
+                position=option_position,
+            )
+    return survey
+
+
+def answer_all(survey: Survey, user: User) -> None:
+    plan = SurveyPlanService.get(survey)
+    run = SurveyRunService.get_or_create_active_run(survey=survey, user=user)
+    for question in survey.questions.prefetch_related("answer_options"):
+        option = question.answer_options.all()[question.position % 2]
+        SurveyRunService.create_answer(
+            run=run,
+            plan=plan,
+            question_id=question.id,
+            option_id=option.id,
+        )
+    run.mark_finished()
+
+
+class SurveyStatsServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+
+    def count_queries(self, survey: Survey, engine: StatsEngine) -> int:
+        with CaptureQueriesContext(connection) as context:
+            SurveyStatsService.collect(survey, engine=engine)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_questions(self) -> None:
+        small = make_survey(self.author, questions=2)
+        large = make_survey(self.author, questions=40)
+        answer_all(small, self.respondent)
+        answer_all(large, self.respondent)
+
+        for engine in StatsEngine:
+            with self.subTest(engine=engine):
+                small_count = self.count_queries(small, engine)
+                self.assertEqual(small_count, self.count_queries(large, engine))
+                self.assertLessEqual(small_count, 3)
+
+    def test_engines_agree(self) -> None:
+        survey = make_survey(self.author, questions=5)
+        answer_all(survey, self.respondent)
+
+        rollup = SurveyStatsService.collect(survey, engine=StatsEngine.ROLLUP)
+        aggregate = SurveyStatsService.collect(survey, engine=StatsEngine.AGGREGATE)
+
+        self.assertEqual(rollup.questions, aggregate.questions)
+        self.assertEqual(rollup.total_runs, 1)
+        self.assertEqual(aggregate.total_runs, 1)
+        self.assertEqual(
+            [question.top_option_id for question in rollup.questions],
+            [
+                question.answer_options.all()[question.position % 2].id
+                for question in survey.questions.all()
+            ],
+        )
+
+
+class SurveyPlanServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+
+    def test_plan_is_cached_until_structure_changes(self) -> None:
+        survey = make_survey(self.author, questions=3)
+        plan = SurveyPlanService.get(survey)
+        self.assertEqual(
+            plan.question_ids,
+            tuple(survey.questions.values_list("id", flat=True)),
+        )
+
+        with self.assertNumQueries(0):
+            self.assertIs(SurveyPlanService.get(survey), plan)
+
+        SurveyPlanService.invalidate(survey.id)
+        survey.refresh_from_db()
+        self.assertIsNot(SurveyPlanService.get(survey), plan)
+        self.assertEqual(plan_cache.stats().hits, 1)
+        self.assertEqual(plan_cache.stats().misses, 2)
+
+    def test_next_question_from_plan(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        plan = SurveyPlanService.get(survey)
+        first, second = plan.question_ids
+
+        self.assertEqual(plan.next_question_id(set()), first)
+        self.assertEqual(plan.next_question_id({first}), second)
+        self.assertIsNone(plan.next_question_id({first, second}))
+
+    def test_fragments_match_serializer_output(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        plan = SurveyPlanService.get(survey)
+        question = survey.questions.prefetch_related("answer_options").first()
+        renderer = JSONRenderer()
+
+        self.assertEqual(
+            render_next_question(run_id=7, question=plan.fragment(question.id)),
+            renderer.render(
+                NextQuestionSerializer({"run_id": 7, "question": question}).data,
+            ),
+        )
+        self.assertEqual(
+            render_answer_result(run_id=7, question=plan.fragment(question.id)),
+            renderer.render(
+                AnswerResultSerializer(
+                    {"run_id": 7, "completed": False, "question": question},
+                ).data,
+            ),
+        )
+        self.assertEqual(
+            render_answer_result(run_id=7, question=None),
+            renderer.render(
+                AnswerResultSerializer(
+                    {"run_id": 7, "completed": True, "question": None},
+                ).data,
+            ),
+        )
+
+
+class SurveyRunServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+
+    def test_progress_cursor_tracks_answers(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        plan = SurveyPlanService.get(survey)
+        first, second = plan.question_ids
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+
+        # Ответ не по порядку: курсор хранит множество, а не позицию
+        SurveyRunService.create_answer(
+            run=run,
+            plan=plan,
+            question_id=second,
+            option_id=min(plan.option_ids[second]),
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(SurveyRunService.next_question_id(run, plan), first)
+
+        SurveyRunService.create_answer(
+            run=run,
+            plan=plan,
+            question_id=first,
+            option_id=min(plan.option_ids[first]),
+        )
+        run.refresh_from_db()
+        self.assertEqual(run.answered_question_ids, [second, first])
+        self.assertTrue(SurveyRunService.is_completed(run, plan))
+
+    def test_metrics_count_committed_events(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        before = (
+            runs_started.value(),
+            answers_submitted.value(),
+            runs_finished.value(),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            answer_all(survey, self.respondent)
+
+        self.assertEqual(
+            (
+                runs_started.value(),
+                answers_submitted.value(),
+                runs_finished.value(),
+            ),
+            (before[0] + 1, before[1] + 2, before[2] + 1),
+        )
+
+    def test_batch_is_validated_as_a_whole(self) -> None:
+        survey = make_survey(self.author, questions=3)
+        plan = SurveyPlanService.get(survey)
+        first, second, third = plan.question_ids
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+
+        with self.assertRaises(ValidationError) as context:
+            SurveyRunService.create_answers(
+                run=run,
+                plan=plan,
+                answers=[
+                    (first, min(plan.option_ids[first])),
+                    (first, min(plan.option_ids[first])),
+                    (second, min(plan.option_ids[third])),
+                ],
+            )
+        errors = context.exception.detail["answers"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(set(errors[1]), {"question_id"})
+        self.assertEqual(set(errors[2]), {"option_id"})
+        self.assertFalse(run.answers.exists())
+
+        # SAVEPOINT, вставка, счётчики, курсор, RELEASE
+        with self.assertNumQueries(5):
+            SurveyRunService.create_answers(
+                run=run,
+                plan=plan,
+                answers=[
+                    (question_id, min(plan.option_ids[question_id]))
+                    for question_id in plan.question_ids
+                ],
+            )
+        self.assertEqual(run.answers.count(), 3)
+        self.assertTrue(SurveyRunService.is_completed(run, plan))
+        self.assertEqual(SurveyRollupService.verify(survey), [])
+
+
+class SurveyRollupServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.survey = make_survey(self.author, questions=3)
+        answer_all(self.survey, self.respondent)
+
+    def test_deleting_user_keeps_rollups_in_sync(self) -> None:
+        leaving = User.objects.create_user(username="leaving")
+        answer_all(self.survey, leaving)
+        # Незавершённый прогон: его ответ тоже учтён в счётчике варианта
+        other = make_survey(self.author, questions=2)
+        plan = SurveyPlanService.get(other)
+        question = other.questions.order_by("position").first()
+        SurveyRunService.create_answer(
+            run=SurveyRunService.get_or_create_active_run(survey=other, user=leaving),
+            plan=plan,
+            question_id=question.id,
+            option_id=question.answer_options.first().id,
+        )
+
+        leaving.delete()
+
+        self.assertEqual(SurveyRollupService.verify(self.survey), [])
+        self.assertEqual(SurveyRollupService.verify(other), [])
+        self.assertEqual(SurveyRollupService.stored(self.survey).finished_runs, 1)
+
+    def test_rebuild_command_repairs_drift(self) -> None:
+        SurveyRollup.objects.filter(survey=self.survey).update(finished_runs=5)
+        AnswerOptionRollup.objects.filter(
+            option__question__survey=self.survey,
+        ).first().delete()
+        self.assertEqual(len(SurveyRollupService.verify(self.survey)), 2)
+
+        with self.assertRaisesMessage(CommandError, "1 surveys have stale rollups"):
+            call_command(
+                "rebuild_stats_rollups",
+                "--verify-only",
+                stdout=StringIO(),
+            )
+
+        output = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                "rebuild_stats_rollups",
+                "--survey",
+                str(self.survey.id),
+                stdout=output,
+            )
+
+        self.assertIn(f"Survey {self.survey.id}: rebuilt", output.getvalue())
+        self.assertTrue(
+            any(
+                query["sql"].startswith("SELECT pg_advisory_xact_lock(")
+                for query in context.captured_queries
+            ),
+        )
+        self.assertEqual(SurveyRollupService.verify(self.survey), [])
+        self.assertEqual(SurveyRollupService.stored(self.survey).finished_runs, 1)
+
+
+@override_settings(SURVEY_EXPORT_SETTLE_SECONDS=0)
+class SurveyExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondents = [
+            User.objects.create_user(username=f"respondent-{number}")
+            for number in range(3)
+        ]
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.survey = make_survey(self.author, questions=2)
+        self.client = Client(headers=auth_headers(self.author))
+
+    def export(self, export_format: str, **params: object) -> str:
+        response = self.client.get(
+            f"/api/v1/surveys/{self.survey.id}/export/{export_format}",
+            params,
+        )
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def exported_runs(self, **params: object) -> list[dict[str, Any]]:
+        return [
+            json.loads(line) for line in self.export("ndjson", **params).splitlines()
+        ]
+
+    def test_csv_and_ndjson_have_a_row_per_finished_run(self) -> None:
+        answer_all(self.survey, self.respondents[0])
+        SurveyRunService.get_or_create_active_run(
+            survey=self.survey,
+            user=self.respondents[1],
+        )
+        run = SurveyRun.objects.get(survey=self.survey, finished_at__isnull=False)
+        answers = dict(run.answers.values_list("question_id", "selected_option_id"))
+        question_ids = list(
+            self.survey.questions.order_by("position").values_list("id", flat=True),
+        )
+
+        header, *rows = csv.reader(StringIO(self.export("csv")))
+        self.assertEqual(
+            header,
+            [
+                "run_id",
+                "user_id",
+                "started_at",
+                "finished_at",
+                *(f"question_{question_id}" for question_id in question_ids),
+            ],
+        )
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:2], [str(run.id), str(self.respondents[0].id)])
+        self.assertEqual(
+            rows[0][4:],
+            [str(answers[question_id]) for question_id in question_ids],
+        )
+
+        (exported,) = self.exported_runs()
+        self.assertEqual(exported["run_id"], run.id)
+        self.assertEqual(
+            exported["answers"],
+            {str(question_id): option for question_id, option in answers.items()},
+        )
+
+    def test_since_cursor_keeps_ties_and_runs_without_answers(self) -> None:
+        for respondent in self.respondents[:2]:
+            answer_all(self.survey, respondent)
+        # Завершённый прогон без ответов (как у опроса без вопросов)
+        SurveyRunService.get_or_create_active_run(
+            survey=self.survey,
+            user=self.respondents[2],
+        ).mark_finished()
+        finished_at = timezone.now() - timedelta(minutes=1)
+        SurveyRun.objects.filter(survey=self.survey).update(finished_at=finished_at)
+        run_ids = list(
+            SurveyRun.objects.filter(survey=self.survey)
+            .order_by("id")
+            .values_list("id", flat=True),
+        )
+
+        exported = self.exported_runs()
+        self.assertEqual([run["run_id"] for run in exported], run_ids)
+        self.assertEqual(exported[-1]["answers"], {})
+
+        since = finished_at.isoformat()
+        after_first = self.exported_runs(since=since, since_run_id=run_ids[0])
+        self.assertEqual([run["run_id"] for run in after_first], run_ids[1:])
+        # Без run_id курсор не теряет прогоны с тем же finished_at
+        self.assertEqual(len(self.exported_runs(since=since)), len(run_ids))
+
+    @override_settings(SURVEY_EXPORT_SETTLE_SECONDS=60)
+    def test_recent_runs_wait_for_settle_window(self) -> None:
+        answer_all(self.survey, self.respondents[0])
+        self.assertEqual(self.exported_runs(), [])
+
+        SurveyRun.objects.filter(survey=self.survey).update(
+            finished_at=timezone.now() - timedelta(minutes=2),
+        )
+        self.assertEqual(len(self.exported_runs()), 1)
+
+    def test_access_and_parameters(self) -> None:
+        url = f"/api/v1/surveys/{self.survey.id}/export"
+        respondent = Client(headers=auth_headers(self.respondents[0]))
+        self.assertEqual(respondent.get(f"{url}/csv").status_code, 403)
+        self.assertEqual(Client().get(f"{url}/csv").status_code, 401)
+        self.assertEqual(self.client.get(f"{url}/xml").status_code, 404)
+        response = self.client.get(f"{url}/csv", {"since_run_id": 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("since", response.json())
+
+
+class SurveyTransferServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+        cls.other = User.objects.create_user(username="other")
+
+    def test_dump_and_load_round_trip(self) -> None:
+        survey = make_survey(self.author, questions=3)
+        answer_all(survey, self.respondent)
+        # Незавершённый прогон с ответом: при подмене респондента он и его
+        # ответ не загружаются
+        active = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.other,
+        )
+        question = survey.questions.order_by("position").first()
+        SurveyRunService.create_answer(
+            run=active,
+            plan=SurveyPlanService.get(survey),
+            question_id=question.id,
+            option_id=question.answer_options.first().id,
+        )
+
+        with TemporaryDirectory() as directory:
+            dumped = SurveyTransferService.dump(survey, Path(directory))
+            loaded = SurveyTransferService.load(
+                Path(directory),
+                respondent_id=self.other.id,
+            )
+
+        self.assertEqual(dumped.rows["survey_runs"], 2)
+        self.assertEqual(dumped.rows["survey_answers"], 4)
+        self.assertEqual(
+            loaded.rows,
+            {**dumped.rows, "survey_runs": 1, "survey_answers": 3},
+        )
+        copy = Survey.objects.get(pk=loaded.survey_id)
+        self.assertNotEqual(copy.id, survey.id)
+        self.assertEqual(copy.author, self.author)
+        # Незавершённый прогон пропущен: у респондента остался бы второй активный
+        run = copy.runs.get()
+        self.assertEqual(run.user, self.other)
+        self.assertEqual(
+            run.answered_question_ids,
+            list(copy.questions.order_by("position").values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            set(run.answers.values_list("selected_option__question_id", flat=True)),
+            set(run.answered_question_ids),
+        )
+        self.assertEqual(SurveyRollupService.verify(copy), [])
+
+
+class DatasetGeneratorTests(TestCase):
+    SPEC = DatasetSpec(
+        authors=2,
+        respondents=20,
+        surveys=3,
+        questions=4,
+        options=3,
+        runs=120,
+        partial_ratio=0.3,
+        runs_chunk_size=25,
+    )
+
+    def generate(self) -> list[tuple[int, int]]:
+        result = DatasetGenerator(self.SPEC).generate()
+        self.assertEqual(result.runs, self.SPEC.runs)
+        surveys = Survey.objects.order_by("-id")[: self.SPEC.surveys]
+        return list(
+            UserAnswer.objects.filter(run__survey__in=surveys)
+            .order_by("run_id", "question__position")
+            .values_list("question__position", "selected_option__position"),
+        )
+
+    def test_dataset_is_consistent_and_reproducible(self) -> None:
+        first = self.generate()
+        runs = SurveyRun.objects.all()
+        self.assertEqual(runs.count(), self.SPEC.runs)
+        self.assertTrue(runs.filter(finished_at__isnull=True).exists())
+        for run in runs.filter(finished_at__isnull=False)[:10]:
+            self.assertEqual(len(run.answered_question_ids), self.SPEC.questions)
+        for survey in Survey.objects.all():
+            self.assertEqual(SurveyRollupService.verify(survey), [])
+
+        # id и время отличаются, выбор вариантов по позициям совпадает
+        self.assertEqual(self.generate(), first)
+
+
+class SurveyPartitionServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+
+    @staticmethod
+    def partitions_of(table: str, column: str, value: int) -> set[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT tableoid::regclass::text FROM {table} "  # noqa: S608
+                f"WHERE {column} = %s",
+                [value],
+            )
+            return {name for (name,) in cursor.fetchall()}
+
+    def test_answers_follow_run_partition(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        answer_all(survey, self.respondent)
+        run = survey.runs.get()
+        month = month_start(run.created_at)
+
+        self.assertEqual(
+            self.partitions_of("survey_runs", "id", run.id),
+            {partition_name("survey_runs", month)},
+        )
+        self.assertEqual(
+            self.partitions_of("survey_answers", "run_id", run.id),
+            {partition_name("survey_answers", month)},
+        )
+        self.assertEqual(
+            set(run.answers.values_list("run_created_at", flat=True)),
+            {run.created_at},
+        )
+
+    def test_one_active_run_per_user(self) -> None:
+        survey = make_survey(self.author, questions=1)
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SurveyRun.objects.create(survey=survey, user=self.respondent)
+        self.assertEqual(
+            SurveyRunService.get_or_create_active_run(
+                survey=survey,
+                user=self.respondent,
+            ),
+            run,
+        )
+
+        run.mark_finished()
+        second = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+        self.assertNotEqual(second.pk, run.pk)
+        self.assertEqual(
+            list(SurveyActiveRun.objects.values_list("run_id", flat=True)),
+            [second.pk],
+        )
+
+    def test_rows_in_default_partition_move_to_new_month(self) -> None:
+        march = datetime(2020, 3, 1, tzinfo=UTC)
+        survey = make_survey(self.author, questions=2)
+        plan = SurveyPlanService.get(survey)
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+        question = survey.questions.order_by("position").first()
+        SurveyRunService.create_answer(
+            run=run,
+            plan=plan,
+            question_id=question.id,
+            option_id=question.answer_options.first().id,
+        )
+        # Прогон марта 2020 без секции — строки лежат в секции по умолчанию
+        SurveyRun.objects.filter(pk=run.pk).update(created_at=march)
+        UserAnswer.objects.filter(run_id=run.pk).update(run_created_at=march)
+        self.assertEqual(
+            self.partitions_of("survey_runs", "id", run.pk),
+            {"survey_runs_default"},
+        )
+
+        self.assertEqual(
+            SurveyPartitionService.ensure(start=march, end=march),
+            ["survey_runs_p2020_03", "survey_answers_p2020_03"],
+        )
+        self.assertEqual(
+            self.partitions_of("survey_runs", "id", run.pk),
+            {"survey_runs_p2020_03"},
+        )
+        self.assertEqual(
+            self.partitions_of("survey_answers", "run_id", run.pk),
+            {"survey_answers_p2020_03"},
+        )
+        self.assertEqual(
+            list(SurveyActiveRun.objects.values_list("run_id", flat=True)),
+            [run.pk],
+        )
+
+    def test_old_months_are_detached(self) -> None:
+        january = datetime(2020, 1, 1, tzinfo=UTC)
+        february = datetime(2020, 2, 1, tzinfo=UTC)
+        self.assertEqual(
+            SurveyPartitionService.ensure(start=january, end=february),
+            [
+                "survey_runs_p2020_01",
+                "survey_answers_p2020_01",
+                "survey_runs_p2020_02",
+                "survey_answers_p2020_02",
+            ],
+        )
+        self.assertEqual(SurveyPartitionService.ensure(start=january, end=february), [])
+        survey = make_survey(self.author, questions=1)
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=self.respondent,
+        )
+        SurveyRun.objects.filter(pk=run.pk).update(created_at=january)
+        with connection.cursor() as cursor:
+            # DDL недоступен, пока в транзакции есть отложенные проверки FK
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        self.assertEqual(
+            SurveyPartitionService.detach(before=february),
+            ["survey_answers_p2020_01", "survey_runs_p2020_01"],
+        )
+        self.assertFalse(SurveyRun.objects.filter(pk=run.pk).exists())
+        self.assertEqual(
+            self.partitions_of("survey_runs_p2020_01", "id", run.pk),
+            {
+                "survey_runs_p2020_01",
+            },
+        )
+        # Прогон из архива больше не считается активным
+        self.assertNotEqual(
+            SurveyRunService.get_or_create_active_run(
+                survey=survey,
+                user=self.respondent,
+            ).pk,
+            run.pk,
+        )
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+        cls.respondent.identities.create(provider="email", value="r@example.com")
+
+    def test_every_hot_query_is_explained(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        answer_all(survey, self.respondent)
+        SurveyRunService.get_or_create_active_run(survey=survey, user=self.author)
+
+        reports = explain_hot_queries(collect_samples(survey.id))
+
+        self.assertEqual(
+            [report.name for report in reports],
+            [shape.name for shape in HOT_QUERIES],
+        )
+        for report in reports:
+            self.assertEqual(report.seq_scans, [])
+
+    def test_seq_scans_and_regressions_are_reported(self) -> None:
+        plan = {
+            "Planning Time": 0.1,
+            "Execution Time": 30.0,
+            "Plan": {
+                "Node Type": "Seq Scan",
+                "Relation Name": "survey_answers_p2026_10",
+                "Actual Rows": 10,
+                "Actual Loops": 1,
+                "Rows Removed by Filter": 50_000,
+                "Shared Hit Blocks": 900,
+                "Shared Read Blocks": 100,
+            },
+        }
+        report = summarize("export_page", plan)
+        self.assertEqual(report.seq_scans, ["survey_answers_p2026_10"])
+        self.assertEqual(report.buffers, 1000)
+
+        def stats(buffers: int, ms: float, seq_scans: list[str]) -> dict:
+            query = {"buffers": buffers, "execution_ms": ms, "seq_scans": seq_scans}
+            return {"queries": {"export_page": query}}
+
+        baseline = stats(100, 10.0, [])
+        self.assertEqual(
+            compare_plans(stats(110, 10.5, []), baseline, threshold=0.5),
+            [],
+        )
+        self.assertEqual(
+            len(compare_plans(stats(1000, 30.0, ["x"]), baseline, threshold=0.5)),
+            3,
+        )
+
+
+class EndpointBenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+
+    def test_reports_every_endpoint_and_flags_regressions(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        endpoints = EndpointBenchmark(requests=3, warmup=1).run(survey)
+
+        self.assertEqual(
+            set(endpoints),
+            {"token_obtain", "next_question", "answer_submit", "survey_stats"},
+        )
+        for stats in endpoints.values():
+            self.assertEqual(stats.requests, 3)
+            self.assertLessEqual(stats.p50_ms, stats.p99_ms)
+
+        def report(p95_ms: float, queries: int) -> dict[str, object]:
+            stats = {"p95_ms": p95_ms, "queries": queries}
+            return {"stages": [{"runs": 10, "endpoints": {"survey_stats": stats}}]}
+
+        baseline = report(p95_ms=10, queries=3)
+        self.assertEqual(compare_reports(report(11, 3), baseline, threshold=0.2), [])
+        self.assertEqual(
+            len(compare_reports(report(13, 4), baseline, threshold=0.2)),
+            2,
+        )
+
+    def test_concurrent_respondents_through_both_view_kinds(self) -> None:
+        survey = make_survey(self.author, questions=2)
+        modes = ConcurrencyBenchmark(respondents=4, rounds=3).run(survey)
+
+        self.assertEqual(set(modes), {"sync", "async"})
+        for stats in modes.values():
+            self.assertEqual(stats.requests, 4 * 3 * 2)
+            self.assertLessEqual(stats.p50_ms, stats.p99_ms)
+        # Режимы продолжают прогоны друг друга: шесть ответов респондента
+        # на опрос из двух вопросов — три завершённых прогона
+        runs = SurveyRun.objects.filter(survey=survey)
+        self.assertEqual(runs.count(), 12)
+        self.assertFalse(runs.filter(finished_at__isnull=True).exists())
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.surveys = [make_survey(cls.author, questions=1) for _ in range(5)]
+        # Одинаковый created_at: порядок внутри страниц держится на id
+        Survey.objects.filter(author=cls.author).update(
+            created_at=datetime(2025, 10, 20, tzinfo=UTC),
+        )
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.client = Client(
+            headers=auth_headers(self.author),
+        )
+
+    def walk(self, url: str) -> list[list[int]]:
+        """id строк по страницам; страницы читаются по ссылкам next."""
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries.captured_queries),
+            )
+            body = response.json()
+            pages.append([row["id"] for row in body["results"]])
+            url = body["next"]
+        return pages
+
+    def test_survey_list_pages_by_created_at_and_id(self) -> None:
+        pages = self.walk("/api/v1/surveys/list?page_size=2")
+
+        expected = sorted((survey.id for survey in self.surveys), reverse=True)
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_invalid_cursor_is_not_found(self) -> None:
+        response = self.client.get("/api/v1/surveys/list?cursor=broken")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_run_feed_returns_runs_with_answers(self) -> None:
+        survey = self.surveys[0]
+        for number in range(3):
+            answer_all(survey, User.objects.create_user(username=f"user-{number}"))
+        runs = list(survey.runs.order_by("-created_at", "-id"))
+
+        pages = self.walk(f"/api/v1/surveys/{survey.id}/feed?page_size=2")
+
+        self.assertEqual(pages, [[run.id for run in runs[:2]], [runs[2].id]])
+        page = self.client.get(f"/api/v1/surveys/{survey.id}/feed").json()
+        question = survey.questions.get()
+        self.assertEqual(
+            [answer["question_id"] for answer in page["results"][0]["answers"]],
+            [question.id],
+        )
+
+    def test_run_feed_is_only_for_author(self) -> None:
+        stranger = User.objects.create_user(username="stranger")
+        client = Client(
+            headers=auth_headers(stranger),
+        )
+
+        response = client.get(f"/api/v1/surveys/{self.surveys[0].id}/feed")
+
+        self.assertEqual(response.status_code, 403)
+
+
+class ConcurrentAnswerTests(TransactionTestCase):
+    THREADS = 16
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.respondent = User.objects.create_user(username="respondent")
+        self.survey = make_survey(self.author, questions=2)
+
+    def test_double_taps_store_exactly_one_answer(self) -> None:
+        plan = SurveyPlanService.get(self.survey)
+        question_id = plan.question_ids[0]
+        option_id = min(plan.option_ids[question_id])
+        run = SurveyRunService.get_or_create_active_run(
+            survey=self.survey,
+            user=self.respondent,
+        )
+        token = VersionedAccessToken.for_user(self.respondent)
+        barrier = Barrier(self.THREADS)
+
+        def submit() -> int:
+            client = Client(headers={"Authorization": f"Bearer {token}"})
+            try:
+                barrier.wait()
+                response = client.post(
+                    f"/api/v1/surveys/{self.survey.id}/runs/answer",
+                    {"question_id": question_id, "option_id": option_id},
+                    content_type="application/json",
+                )
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            statuses = list(executor.map(lambda _: submit(), range(self.THREADS)))
+
+        self.assertEqual(sorted(set(statuses)), [200, 400])
+        self.assertEqual(statuses.count(200), 1)
+        self.assertEqual(UserAnswer.objects.filter(run=run).count(), 1)
+        run.refresh_from_db()
+        self.assertEqual(run.answered_question_ids, [question_id])
+        self.assertEqual(SurveyRollupService.verify(self.survey), [])
+
+
+class RollupLockTests(TransactionTestCase):
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.respondent = User.objects.create_user(username="respondent")
+
+    def answer_first(self, survey: Survey) -> None:
+        plan = SurveyPlanService.get(survey)
+        question_id = plan.question_ids[0]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '200ms'")
+            SurveyRunService.create_answer(
+                run=SurveyRunService.get_or_create_active_run(
+                    survey=survey,
+                    user=self.respondent,
+                ),
+                plan=plan,
+                question_id=question_id,
+                option_id=min(plan.option_ids[question_id]),
+            )
+
+    def finish_run(self, survey: Survey) -> None:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '200ms'")
+            SurveyRunService.get_or_create_active_run(
+                survey=survey,
+                user=self.respondent,
+            ).mark_finished()
+
+    def test_rebuild_blocks_only_its_survey(self) -> None:
+        rebuilt = make_survey(self.author, questions=1)
+        other = make_survey(self.author, questions=1)
+        # Пересборка в другом соединении держит блокировку до конца транзакции
+        rebuilding = Event()
+        release = Event()
+
+        def rebuild() -> None:
+            try:
+                with transaction.atomic():
+                    SurveyRollupService.rebuild(rebuilt)
+                    rebuilding.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(rebuild)
+            self.assertTrue(rebuilding.wait(timeout=10))
+            try:
+                self.answer_first(other)
+                self.finish_run(other)
+                with self.assertRaises(OperationalError):
+                    self.answer_first(rebuilt)
+                with self.assertRaises(OperationalError):
+                    self.finish_run(rebuilt)
+            finally:
+                release.set()
+            future.result()
+
+        self.answer_first(rebuilt)
+        self.finish_run(rebuilt)
+        self.assertEqual(SurveyRollupService.verify(rebuilt), [])
+        self.assertEqual(SurveyRollupService.verify(other), [])
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "DB_REPLICA_URLS is not configured")
+class ReplicaReadTests(TransactionTestCase):
+    # Реплика в тестах — зеркало default, поэтому нужны закоммиченные данные
+    databases = "__all__"
+
+    def setUp(self) -> None:
+        cache.clear()
+        plan_cache.clear()
+        lag_monitor.clear()
+        self.author = User.objects.create_user(username="author")
+        self.respondent = User.objects.create_user(username="respondent")
+        self.survey = make_survey(self.author, questions=2)
+        answer_all(self.survey, self.respondent)
+        self.client = Client(
+            headers=auth_headers(self.author),
+        )
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        # Пул реплики держит соединения к тестовой БД и не даст её удалить
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            connections[alias].close_pool()
+        super().tearDownClass()
+
+    def replica_queries(self, url: str) -> int:
+        with CaptureQueriesContext(self.replica) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_reads_go_to_replica_until_author_writes(self) -> None:
+        stats_url = f"/api/v1/surveys/{self.survey.id}/stats"
+        export_url = f"/api/v1/surveys/{self.survey.id}/export/ndjson"
+        self.assertGreater(self.replica_queries(stats_url), 0)
+        self.assertGreater(self.replica_queries(export_url), 0)
+
+        response = self.client.patch(
+            f"/api/v1/surveys/{self.survey.id}",
+            {"title": "Новое название"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.replica_queries(stats_url), 0)
+        self.assertEqual(self.replica_queries(export_url), 0)
+
+    def test_pin_cookie_reaches_other_workers(self) -> None:
+        stats_url = f"/api/v1/surveys/{self.survey.id}/stats"
+        response = self.client.patch(
+            f"/api/v1/surveys/{self.survey.id}",
+            {"title": "Новое название"},
+            content_type="application/json",
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        # Следующий запрос попал в другой процесс: кэш пуст, cookie пришла
+        cache.clear()
+        self.assertEqual(self.replica_queries(stats_url), 0)
+        # Чужая подпись не закрепляет
+        self.client.cookies[PIN_COOKIE] = str(self.author.pk)
+        self.assertGreater(self.replica_queries(stats_url), 0)
+
+    @override_settings(SINGLE_PROCESS=True)
+    def test_shared_cache_pins_clients_without_cookies(self) -> None:
+        self.client.patch(
+            f"/api/v1/surveys/{self.survey.id}",
+            {"title": "Новое название"},
+            content_type="application/json",
+        )
+        self.client.cookies.clear()
+
+        queries = self.replica_queries(f"/api/v1/surveys/{self.survey.id}/stats")
+        self.assertEqual(queries, 0)
+
+    def test_lagging_replica_is_skipped(self) -> None:
+        with patch.object(lag_monitor, "_measure", return_value=float("inf")):
+            queries = self.replica_queries(f"/api/v1/surveys/{self.survey.id}/stats")
+        self.assertEqual(queries, 0)
+
+
+class AsyncRunViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.author = User.objects.create_user(username="author")
+        cls.respondent = User.objects.create_user(username="respondent")
+        cls.survey = make_survey(cls.author, questions=2)
+
+    def setUp(self) -> None:
+        plan_cache.clear()
+        self.run_url = f"/api/v1/surveys/{self.survey.id}/runs"
+        # Заголовки AsyncClient(headers=...) в ASGI-scope попадают с префиксом
+        # HTTP_, поэтому передаются в каждый запрос
+        self.headers = auth_headers(self.respondent)
+
+    async def test_async_views_answer_like_sync_views(self) -> None:
+        response = await self.async_client.get(
+            f"{self.run_url}/async/next-question",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        question = response.json()["question"]
+        plan = await SurveyPlanService.aget(self.survey)
+        self.assertEqual(
+            response.content,
+            render_next_question(
+                run_id=response.json()["run_id"],
+                question=plan.fragment(question["id"]),
+            ),
+        )
+
+        for question_id in plan.question_ids:
+            response = await self.async_client.post(
+                f"{self.run_url}/async/answer",
+                {
+                    "question_id": question_id,
+                    "option_id": min(plan.option_ids[question_id]),
+                },
+                content_type="application/json",
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["completed"])
+
+        run = await SurveyRun.objects.aget(pk=response.json()["run_id"])
+        self.assertTrue(run.is_finished)
+        self.assertEqual(run.answered_question_ids, list(plan.question_ids))
+        self.assertEqual(
+            (
+                await self.async_client.get(
+                    f"{self.run_url}/async/next-question",
+                    headers=self.headers,
+                )
+            ).status_code,
+            200,
+        )
+
+    async def test_errors_follow_drf_rules(self) -> None:
+        plan = await SurveyPlanService.aget(self.survey)
+        question_id = plan.question_ids[0]
+        answer_url = f"{self.run_url}/async/answer"
+
+        anonymous = await AsyncClient().get(f"{self.run_url}/async/next-question")
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertIn("WWW-Authenticate", anonymous)
+        invalid = await self.async_client.post(
+            answer_url,
+            {},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn("question_id", invalid.json())
+        foreign = await self.async_client.post(
+            answer_url,
+            {"question_id": question_id, "option_id": 0},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(foreign.status_code, 404)
+        missing = await self.async_client.get(
+            "/api/v1/surveys/0/runs/async/next-question",
+            headers=self.headers,
+        )
+        self.assertEqual(missing.status_code, 404)
+
+        answer = {
+            "question_id": question_id,
+            "option_id": min(plan.option_ids[question_id]),
+        }
+        await self.async_client.post(
+            answer_url,
+            answer,
+            content_type="application/json",
+            headers=self.headers,
+        )
+        repeated = await self.async_client.post(
+            answer_url,
+            answer,
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(repeated.status_code, 400)
+
+    async def test_perf_middleware_counts_async_queries(self) -> None:
+        response = await self.async_client.get(
+            f"{self.run_url}/async/next-question",
+            headers=self.headers,
+        )
+
+        timing = response["Server-Timing"]
+        queries = int(timing.split('desc="')[1].split(" ")[0])
+        # Опрос, план (промах кэша: вопросы и варианты) и прогон
+        self.assertGreaterEqual(queries, 4)
+
+
+class SurveyViewQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self) -> None:
+        plan_cache.clear()
+
+    def exercise(self, dataset: str, survey: Survey) -> dict[str, int]:
+        """Проходит по всем view опросов, возвращает число запросов по шагам."""
+        author = survey.author
+        respondent = User.objects.create_user(username=f"{dataset}-respondent")
+        survey_url = f"/api/v1/surveys/{survey.id}"
+        counts: dict[str, int] = {}
+
+        def call(step: str, method: str, url: str, **kwargs: object) -> object:
+            kwargs.setdefault("user", author)
+            response, counts[step] = self.request_with_budget(
+                method,
+                url,
+                dataset=dataset,
+                **kwargs,
+            )
+            return response
+
+        call("list", "GET", "/api/v1/surveys/list")
+        created = call(
+            "create",
+            "POST",
+            "/api/v1/surveys/create",
+            data={"title": "Новый"},
+            status=201,
+        ).json()
+        call("detail", "GET", survey_url)
+        call("update", "PATCH", survey_url, data={"title": "Переименован"})
+        call("stats", "GET", f"{survey_url}/stats")
+        call("feed", "GET", f"{survey_url}/feed")
+        call("export", "GET", f"{survey_url}/export/csv")
+
+        position = survey.questions.count() + 1
+        question = call(
+            "question_create",
+            "POST",
+            f"{survey_url}/questions/create",
+            data={"text": "Ещё вопрос", "position": position},
+            status=201,
+        ).json()
+        question_url = f"{survey_url}/questions/{question['id']}"
+        call("question_update", "PATCH", question_url, data={"text": "Вопрос"})
+        option = call(
+            "option_create",
+            "POST",
+            f"{question_url}/options/create",
+            data={"text": "Да", "position": 1},
+            status=201,
+        ).json()
+        option_url = f"{question_url}/options/{option['id']}"
+        call("option_update", "PATCH", option_url, data={"text": "Нет"})
+        call("option_delete", "DELETE", f"{option_url}/delete", status=204)
+        call("question_delete", "DELETE", f"{question_url}/delete", status=204)
+
+        run_url = f"{survey_url}/runs"
+        first = call(
+            "next_question",
+            "GET",
+            f"{run_url}/next-question",
+            user=respondent,
+        )
+        first_question = first.json()["question"]
+        call(
+            "answer",
+            "POST",
+            f"{run_url}/answer",
+            user=respondent,
+            data={
+                "question_id": first_question["id"],
+                "option_id": first_question["answer_options"][0]["id"],
+            },
+        )
+        async_respondent = User.objects.create_user(username=f"{dataset}-async")
+        first = call(
+            "next_question_async",
+            "GET",
+            f"{run_url}/async/next-question",
+            user=async_respondent,
+        )
+        call(
+            "answer_async",
+            "POST",
+            f"{run_url}/async/answer",
+            user=async_respondent,
+            data={
+                "question_id": first_question["id"],
+                "option_id": first_question["answer_options"][0]["id"],
+            },
+        )
+        plan = SurveyPlanService.get(Survey.objects.get(pk=survey.id))
+        call(
+            "answer_batch",
+            "POST",
+            f"{run_url}/answers",
+            user=respondent,
+            data={
+                "answers": [
+                    {"question_id": question_id, "option_id": min(options)}
+                    for question_id, options in plan.option_ids.items()
+                    if question_id != first_question["id"]
+                ],
+            },
+        )
+        call("delete", "DELETE", f"/api/v1/surveys/{created['id']}", status=204)
+        return counts
+
+    def make_dataset(self, dataset: str, *, questions: int, runs: int) -> Survey:
+        author = User.objects.create_user(username=f"{dataset}-author")
+        survey = make_survey(author, questions=questions, options=questions % 4 + 2)
+        for _survey_number in range(runs):
+            make_survey(author, questions=1)
+        for run_number in range(runs):
+            answer_all(
+                survey,
+                User.objects.create_user(username=f"{dataset}-user-{run_number}"),
+            )
+        return survey
+
+    def test_queries_fit_budget_and_do_not_grow_with_data(self) -> None:
+        small = self.exercise(
+            "small",
+            self.make_dataset("small", questions=2, runs=1),
+        )
+        plan_cache.clear()
+        large = self.exercise(
+            "large",
+            self.make_dataset("large", questions=30, runs=15),
+        )
+        self.assertEqual(small, large)
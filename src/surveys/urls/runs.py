@@ -1,10 +1,24 @@
 from django.urls import path
 
-from src.surveys.views import AnswerSubmitView, NextQuestionView
+from src.surveys.views import (
+    AnswerBatchSubmitView,
+    AnswerSubmitView,
+    AsyncAnswerSubmitView,
+    AsyncNextQuestionView,
+    NextQuestionView,
+)
 
 app_name = "runs"
 
 urlpatterns = [
     path("next-question", NextQuestionView.as_view(), name="next-question"),
     path("answer", AnswerSubmitView.as_view(), name="answer-submit"),
+    path("answers", AnswerBatchSubmitView.as_view(), name="answer-batch-submit"),
+    # Те же эндпоинты на async-view для ASGI-сервера
+    path(
+        "async/next-question",
+        AsyncNextQuestionView.as_view(),
+        name="next-question-async",
+    ),
+    path("async/answer", AsyncAnswerSubmitView.as_view(), name="answer-submit-async"),
 ]
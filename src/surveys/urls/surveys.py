@@ -3,7 +3,9 @@ from django.urls import include, path
 from src.surveys.views import (
     SurveyCreateView,
     SurveyDetailView,
+    SurveyExportView,
     SurveyListView,
+    SurveyRunFeedView,
     SurveyStatsView,
 )
 
@@ -13,6 +15,12 @@ urlpatterns = [
     path("create", SurveyCreateView.as_view(), name="survey-create"),
     path("<int:pk>", SurveyDetailView.as_view(), name="survey-detail"),
     path("<int:pk>/stats", SurveyStatsView.as_view(), name="survey-stats"),
+    path("<int:pk>/feed", SurveyRunFeedView.as_view(), name="survey-run-feed"),
+    path(
+        "<int:pk>/export/<str:export_format>",
+        SurveyExportView.as_view(),
+        name="survey-export",
+    ),
     path(
         "<int:pk>/questions/",
         include(("src.surveys.urls.questions", "questions")),
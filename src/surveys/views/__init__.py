@@ -8,20 +8,38 @@ from .questions import (
     QuestionDeleteView,
     QuestionUpdateView,
 )
-from .runs import AnswerSubmitView, NextQuestionView
-from .surveys import SurveyCreateView, SurveyDetailView, SurveyListView, SurveyStatsView
+from .runs import (
+    AnswerBatchSubmitView,
+    AnswerSubmitView,
+    AsyncAnswerSubmitView,
+    AsyncNextQuestionView,
+    NextQuestionView,
+)
+from .surveys import (
+    SurveyCreateView,
+    SurveyDetailView,
+    SurveyExportView,
+    SurveyListView,
+    SurveyRunFeedView,
+    SurveyStatsView,
+)
 
 __all__ = [
+    "AnswerBatchSubmitView",
     "AnswerOptionCreateView",
     "AnswerOptionDeleteView",
     "AnswerOptionUpdateView",
     "AnswerSubmitView",
+    "AsyncAnswerSubmitView",
+    "AsyncNextQuestionView",
     "NextQuestionView",
     "QuestionCreateView",
     "QuestionDeleteView",
     "QuestionUpdateView",
     "SurveyCreateView",
     "SurveyDetailView",
+    "SurveyExportView",
     "SurveyListView",
+    "SurveyRunFeedView",
     "SurveyStatsView",
 ]
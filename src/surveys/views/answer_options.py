@@ -5,12 +5,14 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from src.common.query_budget import query_budget
 from src.surveys.models import AnswerOption, Question, Survey
 from src.surveys.permissions import IsSurveyAuthor
 from src.surveys.serializers import (
     AnswerOptionCreateUpdateSerializer,
     AnswerOptionNestedSerializer,
 )
+from src.surveys.services import SurveyPlanService
 
 
 class BaseAnswerOptionView(generics.GenericAPIView):
@@ -31,7 +33,16 @@ class BaseAnswerOptionView(generics.GenericAPIView):
             survey=survey,
         )
 
+    def get_object(self) -> AnswerOption:
+        question = self.get_question()
+        return generics.get_object_or_404(
+            AnswerOption,
+            pk=self.kwargs["option_id"],
+            question=question,
+        )
+
 
+@query_budget(post=5)
 class AnswerOptionCreateView(BaseAnswerOptionView):
     serializer_class = AnswerOptionCreateUpdateSerializer
 
@@ -60,23 +71,17 @@ class AnswerOptionCreateView(BaseAnswerOptionView):
         )
         serializer.is_valid(raise_exception=True)
         option = serializer.save()
+        SurveyPlanService.invalidate(question.survey_id)
         return Response(
             AnswerOptionNestedSerializer(option).data,
             status=status.HTTP_201_CREATED,
         )
 
 
+@query_budget(patch=6)
 class AnswerOptionUpdateView(BaseAnswerOptionView):
     serializer_class = AnswerOptionCreateUpdateSerializer
 
-    def get_object(self) -> AnswerOption:
-        question = self.get_question()
-        return generics.get_object_or_404(
-            AnswerOption,
-            pk=self.kwargs["option_id"],
-            question=question,
-        )
-
     @extend_schema(
         summary="Обновить вариант",
         request=AnswerOptionCreateUpdateSerializer,
@@ -97,9 +102,11 @@ class AnswerOptionUpdateView(BaseAnswerOptionView):
         )
         serializer.is_valid(raise_exception=True)
         option = serializer.save()
+        SurveyPlanService.invalidate(self.kwargs["pk"])
         return Response(AnswerOptionNestedSerializer(option).data)
 
 
+@query_budget(delete=7)
 class AnswerOptionDeleteView(BaseAnswerOptionView):
     @extend_schema(summary="Удалить вариант ответа")
     def delete(
@@ -114,4 +121,5 @@ class AnswerOptionDeleteView(BaseAnswerOptionView):
         except ProtectedError as exc:
             msg = "Нельзя удалить вариант с ответами"
             raise ValidationError(msg) from exc
+        SurveyPlanService.invalidate(self.kwargs["pk"])
         return Response(status=status.HTTP_204_NO_CONTENT)
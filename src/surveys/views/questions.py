@@ -5,12 +5,14 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from src.common.query_budget import query_budget
 from src.surveys.models import Question, Survey
 from src.surveys.permissions import IsSurveyAuthor
 from src.surveys.serializers import (
     QuestionCreateUpdateSerializer,
     QuestionNestedSerializer,
 )
+from src.surveys.services import SurveyPlanService
 
 
 class BaseSurveyQuestionView(generics.GenericAPIView):
@@ -23,7 +25,16 @@ class BaseSurveyQuestionView(generics.GenericAPIView):
             author=self.request.user,
         )
 
+    def get_object(self) -> Question:
+        survey = self.get_survey()
+        return generics.get_object_or_404(
+            Question,
+            pk=self.kwargs["question_id"],
+            survey=survey,
+        )
+
 
+@query_budget(post=5)
 class QuestionCreateView(BaseSurveyQuestionView):
     serializer_class = QuestionCreateUpdateSerializer
 
@@ -49,23 +60,17 @@ class QuestionCreateView(BaseSurveyQuestionView):
         serializer = self.get_serializer(data=request.data, context={"survey": survey})
         serializer.is_valid(raise_exception=True)
         question = serializer.save()
+        SurveyPlanService.invalidate(survey.id)
         return Response(
             QuestionNestedSerializer(question).data,
             status=status.HTTP_201_CREATED,
         )
 
 
+@query_budget(patch=6)
 class QuestionUpdateView(BaseSurveyQuestionView):
     serializer_class = QuestionCreateUpdateSerializer
 
-    def get_object(self) -> Question:
-        survey = self.get_survey()
-        return generics.get_object_or_404(
-            Question,
-            pk=self.kwargs["question_id"],
-            survey=survey,
-        )
-
     @extend_schema(
         summary="Обновить вопрос",
         request=QuestionCreateUpdateSerializer,
@@ -86,9 +91,11 @@ class QuestionUpdateView(BaseSurveyQuestionView):
         )
         serializer.is_valid(raise_exception=True)
         question = serializer.save()
+        SurveyPlanService.invalidate(question.survey_id)
         return Response(QuestionNestedSerializer(question).data)
 
 
+@query_budget(delete=6)
 class QuestionDeleteView(BaseSurveyQuestionView):
     @extend_schema(summary="Удалить вопрос")
     def delete(
@@ -103,4 +110,5 @@ class QuestionDeleteView(BaseSurveyQuestionView):
         except ProtectedError as exc:
             msg = "Нельзя удалить вопрос с ответами"
             raise ValidationError(msg) from exc
+        SurveyPlanService.invalidate(question.survey_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,87 +1,179 @@
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiExample, extend_schema
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from src.surveys.models import AnswerOption, Question, Survey
+from src.common.async_views import AsyncAPIView
+from src.common.query_budget import query_budget
+from src.surveys.models import Survey, SurveyRun
 from src.surveys.serializers import (
+    AnswerBatchSubmitSerializer,
     AnswerResultSerializer,
     AnswerSubmitSerializer,
     NextQuestionSerializer,
 )
-from src.surveys.services import SurveyRunService
+from src.surveys.serializers.run import render_answer_result, render_next_question
+from src.surveys.services import SurveyPlan, SurveyPlanService, SurveyRunService
+
+# Схемы общие у sync- и async-вариантов эндпоинтов
+next_question_schema = extend_schema(
+    summary="Следующий вопрос",
+    responses={status.HTTP_200_OK: NextQuestionSerializer},
+    examples=[
+        OpenApiExample(
+            "Next question",
+            value={
+                "run_id": 5,
+                "question": {
+                    "id": 42,
+                    "text": "Любишь ли ты помидоры?",
+                    "position": 1,
+                    "answer_options": [
+                        {"id": 101, "text": "Да", "position": 1},
+                        {"id": 102, "text": "Нет", "position": 2},
+                    ],
+                },
+            },
+            response_only=True,
+        ),
+    ],
+)
+
+answer_submit_schema = extend_schema(
+    summary="Отправить ответ",
+    request=AnswerSubmitSerializer,
+    responses={status.HTTP_200_OK: AnswerResultSerializer},
+    examples=[
+        OpenApiExample(
+            "Submit answer",
+            value={"question_id": 42, "option_id": 101},
+            request_only=True,
+        ),
+        OpenApiExample(
+            "Next question available",
+            value={
+                "run_id": 5,
+                "completed": False,
+                "question": {
+                    "id": 43,
+                    "text": "Следующий вопрос?",
+                    "position": 2,
+                    "answer_options": [
+                        {"id": 111, "text": "Да", "position": 1},
+                        {"id": 112, "text": "Нет", "position": 2},
+                    ],
+                },
+            },
+            response_only=True,
+        ),
+        OpenApiExample(
+            "Survey completed",
+            value={"run_id": 5, "completed": True, "question": None},
+            response_only=True,
+        ),
+    ],
+)
 
 
-class NextQuestionView(generics.GenericAPIView):
+class BaseRunView(generics.GenericAPIView):
+    """Базовый класс прохождения: структура опроса берётся из плана в памяти."""
+
     permission_classes = (permissions.IsAuthenticated,)
 
-    @extend_schema(
-        summary="Следующий вопрос",
-        responses={status.HTTP_200_OK: NextQuestionSerializer},
-        examples=[
-            OpenApiExample(
-                "Next question",
-                value={
-                    "run_id": 5,
-                    "question": {
-                        "id": 42,
-                        "text": "Любишь ли ты помидоры?",
-                        "position": 1,
-                        "answer_options": [
-                            {"id": 101, "text": "Да", "position": 1},
-                            {"id": 102, "text": "Нет", "position": 2},
-                        ],
-                    },
-                },
-                response_only=True,
-            ),
-        ],
-    )
-    def get(self, request: Request, pk: int) -> Response:
-        survey = get_object_or_404(Survey, pk=pk)
+    def get_survey(self, pk: int) -> Survey:
+        return get_object_or_404(Survey.objects.only("id", "structure_version"), pk=pk)
+
+    @staticmethod
+    def json_response(content: bytes) -> HttpResponse:
+        # Тело собрано из готовых JSON-фрагментов плана, DRF-рендер не нужен
+        return HttpResponse(content, content_type="application/json")
+
+    def answer_result_response(self, run: SurveyRun, plan: SurveyPlan) -> HttpResponse:
+        next_question_id = SurveyRunService.next_question_id(run, plan)
+        if next_question_id is None:
+            run.mark_finished()
+            question = None
+        else:
+            question = plan.fragment(next_question_id)
+        return self.json_response(
+            render_answer_result(run_id=run.pk, question=question),
+        )
+
+
+@query_budget(get=7)
+class NextQuestionView(BaseRunView):
+    @next_question_schema
+    def get(self, request: Request, pk: int) -> HttpResponse:
+        survey = self.get_survey(pk)
+        plan = SurveyPlanService.get(survey)
         run = SurveyRunService.get_or_create_active_run(
             survey=survey,
             user=request.user,
         )
-        question = SurveyRunService.next_question(run)
-        if question is None:
+        question_id = SurveyRunService.next_question_id(run, plan)
+        if question_id is None:
             run.mark_finished()
             return Response(status=status.HTTP_204_NO_CONTENT)
-        data = NextQuestionSerializer({"run_id": run.pk, "question": question}).data
-        return Response(data)
+        return self.json_response(
+            render_next_question(run_id=run.pk, question=plan.fragment(question_id)),
+        )
 
 
-class AnswerSubmitView(generics.GenericAPIView):
-    permission_classes = (permissions.IsAuthenticated,)
+@query_budget(post=7)
+class AnswerSubmitView(BaseRunView):
     serializer_class = AnswerSubmitSerializer
 
+    @answer_submit_schema
+    def post(self, request: Request, pk: int) -> HttpResponse:
+        survey = self.get_survey(pk)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        question_id = serializer.validated_data["question_id"]
+        option_id = serializer.validated_data["option_id"]
+
+        plan = SurveyPlanService.get(survey)
+        if not plan.has_option(question_id, option_id):
+            raise NotFound
+
+        run = SurveyRunService.get_or_create_active_run(
+            survey=survey,
+            user=request.user,
+        )
+        SurveyRunService.create_answer(
+            run=run,
+            plan=plan,
+            question_id=question_id,
+            option_id=option_id,
+        )
+
+        return self.answer_result_response(run, plan)
+
+
+@query_budget(post=11)
+class AnswerBatchSubmitView(BaseRunView):
+    serializer_class = AnswerBatchSubmitSerializer
+
     @extend_schema(
-        summary="Отправить ответ",
-        request=AnswerSubmitSerializer,
+        summary="Отправить пачку ответов",
+        description=(
+            "Сохраняет ответы на несколько вопросов одной транзакцией. "
+            "При ошибке в любом ответе не сохраняется ни один."
+        ),
+        request=AnswerBatchSubmitSerializer,
         responses={status.HTTP_200_OK: AnswerResultSerializer},
         examples=[
             OpenApiExample(
-                "Submit answer",
-                value={"question_id": 42, "option_id": 101},
-                request_only=True,
-            ),
-            OpenApiExample(
-                "Next question available",
+                "Submit answers",
                 value={
-                    "run_id": 5,
-                    "completed": False,
-                    "question": {
-                        "id": 43,
-                        "text": "Следующий вопрос?",
-                        "position": 2,
-                        "answer_options": [
-                            {"id": 111, "text": "Да", "position": 1},
-                            {"id": 112, "text": "Нет", "position": 2},
-                        ],
-                    },
+                    "answers": [
+                        {"question_id": 42, "option_id": 101},
+                        {"question_id": 43, "option_id": 111},
+                    ],
                 },
-                response_only=True,
+                request_only=True,
             ),
             OpenApiExample(
                 "Survey completed",
@@ -90,33 +182,98 @@ class AnswerSubmitView(generics.GenericAPIView):
             ),
         ],
     )
-    def post(self, request: Request, pk: int) -> Response:
-        survey = get_object_or_404(Survey, pk=pk)
+    def post(self, request: Request, pk: int) -> HttpResponse:
+        survey = self.get_survey(pk)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        answers = [
+            (answer["question_id"], answer["option_id"])
+            for answer in serializer.validated_data["answers"]
+        ]
 
+        plan = SurveyPlanService.get(survey)
         run = SurveyRunService.get_or_create_active_run(
             survey=survey,
             user=request.user,
         )
-        question = get_object_or_404(
-            Question,
-            pk=serializer.validated_data["question_id"],
+        SurveyRunService.create_answers(run=run, plan=plan, answers=answers)
+        return self.answer_result_response(run, plan)
+
+
+class AsyncRunView(AsyncAPIView, BaseRunView):
+    """Базовый класс async-прохождения для ASGI.
+
+    Опрос и прогон читаются async-ORM, план при попадании в кэш берётся
+    без БД; в поток уходят только транзакционные записи.
+    """
+
+    @staticmethod
+    async def aget_survey(pk: int) -> Survey:
+        try:
+            return await Survey.objects.only("id", "structure_version").aget(pk=pk)
+        except Survey.DoesNotExist as exc:
+            raise NotFound from exc
+
+    async def aanswer_result_response(
+        self,
+        run: SurveyRun,
+        plan: SurveyPlan,
+    ) -> HttpResponse:
+        next_question_id = SurveyRunService.next_question_id(run, plan)
+        if next_question_id is None:
+            await run.amark_finished()
+            question = None
+        else:
+            question = plan.fragment(next_question_id)
+        return self.json_response(
+            render_answer_result(run_id=run.pk, question=question),
+        )
+
+
+@query_budget(get=7)
+class AsyncNextQuestionView(AsyncRunView):
+    @next_question_schema
+    async def get(self, request: Request, pk: int) -> HttpResponse:
+        survey = await self.aget_survey(pk)
+        plan = await SurveyPlanService.aget(survey)
+        run = await SurveyRunService.aget_or_create_active_run(
             survey=survey,
+            user=request.user,
         )
-        option = get_object_or_404(
-            AnswerOption,
-            pk=serializer.validated_data["option_id"],
-            question=question,
+        question_id = SurveyRunService.next_question_id(run, plan)
+        if question_id is None:
+            await run.amark_finished()
+            # HttpResponse, а не Response: DRF-рендер ушёл бы в поток
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        return self.json_response(
+            render_next_question(run_id=run.pk, question=plan.fragment(question_id)),
         )
 
-        SurveyRunService.create_answer(run=run, question=question, option=option)
 
-        next_q = SurveyRunService.next_question(run)
-        completed = next_q is None
-        if completed:
-            run.mark_finished()
+@query_budget(post=7)
+class AsyncAnswerSubmitView(AsyncRunView):
+    serializer_class = AnswerSubmitSerializer
 
-        payload = {"run_id": run.pk, "completed": completed, "question": next_q}
-        data = AnswerResultSerializer(payload).data
-        return Response(data, status=status.HTTP_200_OK)
+    @answer_submit_schema
+    async def post(self, request: Request, pk: int) -> HttpResponse:
+        survey = await self.aget_survey(pk)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        question_id = serializer.validated_data["question_id"]
+        option_id = serializer.validated_data["option_id"]
+
+        plan = await SurveyPlanService.aget(survey)
+        if not plan.has_option(question_id, option_id):
+            raise NotFound
+
+        run = await SurveyRunService.aget_or_create_active_run(
+            survey=survey,
+            user=request.user,
+        )
+        await SurveyRunService.acreate_answer(
+            run=run,
+            plan=plan,
+            question_id=question_id,
+            option_id=option_id,
+        )
+        return await self.aanswer_result_response(run, plan)
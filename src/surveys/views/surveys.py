@@ -1,25 +1,39 @@
 from typing import Any, override
 
+from django.db import router
 from django.db.models import ProtectedError, QuerySet
-from drf_spectacular.utils import OpenApiExample, extend_schema
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import generics, permissions, status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from src.surveys.models import Survey
+from src.common.db_routing import ReplicaReadMixin
+from src.common.perf import serialize_span
+from src.common.query_budget import query_budget
+from src.surveys.models import Survey, SurveyRun
 from src.surveys.permissions import IsSurveyAuthor
 from src.surveys.serializers import (
     SurveyCreateUpdateSerializer,
     SurveyDetailSerializer,
+    SurveyExportQuerySerializer,
+    SurveyRunFeedSerializer,
     SurveySerializer,
 )
 from src.surveys.serializers.stats import SurveyStatsSerializer
-from src.surveys.services import SurveyStatsService
+from src.surveys.services import (
+    SurveyExportService,
+    SurveyRunFeedService,
+    SurveyStatsService,
+)
 
 
-class SurveyListView(generics.ListAPIView):
-    queryset = Survey.objects.select_related("author").all()
+@query_budget(get=1)
+class SurveyListView(ReplicaReadMixin, generics.ListAPIView):
+    queryset = Survey.objects.all()
     serializer_class = SurveySerializer
     permission_classes = (permissions.IsAuthenticated,)
 
@@ -29,19 +43,21 @@ class SurveyListView(generics.ListAPIView):
 
     @extend_schema(
         summary="Список опросов текущего автора",
-        description=("Возвращает все опросы, созданные текущим пользователем."),
+        description=(
+            "Возвращает опросы текущего пользователя от новых к старым, "
+            "постранично. Следующая страница — по ссылке `next`; "
+            "на последней странице `next` равен `null`."
+        ),
         responses=SurveySerializer(many=True),
         examples=[
             OpenApiExample(
                 "List surveys",
-                value=[
-                    {
-                        "id": 1,
-                        "title": "Овощи",
-                        "created_at": "2025-10-20T10:00:00Z",
-                        "updated_at": "2025-10-21T10:00:00Z",
-                    },
-                ],
+                value={
+                    "id": 1,
+                    "title": "Овощи",
+                    "created_at": "2025-10-20T10:00:00Z",
+                    "updated_at": "2025-10-21T10:00:00Z",
+                },
                 response_only=True,
             ),
         ],
@@ -56,6 +72,7 @@ class SurveyListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+@query_budget(post=1)
 class SurveyCreateView(generics.CreateAPIView):
     queryset = Survey.objects.select_related("author").all()
     serializer_class = SurveyCreateUpdateSerializer
@@ -75,7 +92,7 @@ class SurveyCreateView(generics.CreateAPIView):
         *args: object,
         **kwargs: object,
     ) -> Response:
-        return super().create(request, *args, **kwargs)
+        return self.create(request, *args, **kwargs)
 
     @override
     def create(
@@ -93,7 +110,8 @@ class SurveyCreateView(generics.CreateAPIView):
         )
 
 
-class SurveyDetailView(generics.RetrieveUpdateDestroyAPIView):
+@query_budget(get=3, patch=4, delete=6)
+class SurveyDetailView(ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Survey.objects.select_related("author").prefetch_related(
         "questions__answer_options",
     )
@@ -149,7 +167,8 @@ class SurveyDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SurveyStatsView(generics.RetrieveAPIView):
+@query_budget(get=4)
+class SurveyStatsView(ReplicaReadMixin, generics.RetrieveAPIView):
     queryset = Survey.objects.all()
     permission_classes = (IsSurveyAuthor,)
 
@@ -186,4 +205,103 @@ class SurveyStatsView(generics.RetrieveAPIView):
     ) -> Response:
         survey = self.get_object()
         stats = SurveyStatsService.collect(survey)
-        return Response(SurveyStatsSerializer(stats).data)
+        with serialize_span():
+            data = SurveyStatsSerializer(stats).data
+        return Response(data)
+
+
+@query_budget(get=2)
+class SurveyExportView(ReplicaReadMixin, generics.RetrieveAPIView):
+    queryset = Survey.objects.all()
+    permission_classes = (IsSurveyAuthor,)
+
+    @extend_schema(
+        summary="Выгрузка ответов",
+        description=(
+            "Потоково отдаёт завершённые прогоны, по строке на прогон: "
+            "`csv` (колонка на вопрос) или `ndjson`. Прогоны упорядочены по "
+            "(`finished_at`, `run_id`); для догрузки передайте `since` и "
+            "`since_run_id` из последней полученной строки. Прогоны, "
+            "завершённые за последние SURVEY_EXPORT_SETTLE_SECONDS секунд, "
+            "попадут в следующую догрузку."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "export_format",
+                OpenApiTypes.STR,
+                OpenApiParameter.PATH,
+                enum=list(SurveyExportService.CONTENT_TYPES),
+            ),
+            OpenApiParameter("since", OpenApiTypes.DATETIME, required=False),
+            OpenApiParameter("since_run_id", OpenApiTypes.INT, required=False),
+        ],
+        responses={(status.HTTP_200_OK, "text/csv"): OpenApiTypes.STR},
+    )
+    def get(
+        self,
+        request: Request,
+        *_args: object,
+        **kwargs: object,
+    ) -> StreamingHttpResponse:
+        export_format = str(kwargs["export_format"])
+        if export_format not in SurveyExportService.CONTENT_TYPES:
+            raise NotFound
+        query = SurveyExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        since = query.validated_data.get("since")
+        survey = self.get_object()
+        response = StreamingHttpResponse(
+            SurveyExportService.render(
+                survey,
+                export_format,
+                since=(
+                    None
+                    if since is None
+                    else (since, query.validated_data.get("since_run_id", 0))
+                ),
+                # Строки читаются уже после выхода из view: база выбирается сейчас
+                using=router.db_for_read(SurveyRun),
+            ),
+            content_type=SurveyExportService.CONTENT_TYPES[export_format],
+        )
+        filename = f"survey-{survey.pk}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+@query_budget(get=3)
+class SurveyRunFeedView(ReplicaReadMixin, generics.ListAPIView):
+    serializer_class = SurveyRunFeedSerializer
+    permission_classes = (IsSurveyAuthor,)
+
+    @override
+    def get_queryset(self) -> QuerySet[SurveyRun]:
+        survey = get_object_or_404(
+            Survey.objects.only("id", "author_id"),
+            pk=self.kwargs["pk"],
+        )
+        self.check_object_permissions(self.request, survey)
+        return SurveyRunFeedService.runs(survey)
+
+    @override
+    def paginate_queryset(self, queryset: QuerySet[SurveyRun]) -> list[SurveyRun]:
+        page = super().paginate_queryset(queryset)
+        SurveyRunFeedService.attach_answers(page)
+        return page
+
+    @extend_schema(
+        summary="Лента прогонов опроса",
+        description=(
+            "Прогоны опроса с ответами от новых к старым, включая незавершённые, "
+            "постранично. Следующая страница — по ссылке `next`."
+        ),
+    )
+    @override
+    def get(
+        self,
+        request: Request,
+        *args: object,
+        **kwargs: object,
+    ) -> Response:
+        return super().get(request, *args, **kwargs)
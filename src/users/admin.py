@@ -1,5 +1,10 @@
+from typing import ClassVar
+
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.http import HttpRequest
 
+from .authentication import revoke_tokens
 from .models import Identity, User
 
 
@@ -7,6 +12,20 @@ from .models import Identity, User
 class UserAdmin(admin.ModelAdmin):
     list_display = ("id", "username", "is_active", "is_staff", "last_login")
     search_fields = ("username",)
+    # Смена is_active, is_staff или пароля и удаление пользователя отзывают
+    # токены обработчиками из src.users.signals
+    actions: ClassVar[list[str]] = ["revoke_user_tokens"]
+
+    @admin.action(description="Отозвать токены")
+    def revoke_user_tokens(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[User],
+    ) -> None:
+        users = list(queryset)
+        for user in users:
+            revoke_tokens(user)
+        self.message_user(request, f"Токены отозваны: {len(users)}")
 
 
 @admin.register(Identity)
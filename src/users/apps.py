@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.users"
+
+    def ready(self) -> None:
+        from src.users import signals  # noqa: F401, PLC0415 - подключает обработчики
@@ -0,0 +1,162 @@
+from typing import Final, Self
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import F
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken, Token
+
+from src.common.cache import cache_is_shared
+from src.users.denylist import denylist
+from src.users.models import TokenUser, User
+
+# Снимок полей пользователя в токене
+TOKEN_VERSION_CLAIM: Final[str] = "ver"  # noqa: S105 - имя claim, не секрет
+IS_ACTIVE_CLAIM: Final[str] = "active"
+IS_STAFF_CLAIM: Final[str] = "staff"
+# Минимальная действующая версия токенов пользователя после отзыва
+REVOKED_CACHE_KEY: Final[str] = "auth:token-version:{user_id}"
+# Изменение этих полей отзывает токены: снимок в JWT устаревает
+TOKEN_USER_FIELDS: Final[frozenset[str]] = frozenset(
+    {"is_active", "is_staff", "is_superuser", "password"},
+)
+
+
+def set_user_claims(token: Token, user: User) -> None:
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    token[IS_ACTIVE_CLAIM] = user.is_active
+    token[IS_STAFF_CLAIM] = user.is_staff
+
+
+class VersionedAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user: User) -> Self:
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+
+class VersionedRefreshToken(RefreshToken):
+    """Refresh-токен со снимком пользователя; access наследует его claims.
+
+    Blacklist проверяется в БД, только если jti есть в фильтре denylist.
+    """
+
+    access_token_class = VersionedAccessToken
+
+    @classmethod
+    def for_user(cls, user: User) -> Self:
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+    def check_blacklist(self) -> None:
+        if denylist.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self) -> tuple[BlacklistedToken, bool]:
+        blacklisted = super().blacklist()
+        denylist.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+def revoke_tokens(user: User) -> None:
+    """Отзывает все выданные пользователю токены.
+
+    Refresh-токены перестают приниматься сразу (версия сверяется с БД),
+    access-токены — как только запрос увидит отметку в кэше. Без общего
+    кэша access-токены проверяются по БД (см. StatelessJWTAuthentication).
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    user.refresh_from_db(fields=["token_version"])
+    mark_revoked(user.pk, user.token_version)
+
+
+def mark_revoked(user_id: int, version: int) -> None:
+    """Отметка в кэше: токены пользователя с версией ниже version не действуют."""
+    cache.set(
+        REVOKED_CACHE_KEY.format(user_id=user_id),
+        version,
+        api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+    )
+
+
+def is_revoked(user_id: int, version: int) -> bool:
+    minimal = cache.get(REVOKED_CACHE_KEY.format(user_id=user_id))
+    return minimal is not None and version < minimal
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT без чтения строки users на каждый запрос.
+
+    request.user — TokenUser из claims токена; строка читается, только если
+    код обратится к полям вне снимка. Отзыв (рост token_version) проверяется
+    по кэшу. По БД, как в JWTAuthentication, проверяются токены без версии,
+    выданные до её появления, и все токены, когда кэш не общий между
+    процессами: отметку об отзыве из другого воркера такой кэш не покажет.
+    """
+
+    @staticmethod
+    def is_stateless(validated_token: Token) -> bool:
+        return TOKEN_VERSION_CLAIM in validated_token and cache_is_shared()
+
+    def get_user(self, validated_token: Token) -> User:
+        if not self.is_stateless(validated_token):
+            user = super().get_user(validated_token)
+            check_token_version(validated_token, user)
+            return user
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as exc:
+            msg = "Token contained no recognizable user identification"
+            raise InvalidToken(msg) from exc
+
+        user = TokenUser.from_fields(
+            id=user_id,
+            is_active=bool(validated_token.get(IS_ACTIVE_CLAIM)),
+            is_staff=bool(validated_token.get(IS_STAFF_CLAIM)),
+            token_version=validated_token[TOKEN_VERSION_CLAIM],
+        )
+        if not user.is_active:
+            msg = "User is inactive"
+            raise AuthenticationFailed(msg, code="user_inactive")
+        if is_revoked(user_id, user.token_version):
+            msg = "Token has been revoked"
+            raise AuthenticationFailed(msg, code="token_revoked")
+        return user
+
+    async def aauthenticate(self, request: Request) -> tuple[User, Token] | None:
+        """Authenticate для async-view: в поток уходит только проверка по БД.
+
+        Разбор и проверка подписи — чистые вычисления, TokenUser собирается
+        без БД; пользователя из БД get_user читает в потоке.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if self.is_stateless(validated_token):
+            return self.get_user(validated_token), validated_token
+        return await sync_to_async(self.get_user)(validated_token), validated_token
+
+
+def check_token_version(token: Token, user: User) -> None:
+    """Токен отозван, если его версия ниже текущей версии пользователя."""
+    version = token.get(TOKEN_VERSION_CLAIM)
+    if version is not None and version < user.token_version:
+        msg = "Token has been revoked"
+        raise AuthenticationFailed(msg, code="token_revoked")
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """Схема OpenAPI для StatelessJWTAuthentication — тот же Bearer JWT."""
+
+    target_class = StatelessJWTAuthentication
@@ -0,0 +1,195 @@
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic
+from typing import Final
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from src.common.cache import cache_is_shared
+
+# Меняется при каждом отзыве: процессы узнают, что пора догрузить новые записи
+GENERATION_CACHE_KEY: Final[str] = "auth:denylist:generation"
+# Запас ёмкости фильтра под отзывы до следующей полной пересборки
+MIN_CAPACITY: Final[int] = 1024
+# id выдаются до коммита: транзакция с меньшим id может закоммититься позже
+# уже загруженных записей, поэтому догрузка перечитывает хвост
+LOAD_OVERLAP: Final[int] = 100
+
+
+class BloomFilter:
+    """Фильтр Блума: «точно нет» или «возможно есть» с долей ложных срабатываний.
+
+    Позиции битов — двойное хеширование одного blake2b-дайджеста.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(
+            8,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        # Нечётный шаг не зацикливается на части позиций
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        if item in self:
+            return
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+@dataclass
+class _Snapshot:
+    bloom: BloomFilter
+    # Последняя загруженная запись BlacklistedToken
+    last_id: int
+    generation: object
+    built_at: float
+
+
+class TokenDenylist:
+    """jti отозванных refresh-токенов в фильтре Блума в памяти процесса.
+
+    «Точно не отозван» отвечает без запроса в БД; при попадании в фильтр
+    решает token_blacklist. Фильтр пересобирается из непросроченных
+    BlacklistedToken раз в TOKEN_DENYLIST_REBUILD_SECONDS секунд, а отзывы
+    других процессов догружает по смене поколения в кэше Django. Между
+    процессами нужен общий кэш, иначе отзыв в чужом процессе станет виден
+    только после пересборки, — поэтому без общего кэша фильтр не
+    используется и каждый токен проверяется по БД.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: _Snapshot | None = None
+        self._lock = Lock()
+
+    def might_contain(self, jti: str) -> bool:
+        # «Точно нет» без общего кэша могло бы пропустить отзыв из другого
+        # процесса: ответ «возможно» отправляет проверку в token_blacklist
+        if not cache_is_shared():
+            return True
+        return jti in self._current().bloom
+
+    def add(self, jti: str) -> None:
+        """Вызывается после записи BlacklistedToken."""
+        cache.set(GENERATION_CACHE_KEY, uuid4().hex, None)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot.bloom.add(jti)
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    def _current(self) -> _Snapshot:
+        generation = cache.get(GENERATION_CACHE_KEY)
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.generation == generation
+            and not (self._expired(snapshot))
+        ):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if (
+                snapshot is None
+                or self._expired(snapshot)
+                or snapshot.bloom.count >= snapshot.bloom.capacity
+            ):
+                snapshot = self._rebuild(generation)
+            elif snapshot.generation != generation:
+                self._load_new(snapshot)
+                snapshot.generation = generation
+            self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _expired(snapshot: _Snapshot) -> bool:
+        return (
+            monotonic() - snapshot.built_at >= settings.TOKEN_DENYLIST_REBUILD_SECONDS
+        )
+
+    @staticmethod
+    def _rebuild(generation: object) -> _Snapshot:
+        # Просроченный токен отклоняется по exp, в фильтре он не нужен
+        rows = list(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now(),
+            ).values_list("id", "token__jti"),
+        )
+        bloom = BloomFilter(
+            max(MIN_CAPACITY, 2 * len(rows)),
+            settings.TOKEN_DENYLIST_ERROR_RATE,
+        )
+        for _id, jti in rows:
+            bloom.add(jti)
+        # Догрузка продолжит с последней записи, в том числе просроченной
+        last_id = BlacklistedToken.objects.aggregate(last=Max("id"))["last"] or 0
+        return _Snapshot(
+            bloom=bloom,
+            last_id=last_id,
+            generation=generation,
+            built_at=monotonic(),
+        )
+
+    @staticmethod
+    def _load_new(snapshot: _Snapshot) -> None:
+        rows = BlacklistedToken.objects.filter(
+            id__gt=snapshot.last_id - LOAD_OVERLAP,
+        ).values_list("id", "token__jti")
+        for row_id, jti in rows:
+            snapshot.bloom.add(jti)
+            snapshot.last_id = max(snapshot.last_id, row_id)
+
+
+denylist = TokenDenylist()
+
+
+def prune_expired_tokens(*, batch_size: int, max_batches: int | None = None) -> int:
+    """Удаляет просроченные OutstandingToken (с их BlacklistedToken) пачками.
+
+    Каждая пачка — отдельный короткий DELETE. Токены выдаются с одинаковым
+    сроком, поэтому просроченные лежат в начале по id: выборка идёт по
+    первичному ключу без отдельного индекса по expires_at.
+    """
+    deleted = 0
+    batches = 0
+    now = timezone.now()
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size],
+        )
+        if not ids:
+            break
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        batches += 1
+    return deleted
@@ -3,3 +3,10 @@ from django.db.models import TextChoices
 
 class IdentityProvider(TextChoices):
     EMAIL = "email", "email"
+
+    def normalize(self, value: str) -> str:
+        """Каноническая форма значения: в ней хранится, ищется и кэшируется."""
+        value = value.strip()
+        if self is IdentityProvider.EMAIL:
+            return value.lower()
+        return value
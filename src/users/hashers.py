@@ -0,0 +1,40 @@
+import statistics
+from time import perf_counter
+from typing import Final
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# Нижняя граница OWASP для PBKDF2-HMAC-SHA256 (2023)
+MIN_RECOMMENDED_ITERATIONS: Final[int] = 600_000
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций из PASSWORD_HASH_ITERATIONS.
+
+    Алгоритм тот же, что у стандартного хешера, поэтому уже сохранённые
+    хеши проверяются им же. Хеш с другим числом итераций must_update
+    считает устаревшим — при следующем входе пароль перехешируется.
+    Значение подбирается командой benchmark_hasher.
+    """
+
+    @property
+    def iterations(self) -> int:  # type: ignore[override]
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def time_hash(iterations: int, *, rounds: int) -> float:
+    """Медианное время одного хеша PBKDF2-SHA256, секунды."""
+    hasher = PBKDF2PasswordHasher()
+    salt = hasher.salt()
+    samples = []
+    for _ in range(rounds):
+        started = perf_counter()
+        hasher.encode("benchmark-password", salt, iterations)
+        samples.append(perf_counter() - started)
+    return statistics.median(samples)
+
+
+def iterations_for(target: float, *, iterations: int, elapsed: float) -> int:
+    """Итерации на target секунд по замеру: время PBKDF2 линейно по итерациям."""
+    return max(10_000, int(round(iterations * target / elapsed, -4)))
@@ -0,0 +1,155 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework.exceptions import Throttled
+
+from src.common.metrics import CallbackGauge, registry
+from src.users.models import User
+
+hash_wait = registry.histogram(
+    "password_hash_wait_seconds",
+    "Time a password hash waited for a free worker",
+)
+hash_duration = registry.histogram(
+    "password_hash_duration_seconds",
+    "Password hashing time in the pool",
+)
+hash_rejected = registry.counter(
+    "password_hash_rejected_total",
+    "Password hashes rejected with 429 because the pool was saturated",
+)
+
+
+class PasswordHashingBusy(Throttled):
+    default_detail = "Слишком много входов одновременно, повторите позже"
+    default_code = "password_hashing_busy"
+
+
+class HashingPool:
+    """Ограниченный пул потоков для хеширования паролей.
+
+    PBKDF2 и scrypt из hashlib отпускают GIL, поэтому хеши считаются
+    параллельно, а одновременно их не больше workers на процесс: всплеск
+    входов не отнимает процессор у остальных запросов. Ещё queue_size
+    запросов ждут свободный поток; следующие сразу получают 429 с
+    Retry-After вместо того, чтобы копиться в очереди.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self._slots = BoundedSemaphore(workers + queue_size)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self._pending = 0
+        self._running = 0
+
+    @property
+    def queued(self) -> int:
+        return self._pending - self._running
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def run[T](self, func: Callable[..., T], *args: object) -> T:
+        """Выполняет func(*args) в пуле; PasswordHashingBusy, если пул занят."""
+        if not self._slots.acquire(blocking=False):
+            hash_rejected.inc()
+            raise PasswordHashingBusy(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+        try:
+            with self._lock:
+                self._pending += 1
+            future = self._get_executor().submit(self._call, monotonic(), func, args)
+            return future.result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def _call[T](
+        self,
+        submitted_at: float,
+        func: Callable[..., T],
+        args: tuple[object, ...],
+    ) -> T:
+        started_at = monotonic()
+        hash_wait.observe(started_at - submitted_at)
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+            hash_duration.observe(monotonic() - started_at)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Потоки создаются при первом хеше, а не при импорте: после fork
+        # у pre-fork серверов каждый процесс получает свой пул
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="password-hash",
+                    )
+        return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+hashing_pool = HashingPool(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE,
+)
+
+registry.register(
+    CallbackGauge(
+        "password_hash_queue_depth",
+        "Password hashes waiting for a free worker",
+        lambda: hashing_pool.queued,
+    ),
+)
+registry.register(
+    CallbackGauge(
+        "password_hash_in_progress",
+        "Password hashes being computed",
+        lambda: hashing_pool.running,
+    ),
+)
+
+
+def _verify(password: str, encoded: str) -> tuple[bool, str | None]:
+    is_correct, must_update = verify_password(password, encoded)
+    # Устаревший хеш (другой алгоритм или число итераций) пересчитывается
+    # сразу, пока открытый пароль под рукой
+    rehashed = make_password(password) if is_correct and must_update else None
+    return is_correct, rehashed
+
+
+def hash_password(password: str) -> str:
+    """Хеш нового пароля, посчитанный в пуле."""
+    return hashing_pool.run(make_password, password)
+
+
+def check_user_password(user: User, password: str) -> bool:
+    """Проверяет пароль в пуле; устаревший хеш заменяет текущим.
+
+    Аналог User.check_password: перехеширование прозрачно для клиента
+    и стоит одного UPDATE при первом входе после смены политики.
+    """
+    is_correct, rehashed = hashing_pool.run(_verify, password, user.password)
+    if rehashed is not None:
+        user.password = rehashed
+        # update в обход сигналов: пароль прежний, токены не отзываются
+        User.objects.filter(pk=user.pk).update(password=rehashed)
+    return is_correct
@@ -0,0 +1,100 @@
+from hashlib import blake2b
+from typing import Final
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from src.common.cache import cache_is_shared
+from src.users.enums import IdentityProvider
+from src.users.models import Identity, User
+
+CACHE_KEY: Final[str] = "auth:identity:{provider}:{digest}"
+# Отметка «такой идентичности нет»: id пользователей начинаются с 1
+MISSING: Final[int] = 0
+
+
+class IdentityRepository:
+    """Поиск пользователя по (provider, value) с кэшем в кэше Django.
+
+    Значения приводятся к канонической форме IdentityProvider.normalize.
+    В кэше лежит user_id, для неизвестных значений — отметка MISSING на
+    IDENTITY_CACHE_MISS_TIMEOUT секунд: перебор несуществующих email не
+    доходит до БД. Запись Identity сбрасывает ключи сигналами (см.
+    src.users.signals); bulk_create и update их обходят — после них
+    вызывайте forget. Сброс в кэше процесса не доходит до других воркеров,
+    поэтому без общего кэша (cache_is_shared) каждый поиск идёт в БД.
+    """
+
+    @staticmethod
+    def cache_key(provider: IdentityProvider, value: str) -> str:
+        # Значение до 255 символов любого вида, ключ — фиксированной длины
+        digest = blake2b(provider.normalize(value).encode(), digest_size=16)
+        return CACHE_KEY.format(provider=provider.value, digest=digest.hexdigest())
+
+    def user_id(self, provider: IdentityProvider, value: str) -> int | None:
+        key = self.cache_key(provider, value)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached or None
+        user_id = (
+            Identity.objects.filter(provider=provider, value=provider.normalize(value))
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        self._remember(key, user_id)
+        return user_id
+
+    def exists(self, provider: IdentityProvider, value: str) -> bool:
+        return self.user_id(provider, value) is not None
+
+    def get_user(self, provider: IdentityProvider, value: str) -> User | None:
+        """Пользователь идентичности; при промахе кэша — одним запросом с JOIN."""
+        key = self.cache_key(provider, value)
+        cached = self._cached(key)
+        if cached == MISSING:
+            return None
+        if cached is not None:
+            user = User.objects.filter(pk=cached).first()
+            if user is None:
+                cache.delete(key)
+            return user
+        identity = (
+            Identity.objects.select_related("user")
+            .filter(provider=provider, value=provider.normalize(value))
+            .first()
+        )
+        if identity is None:
+            self._remember(key, None)
+            return None
+        self._remember(key, identity.user_id)
+        return identity.user
+
+    def create(self, user: User, provider: IdentityProvider, value: str) -> Identity:
+        return Identity.objects.create(user=user, provider=provider, value=value)
+
+    def forget(self, provider: IdentityProvider, value: str) -> None:
+        """Сбрасывает ключ сейчас и после коммита текущей транзакции.
+
+        Второй сброс убирает значение, которое параллельный запрос успел
+        закэшировать по состоянию БД до коммита.
+        """
+        key = self.cache_key(provider, value)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @staticmethod
+    def _cached(key: str) -> int | None:
+        return cache.get(key) if cache_is_shared() else None
+
+    @staticmethod
+    def _remember(key: str, user_id: int | None) -> None:
+        if not cache_is_shared():
+            return
+        if user_id is None:
+            cache.set(key, MISSING, settings.IDENTITY_CACHE_MISS_TIMEOUT)
+        else:
+            cache.set(key, user_id, settings.IDENTITY_CACHE_TIMEOUT)
+
+
+identities = IdentityRepository()
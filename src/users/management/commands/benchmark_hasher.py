@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from src.users.hashers import MIN_RECOMMENDED_ITERATIONS, iterations_for, time_hash
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Time PBKDF2-SHA256 on this machine and suggest PASSWORD_HASH_ITERATIONS "
+        "for a target hashing time"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            help="Iterations to time (default: PASSWORD_HASH_ITERATIONS).",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="Hashes timed; the median is reported.",
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=100.0,
+            help="Desired time of one hash, milliseconds.",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        iterations = options["iterations"] or settings.PASSWORD_HASH_ITERATIONS
+        if iterations < 1 or options["rounds"] < 1 or options["target_ms"] <= 0:
+            msg = "--iterations, --rounds and --target-ms must be positive"
+            raise CommandError(msg)
+        elapsed = time_hash(iterations, rounds=options["rounds"])
+        self.stdout.write(
+            f"PBKDF2-SHA256, {iterations} iterations: "
+            f"{elapsed * 1000:.1f} ms per hash (median of {options['rounds']})",
+        )
+        suggested = iterations_for(
+            options["target_ms"] / 1000,
+            iterations=iterations,
+            elapsed=elapsed,
+        )
+        self.stdout.write(
+            f"For {options['target_ms']:g} ms per hash set "
+            f"PASSWORD_HASH_ITERATIONS={suggested}",
+        )
+        if suggested < MIN_RECOMMENDED_ITERATIONS:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Below the recommended minimum of {MIN_RECOMMENDED_ITERATIONS} "
+                    "iterations: raise --target-ms",
+                ),
+            )
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.users.denylist import prune_expired_tokens
+
+if TYPE_CHECKING:
+    from django.core.management.base import CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens (and their blacklist entries) "
+        "in bounded batches"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tokens deleted per statement.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches (limits one run, e.g. from cron).",
+        )
+
+    def handle(self, *_args: object, **options: object) -> None:
+        if options["batch_size"] < 1:
+            msg = "--batch-size must be positive"
+            raise CommandError(msg)
+        if options["max_batches"] is not None and options["max_batches"] < 1:
+            msg = "--max-batches must be positive"
+            raise CommandError(msg)
+        deleted = prune_expired_tokens(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(f"Deleted {deleted} expired tokens")
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_token_version'),
+    ]
+
+    operations = [
+        # Email, различающиеся только регистром или пробелами, после приведения
+        # нарушат уникальность: их нужно объединить вручную до миграции
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1
+                        FROM user_identities
+                        WHERE provider = 'email'
+                        GROUP BY lower(btrim(value))
+                        HAVING count(*) > 1
+                    ) THEN
+                        RAISE EXCEPTION 'user_identities has emails that differ '
+                            'only in case or surrounding spaces; merge them first';
+                    END IF;
+                END $$;
+
+                UPDATE user_identities
+                SET value = lower(btrim(value))
+                WHERE provider = 'email' AND value <> lower(btrim(value));
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='identity',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('provider', 'email'), _negated=True), ('value', django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('value'))), _connector='OR'), name='identity_email_normalized'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from .identity import Identity
+from .token_user import TokenUser
 from .user import User
 
-__all__ = ["Identity", "User"]
+__all__ = ["Identity", "TokenUser", "User"]
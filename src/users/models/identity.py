@@ -1,6 +1,7 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from django.db import models
+from django.db.models.functions import Lower, Trim
 
 from src.common.models import TimeStampedModel
 from src.users.enums import IdentityProvider
@@ -10,7 +11,9 @@ class Identity(TimeStampedModel):
     """Связь пользователя с внешней идентичностью.
 
     Сейчас поддерживаем только provider='email'. В будущем можно добавить другие.
-    (provider, value) уникальны глобально.
+    (provider, value) уникальны глобально; value хранится в канонической форме
+    IdentityProvider.normalize (email — в нижнем регистре). Искать и создавать
+    идентичности лучше через src.users.identities.
     """
 
     user = models.ForeignKey(
@@ -25,12 +28,22 @@ class Identity(TimeStampedModel):
         db_table = "user_identities"
         verbose_name = "Identity"
         verbose_name_plural = "Identities"
-        constraints: ClassVar[list[models.UniqueConstraint]] = [
+        constraints: ClassVar[list[models.BaseConstraint]] = [
             models.UniqueConstraint(
                 fields=["provider", "value"],
                 name="identity_provider_value_unique",
             ),
+            # bulk_create и update обходят save(): форму email проверяет БД
+            models.CheckConstraint(
+                condition=~models.Q(provider=IdentityProvider.EMAIL)
+                | models.Q(value=Lower(Trim("value"))),
+                name="identity_email_normalized",
+            ),
         ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.provider}:{self.value}"
+
+    def save(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        self.value = IdentityProvider(self.provider).normalize(self.value)
+        super().save(*args, **kwargs)
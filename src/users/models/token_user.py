@@ -0,0 +1,36 @@
+from collections.abc import Iterable
+from typing import Self
+
+from django.db.models import QuerySet
+
+from .user import User
+
+
+class TokenUser(User):
+    """Пользователь, собранный из проверенных claims access-токена без запроса в БД.
+
+    Загружены только переданные поля (id, is_active, is_staff, token_version) —
+    снимок на момент выдачи токена. Остальные поля отложены: первое обращение
+    к любому из них догружает их все одним запросом. Экземпляр подходит везде,
+    где ждут User: фильтры ORM, внешние ключи, проверки прав.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_fields(cls, **values: object) -> Self:
+        names = [f.attname for f in cls._meta.concrete_fields if f.attname in values]
+        # Строка не читалась из БД: базу для догрузки выберет роутер
+        return cls.from_db(None, names, [values[name] for name in names])
+
+    def refresh_from_db(
+        self,
+        using: str | None = None,
+        fields: Iterable[str] | None = None,
+        from_queryset: QuerySet[Self] | None = None,
+    ) -> None:
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using, fields, from_queryset)
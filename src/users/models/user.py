@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 from src.common.models import TimeStampedModel
 
@@ -12,6 +13,9 @@ class User(TimeStampedModel, AbstractUser):
     Email не уникален, идентичности живут отдельно.
     """
 
+    # Входит в JWT; рост версии отзывает все выданные пользователю токены
+    token_version = models.PositiveIntegerField(default=1)
+
     class Meta:
         db_table = "users"
         verbose_name = "User"
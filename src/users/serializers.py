@@ -1,14 +1,28 @@
 import uuid
 from dataclasses import dataclass
+from typing import Any
 
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
 from rest_framework_simplejwt.serializers import (
     TokenObtainPairSerializer,
+    TokenRefreshSerializer,
 )
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 
+from .authentication import (
+    VersionedRefreshToken,
+    check_token_version,
+    set_user_claims,
+)
 from .enums import IdentityProvider
+from .hashing import check_user_password, hash_password
+from .identities import identities
 from .models import Identity, User
 
 
@@ -23,13 +37,10 @@ class RegisterSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True, trim_whitespace=False)
 
     def validate_email(self, value: str) -> str:
-        if Identity.objects.filter(
-            provider=IdentityProvider.EMAIL,
-            value=value,
-        ).exists():
+        if identities.exists(IdentityProvider.EMAIL, value):
             msg = "Пользователь с таким email уже существует"
             raise serializers.ValidationError(msg)
-        return value
+        return IdentityProvider.EMAIL.normalize(value)
 
     def validate_password(self, value: str) -> str:
         validate_password(value)
@@ -42,12 +53,12 @@ class RegisterSerializer(serializers.Serializer):
         # Генерируем технический username (чтобы не требовать его от клиента)
         username = str(uuid.uuid4())
 
-        user = User.objects.create_user(username=username, password=password)
-        identity = Identity.objects.create(
-            user=user,
-            provider=IdentityProvider.EMAIL,
-            value=email,
+        # Хеш считается в пуле до записи: create_user хешировал бы в потоке запроса
+        user = User.objects.create(
+            username=username,
+            password=hash_password(password),
         )
+        identity = identities.create(user, IdentityProvider.EMAIL, email)
         return CreatedUser(user=user, identity=identity)
 
     def to_representation(self, instance: CreatedUser) -> dict[str, object]:
@@ -69,17 +80,8 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
             msg = "Неверные учетные данные"
             raise serializers.ValidationError(msg)
 
-        try:
-            identity = Identity.objects.select_related("user").get(
-                provider=IdentityProvider.EMAIL,
-                value=email,
-            )
-        except Identity.DoesNotExist as exc:
-            msg = "Неверные учетные данные"
-            raise serializers.ValidationError(msg) from exc
-
-        user = identity.user
-        if not user.check_password(password):
+        user = identities.get_user(IdentityProvider.EMAIL, email)
+        if user is None or not check_user_password(user, password):
             msg = "Неверные учетные данные"
             raise serializers.ValidationError(msg)
 
@@ -87,13 +89,38 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
             msg = "Пользователь деактивирован"
             raise serializers.ValidationError(msg)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         return {
             "access": str(refresh.access_token),
             "refresh": str(refresh),
         }
 
 
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление access-токена со сверкой версии токенов пользователя.
+
+    Новый access получает свежий снимок пользователя из БД. Ротация
+    refresh-токенов (ROTATE_REFRESH_TOKENS) не поддерживается.
+    """
+
+    token_class = VersionedRefreshToken
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
+        try:
+            refresh = self.token_class(attrs["refresh"])
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0]) from exc
+        user = User.objects.filter(
+            pk=refresh.payload.get(api_settings.USER_ID_CLAIM),
+        ).first()
+        if user is None or not user.is_active:
+            msg = "No active account found for the given token."
+            raise AuthenticationFailed(msg, code="no_active_account")
+        check_token_version(refresh, user)
+        set_user_claims(refresh, user)
+        return {"access": str(refresh.access_token)}
+
+
 class LogoutSerializer(serializers.Serializer):
     """Сериализатор для выхода пользователя: принимает refresh-токен."""
 
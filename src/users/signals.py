@@ -0,0 +1,70 @@
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from src.users.authentication import TOKEN_USER_FIELDS, mark_revoked, revoke_tokens
+from src.users.enums import IdentityProvider
+from src.users.identities import identities
+from src.users.models import Identity, User
+
+
+@receiver(pre_save, sender=Identity)
+def remember_previous_identity(instance: Identity, **_kwargs: Any) -> None:  # noqa: ANN401
+    # Смена provider/value освобождает старый ключ кэша; новым строкам
+    # (как при регистрации) лишний запрос не нужен
+    instance.previous_key = None
+    if not instance._state.adding:  # noqa: SLF001 - состояние модели Django
+        instance.previous_key = (
+            Identity.objects.filter(pk=instance.pk)
+            .values_list("provider", "value")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Identity)
+def forget_saved_identity(instance: Identity, **_kwargs: Any) -> None:  # noqa: ANN401
+    previous = getattr(instance, "previous_key", None)
+    if previous is not None:
+        identities.forget(IdentityProvider(previous[0]), previous[1])
+    identities.forget(IdentityProvider(instance.provider), instance.value)
+
+
+@receiver(post_delete, sender=Identity)
+def forget_deleted_identity(instance: Identity, **_kwargs: Any) -> None:  # noqa: ANN401
+    identities.forget(IdentityProvider(instance.provider), instance.value)
+
+
+@receiver(pre_save, sender=User)
+def detect_token_fields_change(
+    instance: User,
+    update_fields: frozenset[str] | None,
+    **_kwargs: Any,  # noqa: ANN401
+) -> None:
+    # Любой путь сохранения (админка, shell, сервисы) отзывает токены, если
+    # изменился снимок пользователя в них; новым строкам запрос не нужен
+    instance.token_fields_changed = False
+    if instance._state.adding:  # noqa: SLF001 - состояние модели Django
+        return
+    fields = TOKEN_USER_FIELDS
+    if update_fields is not None:
+        fields = fields.intersection(update_fields)
+        if not fields:
+            return
+    previous = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance.token_fields_changed = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(instance: User, **_kwargs: Any) -> None:  # noqa: ANN401
+    if getattr(instance, "token_fields_changed", False):
+        revoke_tokens(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(instance: User, **_kwargs: Any) -> None:  # noqa: ANN401
+    # Строки больше нет: токены отклоняет отметка в кэше, а без общего кэша —
+    # проверка пользователя по БД
+    mark_revoked(instance.pk, instance.token_version + 1)
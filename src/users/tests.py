@@ -1,2 +1,451 @@
+from datetime import timedelta
+from io import StringIO
+from threading import Event, Thread
+from typing import ClassVar
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.common.testing import QueryBudgetTestCase, auth_headers
+from src.users.authentication import VersionedRefreshToken
+from src.users.denylist import BloomFilter, TokenDenylist, denylist
+from src.users.enums import IdentityProvider
+from src.users.hashing import HashingPool, hash_rejected
+from src.users.identities import identities
+from src.users.models import Identity, TokenUser, User
+
+
+class UserViewQueryBudgetTests(QueryBudgetTestCase):
+    def exercise(self, dataset: str) -> dict[str, int]:
+        email = f"{dataset}@example.com"
+        credentials = {"email": email, "password": "S3cur3Passw0rd"}
+        counts: dict[str, int] = {}
+        # Фильтр denylist собирается и догружается лениво: прогрев вне замеров
+        denylist.might_contain("")
+
+        _response, counts["register"] = self.request_with_budget(
+            "POST",
+            "/api/v1/auth/register",
+            dataset=dataset,
+            data=credentials,
+            status=201,
+        )
+        response, counts["token"] = self.request_with_budget(
+            "POST",
+            "/api/v1/auth/token",
+            dataset=dataset,
+            data=credentials,
+        )
+        tokens = response.json()
+        _response, counts["refresh"] = self.request_with_budget(
+            "POST",
+            "/api/v1/auth/token/refresh",
+            dataset=dataset,
+            data={"refresh": tokens["refresh"]},
+        )
+        _response, counts["logout"] = self.request_with_budget(
+            "POST",
+            "/api/v1/auth/logout",
+            dataset=dataset,
+            user=Identity.objects.get(value=email).user,
+            data={"refresh": tokens["refresh"]},
+            status=204,
+        )
+        return counts
+
+    def test_queries_fit_budget_and_do_not_grow_with_data(self) -> None:
+        small = self.exercise("small")
+        users = User.objects.bulk_create(
+            User(username=f"user-{number}") for number in range(200)
+        )
+        Identity.objects.bulk_create(
+            Identity(
+                user=user,
+                provider=IdentityProvider.EMAIL,
+                value=f"{user.username}@example.com",
+            )
+            for user in users
+        )
+        self.assertEqual(self.exercise("large"), small)
+
+
+@override_settings(SINGLE_PROCESS=True)
+class StatelessAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(username="user", is_staff=True)
+
+    def setUp(self) -> None:
+        # Отметки об отзыве в кэше переживают откат транзакции теста
+        cache.clear()
+
+    def test_request_does_not_read_user_row(self) -> None:
+        client = Client(headers=auth_headers(self.user))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/surveys/list")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('FROM "users"', queries[0]["sql"])
+
+    def test_token_without_version_is_checked_in_database(self) -> None:
+        client = Client(
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/surveys/list")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2)
+
+    def test_token_user_hydrates_all_fields_at_once(self) -> None:
+        user = TokenUser.from_fields(
+            id=self.user.pk,
+            is_active=True,
+            is_staff=True,
+            token_version=1,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(user.is_staff)
+        self.assertEqual(len(queries), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(user.username, "user")
+            self.assertIsNone(user.last_login)
+        self.assertEqual(len(queries), 1)
+
+    def test_admin_revokes_access_and_refresh_tokens(self) -> None:
+        refresh = VersionedRefreshToken.for_user(self.user)
+        client = Client(
+            headers={"Authorization": f"Bearer {refresh.access_token}"},
+        )
+        self.assertEqual(client.get("/api/v1/surveys/list").status_code, 200)
+
+        admin = Client()
+        admin.force_login(User.objects.create_superuser(username="admin"))
+        admin.post(
+            "/admin/users/user/",
+            {"action": "revoke_user_tokens", "_selected_action": [self.user.pk]},
+        )
+
+        self.assertEqual(client.get("/api/v1/surveys/list").status_code, 401)
+        response = self.client.post(
+            "/api/v1/auth/token/refresh",
+            {"refresh": str(refresh)},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+        fresh = Client(headers=auth_headers(User.objects.get(pk=self.user.pk)))
+        self.assertEqual(fresh.get("/api/v1/surveys/list").status_code, 200)
+
+    def test_saving_snapshot_fields_revokes_tokens(self) -> None:
+        client = Client(headers=auth_headers(self.user))
+        self.user.first_name = "Имя"
+        self.user.save()
+        self.assertEqual(client.get("/api/v1/surveys/list").status_code, 200)
+
+        # Не через админку: любой save() с новым is_active отзывает токены
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(client.get("/api/v1/surveys/list").status_code, 401)
+
+    def test_deleted_user_tokens_are_rejected(self) -> None:
+        client = Client(headers=auth_headers(self.user))
+        admin = Client()
+        admin.force_login(User.objects.create_superuser(username="admin"))
+        admin.post(f"/admin/users/user/{self.user.pk}/delete/", {"post": "yes"})
+
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        response = client.post(
+            "/api/v1/surveys/create",
+            {"title": "Опрос"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_process_local_cache_checks_user_row(self) -> None:
+        client = Client(headers=auth_headers(self.user))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get("/api/v1/surveys/list").status_code, 200)
+        self.assertEqual(len(queries), 2)
+
+        # Отзыв в другом процессе: версия в БД выросла, отметки в кэше нет
+        User.objects.filter(pk=self.user.pk).update(
+            token_version=F("token_version") + 1,
+        )
+        self.assertEqual(client.get("/api/v1/surveys/list").status_code, 401)
+        fresh = Client(headers=auth_headers(User.objects.get(pk=self.user.pk)))
+        self.assertEqual(fresh.get("/api/v1/surveys/list").status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(fresh.get("/api/v1/surveys/list").status_code, 401)
+
+
+@override_settings(SINGLE_PROCESS=True)
+class TokenDenylistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(username="user")
+
+    def setUp(self) -> None:
+        cache.clear()
+        denylist.clear()
+
+    def refresh(self, token: VersionedRefreshToken) -> int:
+        return self.client.post(
+            "/api/v1/auth/token/refresh",
+            {"refresh": str(token)},
+            content_type="application/json",
+        ).status_code
+
+    def test_bloom_filter_has_no_false_negatives(self) -> None:
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{number}" for number in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other-{number}" in bloom for number in range(10_000))
+        self.assertLess(false_positives, 300)
+
+    def test_refresh_skips_blacklist_table_unless_token_is_in_filter(self) -> None:
+        token = VersionedRefreshToken.for_user(self.user)
+        denylist.might_contain("")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh(token), 200)
+        self.assertFalse(
+            any("blacklistedtoken" in query["sql"] for query in queries),
+        )
+
+        token.blacklist()
+
+        self.assertEqual(self.refresh(token), 401)
+
+    def test_revocation_in_other_process_is_picked_up(self) -> None:
+        token = VersionedRefreshToken.for_user(self.user)
+        denylist.might_contain("")
+
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        BlacklistedToken.objects.create(token=outstanding)
+        TokenDenylist().add(token["jti"])
+
+        self.assertEqual(self.refresh(token), 401)
+
+    def test_separate_filters_see_each_others_revocations(self) -> None:
+        token = VersionedRefreshToken.for_user(self.user)
+        jti = token["jti"]
+        worker_a, worker_b = TokenDenylist(), TokenDenylist()
+        self.assertFalse(worker_b.might_contain(jti))
+
+        token.blacklist()
+        worker_a.add(jti)
+
+        self.assertTrue(worker_b.might_contain(jti))
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_process_local_cache_falls_back_to_database(self) -> None:
+        token = VersionedRefreshToken.for_user(self.user)
+        # Отзыв в другом процессе: поколение в общем кэше не сменилось
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        BlacklistedToken.objects.create(token=outstanding)
+
+        self.assertTrue(TokenDenylist().might_contain(token["jti"]))
+        self.assertEqual(self.refresh(token), 401)
+
+    def test_prune_deletes_expired_tokens_in_batches(self) -> None:
+        now = timezone.now()
+        expired = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                user=self.user,
+                jti=f"expired-{number}",
+                token="",
+                expires_at=now - timedelta(days=1),
+            )
+            for number in range(5)
+        )
+        BlacklistedToken.objects.create(token=expired[0])
+        alive = VersionedRefreshToken.for_user(self.user)
+
+        out = StringIO()
+        call_command(
+            "prune_tokens",
+            "--batch-size",
+            "2",
+            "--max-batches",
+            "2",
+            stdout=out,
+        )
+        self.assertIn("Deleted 4", out.getvalue())
+        call_command("prune_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)),
+            [alive["jti"]],
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    credentials: ClassVar[dict[str, str]] = {
+        "email": "hashing@example.com",
+        "password": "S3cur3Passw0rd",
+    }
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def post(self, path: str) -> HttpResponse:
+        return self.client.post(
+            path,
+            self.credentials,
+            content_type="application/json",
+        )
+
+    def test_register_hashes_with_configured_iterations(self) -> None:
+        self.assertEqual(self.post("/api/v1/auth/register").status_code, 201)
+
+        user = Identity.objects.get(value=self.credentials["email"]).user
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password(self.credentials["password"]))
+
+    def test_login_rehashes_outdated_hash(self) -> None:
+        self.post("/api/v1/auth/register")
+        user = Identity.objects.get(value=self.credentials["email"]).user
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.post("/api/v1/auth/token").status_code, 200)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+            # Пароль тот же: перехеширование не отзывает токены
+            self.assertEqual(user.token_version, 1)
+            self.assertEqual(self.post("/api/v1/auth/token").status_code, 200)
+
+    def test_saturated_pool_answers_429(self) -> None:
+        self.post("/api/v1/auth/register")
+        pool = HashingPool(workers=1, queue_size=0)
+        started, release = Event(), Event()
+
+        def block() -> None:
+            started.set()
+            release.wait()
+
+        worker = Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait()
+        try:
+            self.assertEqual(pool.running, 1)
+            rejected = hash_rejected.value()
+            with patch("src.users.hashing.hashing_pool", pool):
+                response = self.post("/api/v1/auth/token")
+        finally:
+            release.set()
+            worker.join()
+            pool.shutdown()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(hash_rejected.value(), rejected + 1)
+        self.assertEqual((pool.running, pool.queued), (0, 0))
+
+    def test_benchmark_hasher_suggests_iterations(self) -> None:
+        out = StringIO()
+        call_command(
+            "benchmark_hasher",
+            "--iterations",
+            "10000",
+            "--rounds",
+            "1",
+            stdout=out,
+        )
+        self.assertIn("10000 iterations", out.getvalue())
+        self.assertIn("PASSWORD_HASH_ITERATIONS=", out.getvalue())
+
+
+@override_settings(SINGLE_PROCESS=True)
+class IdentityRepositoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(username="user")
+        cls.identity = Identity.objects.create(
+            user=cls.user,
+            provider=IdentityProvider.EMAIL,
+            value=" Known@Example.COM",
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def lookup(self, email: str) -> User | None:
+        return identities.get_user(IdentityProvider.EMAIL, email)
+
+    def test_email_is_stored_and_matched_case_insensitively(self) -> None:
+        self.assertEqual(self.identity.value, "known@example.com")
+        self.assertEqual(self.lookup("KNOWN@example.com "), self.user)
+        response = self.client.post(
+            "/api/v1/auth/register",
+            {"email": "Known@example.com", "password": "S3cur3Passw0rd"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_email_is_cached_until_registered(self) -> None:
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.lookup("new@example.com"))
+            self.assertIsNone(self.lookup("new@example.com"))
+            self.assertFalse(
+                identities.exists(IdentityProvider.EMAIL, "New@example.com"),
+            )
+
+        identities.create(self.user, IdentityProvider.EMAIL, "New@Example.com")
+
+        self.assertEqual(self.lookup("new@example.com"), self.user)
+
+    def test_known_email_is_cached_and_dropped_on_change(self) -> None:
+        self.lookup("known@example.com")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                identities.user_id(IdentityProvider.EMAIL, "known@example.com"),
+                self.user.pk,
+            )
+
+        self.identity.value = "renamed@example.com"
+        self.identity.save()
+
+        self.assertIsNone(self.lookup("known@example.com"))
+        self.assertEqual(self.lookup("renamed@example.com"), self.user)
+
+    def test_deleted_identity_is_dropped_from_cache(self) -> None:
+        self.lookup("known@example.com")
+
+        self.identity.delete()
+
+        self.assertIsNone(self.lookup("known@example.com"))
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_process_local_cache_is_not_used(self) -> None:
+        self.assertIsNone(self.lookup("new@example.com"))
+        # Регистрация в другом процессе: сброс ключа сюда не доходит
+        Identity.objects.bulk_create(
+            [
+                Identity(
+                    user=self.user,
+                    provider=IdentityProvider.EMAIL,
+                    value="new@example.com",
+                ),
+            ],
+        )
+
+        self.assertEqual(self.lookup("new@example.com"), self.user)
@@ -5,18 +5,22 @@ from rest_framework import permissions, status
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from src.common.query_budget import query_budget
+
+from .authentication import VersionedRefreshToken
 from .serializers import (
     EmailTokenObtainPairSerializer,
     LogoutSerializer,
     RegisterSerializer,
+    VersionedTokenRefreshSerializer,
 )
 
 logger = logging.getLogger(__name__)
 
 
+@query_budget(post=3)
 class RegisterView(APIView):
     permission_classes = (permissions.AllowAny,)
 
@@ -24,7 +28,10 @@ class RegisterView(APIView):
         request=RegisterSerializer,
         responses={status.HTTP_201_CREATED: RegisterSerializer},
         summary="Регистрация пользователя",
-        description="Создаёт пользователя с email и паролем.",
+        description=(
+            "Создаёт пользователя с email и паролем. Если пул хеширования "
+            "паролей занят, отвечает 429 с заголовком Retry-After."
+        ),
         examples=[
             OpenApiExample(
                 "Successful response",
@@ -57,6 +64,7 @@ class RegisterView(APIView):
         )
 
 
+@query_budget(post=2)
 class TokenObtainView(APIView):
     permission_classes = (permissions.AllowAny,)
 
@@ -64,7 +72,10 @@ class TokenObtainView(APIView):
         request=EmailTokenObtainPairSerializer,
         responses={status.HTTP_200_OK: EmailTokenObtainPairSerializer},
         summary="Получение JWT",
-        description="Возвращает пару access/refresh по email и паролю.",
+        description=(
+            "Возвращает пару access/refresh по email и паролю. Если пул "
+            "хеширования паролей занят, отвечает 429 с заголовком Retry-After."
+        ),
         examples=[
             OpenApiExample(
                 "JWT token pair",
@@ -92,12 +103,13 @@ class TokenObtainView(APIView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
+@query_budget(post=1)
 class TokenRefreshView(APIView):
     permission_classes = (permissions.AllowAny,)
 
     @extend_schema(
-        request=TokenRefreshSerializer,
-        responses={status.HTTP_200_OK: TokenRefreshSerializer},
+        request=VersionedTokenRefreshSerializer,
+        responses={status.HTTP_200_OK: VersionedTokenRefreshSerializer},
         summary="Обновление access-токена",
         description="Принимает refresh и возвращает новый access-токен.",
         examples=[
@@ -120,11 +132,12 @@ class TokenRefreshView(APIView):
         ],
     )
     def post(self, request: Request) -> Response:
-        serializer = TokenRefreshSerializer(data=request.data)
+        serializer = VersionedTokenRefreshSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         return Response(serializer.validated_data)
 
 
+@query_budget(post=6)
 class LogoutView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
@@ -150,6 +163,9 @@ class LogoutView(APIView):
         serializer = LogoutSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         refresh_token = serializer.validated_data["refresh"]
-        token = RefreshToken(refresh_token)
+        try:
+            token = VersionedRefreshToken(refresh_token)
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0]) from exc
         token.blacklist()
         return Response(status=status.HTTP_204_NO_CONTENT)